@@ -6,6 +6,7 @@ import logging
 logging.basicConfig(format='[%(filename)s:%(lineno)s %(levelname)s %(message)s', stream=sys.stdout)
 logging.getLogger().setLevel(logging.INFO)
 from optparse import OptionParser
+import libsolace
 from libsolace.items.SolaceBridge import SolaceBridge
 
 
@@ -13,10 +14,10 @@ def solace_bridge(options=None, **kwargs):
     """ Create / Update Profile """
 
     logging.info("Bridge Options: %s" % options)
-    bridgeApi = SolaceBridge(options=options)
+    bridgeApi = libsolace.plugin_registry("SolaceBridge")(options=options, **kwargs)
 
-    for command in bridgeApi.cq.commands:
-        logging.info("api: %s, command: %s kwargs: %s" % command)
+    for command, kwargs in bridgeApi.commands.commands:
+        logging.info("api: %s, command: %s kwargs: %s" % (kwargs['cluster'], command, kwargs))
 
 
 if __name__ == "__main__":
@@ -26,7 +26,8 @@ def solace_delete_client_username(options):
     """
     for environment in options.environment:
 
-        solace = SolaceAPI(environment, testmode=options.testmode)
+        # the same users and queues are looked up repeatedly, writes invalidate the vpn's cached replies
+        solace = SolaceAPI(environment, testmode=options.testmode, request_cache=True)
 
         try:
             vpnname = name(options.vpnname, environment)
@@ -45,7 +46,8 @@ def solace_delete_client_username(options):
             try:
                 try:
                     user = \
-                    solace.manage("SolaceUser").get(client_username=username, vpn_name=vpnname)[0]['rpc-reply']['rpc'][
+                    solace.manage("SolaceUser").get(client_username=username, vpn_name=vpnname,
+                                                    anyNode=True)[0]['rpc-reply']['rpc'][
                         'show']['client-username']['client-usernames']['client-username']
                 except KeyError, e:
                     logging.error("No such user exists: %s in vpn %s" % (username, vpnname))
@@ -11,6 +11,7 @@ import libsolace.settingsloader as settings
 from libsolace.SolaceAPI import SolaceAPI
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
 from libsolace.SolaceCommandQueue import SolaceCommandQueue
+from libsolace.SolaceCommandExecutor import SolaceCommandExecutor
 from optparse import OptionParser
 import sys
 import pprint
@@ -54,12 +55,14 @@ def validate_the_plan(connection=None, vpn_name=None, queues=None):
 
             '''
             cmd = delete_msgs_request(connection=connection, queue=queue, vpn_name=vpn_name)
-            commands.enqueue(cmd)
+            commands.enqueue(cmd, vpn_name=vpn_name, queue_name=queue.strip(), primaryOnly=True)
 
     except Exception, e:
         print("Error %s" % e)
         raise
 
+    return commands
+
 
 if __name__ == '__main__':
     """ parse opts, read site.xml, start provisioning vpns. """
@@ -78,6 +81,8 @@ if __name__ == '__main__':
     parser.add_option("-r", "--queueregex", action="store_true", dest="queue_filter",
                       default=False, help="queue is a search pattern, so search for queues named like 'queue'")
 
+    parser.add_option("-c", "--concurrency", action="store", type="int", dest="concurrency",
+                      default=None, help="requests in flight per appliance")
     (options, args) = parser.parse_args()
 
     if not options.env:
@@ -105,13 +110,14 @@ if __name__ == '__main__':
     pprint.pprint(queues)
 
     # validating the plan
-    validate_the_plan(connection=connection, vpn_name=options.vpn_name, queues=queues)
+    commands = validate_the_plan(connection=connection, vpn_name=options.vpn_name, queues=queues)
 
     s = raw_input('Do you want to continue? N/y? ')
 
     if s.lower() == 'y':
-        for queue in queues:
-            x = delete_msgs_request(connection=connection, vpn_name=options.vpn_name, queue=queue)
-            connection.rpc(x, primaryOnly=True)
+        results = SolaceCommandExecutor(connection, concurrency=options.concurrency, fail_fast=False).run(commands)
+        for result in results:
+            if not result.ok:
+                print("%s: %s %s" % (result.kwargs['queue_name'], result.status, result.reason))
     else:
         print("chickening out...")
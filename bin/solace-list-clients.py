@@ -13,6 +13,7 @@ logging.basicConfig(format='[%(module)s] %(filename)s:%(lineno)s %(asctime)s %(l
                     stream=sys.stderr)
 import libsolace.settingsloader as settings
 from libsolace.SolaceAPI import SolaceAPI
+from libsolace.SolaceRequestCache import SolaceRequestCache, DEFAULT_DIRECTORY
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
 from optparse import OptionParser
 import simplejson as json
@@ -42,6 +43,10 @@ if __name__ == '__main__':
     parser.add_option("--influxdb-user", action="store", type="string", dest="influxdb_user", help="influxdb user", default="root")
     parser.add_option("--influxdb-pass", action="store", type="string", dest="influxdb_pass", help="influxdb pass", default="root")
     parser.add_option("--influxdb-db", action="store", type="string", dest="influxdb_db", help="influxdb db name", default="solace-clients")
+    parser.add_option("--cache-ttl", action="store", type="float", dest="cache_ttl", default=None,
+                      help="reuse the appliances' replies from other runs for this many seconds")
+    parser.add_option("--cache-dir", action="store", type="string", dest="cache_dir", default=DEFAULT_DIRECTORY,
+                      help="where the replies are shared between runs, default %default")
 
 
     (options, args) = parser.parse_args()
@@ -71,7 +76,10 @@ if __name__ == '__main__':
     settings.env = options.env.lower()
 
     logging.info("Connecting to appliance in %s, testmode:%s" % (settings.env, options.testmode))
-    connection = SolaceAPI(settings.env, testmode=options.testmode)
+    request_cache = None
+    if options.cache_ttl:
+        request_cache = SolaceRequestCache(ttl=options.cache_ttl, directory=options.cache_dir)
+    connection = SolaceAPI(settings.env, testmode=options.testmode, request_cache=request_cache)
 
     if options.details:
         connection.x = SolaceXMLBuilder("show clients details")
@@ -12,6 +12,7 @@ import sys
 logging.basicConfig(format='[%(module)s] %(filename)s:%(lineno)s %(asctime)s %(levelname)s %(message)s', stream=sys.stderr)
 import libsolace.settingsloader as settings
 from libsolace.SolaceAPI import SolaceAPI
+from libsolace.SolaceRequestCache import SolaceRequestCache, DEFAULT_DIRECTORY
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
 from optparse import OptionParser
 import sys
@@ -25,6 +26,10 @@ if __name__ == '__main__':
                       help="environment to run job in eg:[ dev | ci1 | si1 | qa1 | pt1 | prod ]")
     parser.add_option("-d", "--debug", action="store_true", dest="debug",
                       default=False, help="toggles solace debug mode")
+    parser.add_option("--cache-ttl", action="store", type="float", dest="cache_ttl", default=None,
+                      help="reuse the appliances' replies from other runs for this many seconds")
+    parser.add_option("--cache-dir", action="store", type="string", dest="cache_dir", default=DEFAULT_DIRECTORY,
+                      help="where the replies are shared between runs, default %default")
 
     (options, args) = parser.parse_args()
 
@@ -39,7 +44,10 @@ if __name__ == '__main__':
     settings.env = options.env.lower()
 
     logging.info("Connecting to appliance in %s, testmode:%s" % (settings.env, options.testmode))
-    connection = SolaceAPI(settings.env, testmode=options.testmode)
+    request_cache = None
+    if options.cache_ttl:
+        request_cache = SolaceRequestCache(ttl=options.cache_ttl, directory=options.cache_dir)
+    connection = SolaceAPI(settings.env, testmode=options.testmode, request_cache=request_cache)
 
     connection.manage("SolaceClientProfile")
 
@@ -22,6 +22,7 @@ logging.basicConfig(format='[%(module)s] %(filename)s:%(lineno)s %(asctime)s %(l
                     stream=sys.stderr)
 import libsolace.settingsloader as settings
 from libsolace.SolaceAPI import SolaceAPI
+from libsolace.SolaceRequestCache import SolaceRequestCache, DEFAULT_DIRECTORY
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
 from optparse import OptionParser
 import simplejson as json
@@ -157,6 +158,10 @@ if __name__ == '__main__':
 
     parser.add_option("--set-retention", action="store_true", dest="update_retention", default=False,
                       help="update the retention default policy in accordance with --retention")
+    parser.add_option("--cache-ttl", action="store", type="float", dest="cache_ttl", default=None,
+                      help="reuse the appliances' replies from other runs for this many seconds")
+    parser.add_option("--cache-dir", action="store", type="string", dest="cache_dir", default=DEFAULT_DIRECTORY,
+                      help="where the replies are shared between runs, default %default")
 
     (options, args) = parser.parse_args()
 
@@ -193,7 +198,10 @@ if __name__ == '__main__':
     settings.env = options.env.lower()
 
     logging.info("Connecting to appliance in %s, testmode:%s" % (settings.env, options.testmode))
-    connection = SolaceAPI(settings.env, testmode=options.testmode)
+    request_cache = None
+    if options.cache_ttl:
+        request_cache = SolaceRequestCache(ttl=options.cache_ttl, directory=options.cache_dir)
+    connection = SolaceAPI(settings.env, testmode=options.testmode, request_cache=request_cache)
 
     """
     Gather client stats, this is quite slow if you have MANY clients!
@@ -209,11 +217,8 @@ if __name__ == '__main__':
         # set time now immediately before we request
         timeNow = get_time()
 
-        # get the clients
-        clients = connection.rpc(str(connection.x), primaryOnly=True)
-
-        # iterate over values of interest.
-        for c in clients[0]['rpc-reply']['rpc']['show']['client']['primary-virtual-router']['client']:
+        # get the clients a page at a time, iterate over values of interest.
+        for c in connection.rpc_iter(str(connection.x), 'rpc-reply.rpc.show.client.primary-virtual-router.client'):
             logging.debug(c)
             pump_metrics(options.env, c, "client-stats", influx_client=client, tag_key_name=["name", "message-vpn"])
 
@@ -231,12 +236,8 @@ if __name__ == '__main__':
         # set time now immediately before we request
         timeNow = get_time()
 
-        # get the clients
-        clients = connection.rpc(str(connection.x), primaryOnly=True)
-        # print json.dumps(clients[0], sort_keys=False, indent=4, separators=(',', ': '))
-
-        # iterate over values of interest.
-        for c in clients[0]['rpc-reply']['rpc']['show']['client']['primary-virtual-router']['client']:
+        # get the clients a page at a time, iterate over values of interest.
+        for c in connection.rpc_iter(str(connection.x), 'rpc-reply.rpc.show.client.primary-virtual-router.client'):
             print "doc start"
             print json.dumps(c, sort_keys=False, indent=4, separators=(',', ': '))
             print "doc end"
@@ -260,10 +261,8 @@ if __name__ == '__main__':
         # set time now immediately before we request
         timeNow = get_time()
 
-        vpns = connection.rpc(str(connection.x), primaryOnly=True)
-
-        # iterate over vpns
-        for v in vpns[0]['rpc-reply']['rpc']['show']['message-vpn']['vpn']:
+        # iterate over vpns a page at a time
+        for v in connection.rpc_iter(str(connection.x), 'rpc-reply.rpc.show.message-vpn.vpn'):
             logging.debug(v)
             pump_metrics(options.env, v, "vpn-stats", influx_client=client, tag_key_name=["name"])
 
@@ -324,14 +323,20 @@ if __name__ == '__main__':
         # set time now immediately before we request
         timeNow = get_time()
 
-        queues = connection.rpc(str(connection.x), primaryOnly=True)
-
-        # print json.dumps(queues[0], sort_keys=False, indent=4, separators=(',', ': '))
-
-        for q in queues[0]['rpc-reply']['rpc']['show']['queue']['queues']["queue"]:
+        # iterate over queues a page at a time
+        for q in connection.rpc_iter(str(connection.x), 'rpc-reply.rpc.show.queue.queues.queue'):
             # print json.dumps(q, sort_keys=False, indent=4, separators=(',', ': '))
             tags["message-vpn"] = q["info"]["message-vpn"]
             tags["queue-name"] = q["name"]
             pump_metrics(options.env, q, "queues-stats", influx_client=client, tag_key_name=tag_keys, tags=tags)
 
         logging.info("Spool Gather and Commit Time: %s" % (time.time() - startTime))
+
+    """
+    The admission control limits of the requests above, per appliance
+    """
+    timeNow = get_time()
+    for host, limits in connection.limits().items():
+        # the fields are sent as integers
+        limits["latency_ms"] = int((limits.pop("latency") or 0) * 1000)
+        pump_metrics(options.env, limits, "semp-limits", influx_client=client, tag_key_name=[], tags={"host": host})
@@ -13,6 +13,7 @@ import libsolace.settingsloader as settings
 from libsolace.SolaceAPI import SolaceAPI
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
 from libsolace.SolaceCommandQueue import SolaceCommandQueue
+from libsolace.SolaceCommandExecutor import SolaceCommandExecutor
 from optparse import OptionParser
 import pprint
 settings.debugmode = False
@@ -55,7 +56,7 @@ def generateXMLForManagingRejectMsgToSenderOnDiscard(vpn_name=None, queues=None,
                 cmd.message_spool.queue.reject_msg_to_sender_on_discard
             else:
                 cmd.message_spool.queue.no.reject_msg_to_sender_on_discard
-            commands.enqueue(cmd)
+            commands.enqueue(cmd, vpn_name=vpn_name, queue_name=queue)
 
     except Exception, e:
         print("Error %s" % e)
@@ -76,6 +77,8 @@ if __name__ == '__main__':
                       default=False, help="only test configuration and exit")
     parser.add_option("-r", "--reject_msg_to_sender_on_discard", action="store_true", dest="reject_msg_to_sender_on_discard",
                       default=False, help="set to enable reject-msg-to-sender-on-discard")
+    parser.add_option("-c", "--concurrency", action="store", type="int", dest="concurrency",
+                      default=None, help="requests in flight per appliance")
     (options, args) = parser.parse_args()
 
     if not options.env:
@@ -101,7 +104,9 @@ if __name__ == '__main__':
     s = raw_input('Do you want to continue? N/y? ')
 
     if s.lower() == 'y':
-        for cmd in commands.commands:
-            connection.rpc(str(cmd))
+        results = SolaceCommandExecutor(connection, concurrency=options.concurrency, fail_fast=False).run(commands)
+        for result in results:
+            if not result.ok:
+                print("%s: %s %s" % (result.kwargs['queue_name'], result.status, result.reason))
     else:
         print("chickening out...")
@@ -18,6 +18,9 @@ Running with a local XML file with shutdown both queues and users before modific
 Running with a local XML file with shutdown only queues before modification, re-enable post
 ./bin/solace-provision.py -e dev -p SolaceTest --xmlfile config.xml -s q
 
+Running with a local XML file, provisioning four VPNs at once
+./bin/solace-provision.py -e dev -p SolaceTest --xmlfile config.xml --parallel 4
+
 
 The example above reads through the config XML for VPN's owned by SolaceTest, and then scan for
 products using those VPN's and builds up the commands to be exectuted in order to provision the VPN and USERS. This
@@ -28,6 +31,7 @@ API on those devices.
 
 import os
 import sys
+import time
 import logging
 logging.basicConfig(format='%(filename)s:%(lineno)s %(levelname)s %(message)s', stream=sys.stdout)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -44,7 +48,9 @@ import libsolace.settingsloader as settings
 try:
     import libsolace
     from libsolace import SolaceAPI
+    from libsolace.SolaceCommandExecutor import SolaceCommandExecutor
     from libsolace.SolaceProvision import SolaceProvision
+    from libsolace.util import call_concurrently
 except:
     print("Unable to import required libraries, is libsolace installed? try 'pip install "
           "git+https://git.somedomain.com/git/libsolace.git'")
@@ -114,6 +120,12 @@ if __name__ == '__main__':
         default=True, help="prevent queue creation")
     parser.add_option("--no-detect-status", action="store_false", dest="detect_status",
         default=True, help="disable detection of primary and backup statuses")
+    parser.add_option("--reconcile", action="store_true", dest="reconcile",
+        default=False, help="only send the commands which change something on the appliances")
+    parser.add_option("--parallel", action="store", type="int", dest="parallel",
+        default=1, help="number of VPNs to provision at once")
+    parser.add_option("--concurrency", action="store", type="int", dest="concurrency",
+        default=None, help="requests in flight per appliance, shared by all the VPNs")
 
     parser.add_option("-d", "--debug", action="store_true", dest="debugmode",
         default=False, help="enable debug mode logging")
@@ -172,7 +184,13 @@ if __name__ == '__main__':
 
     logging.info("VPNS %s" % vpns)
 
-    # Call main with environment from command line
+    # one api and executor for all the vpns, so the appliances are detected once and the requests in flight per
+    # appliance are limited across all of them
+    api = SolaceAPI.SolaceAPI(options.env, testmode=options.testmode, version=options.soltr_version,
+                              detect_status=options.detect_status, reconcile=options.reconcile)
+    executor = SolaceCommandExecutor(api, concurrency=options.concurrency, fail_fast=False)
+
+    jobs = []
     for vpn in vpns:
         users = cmdbapi.get_users_of_vpn(vpn['id'], environment=options.env)
         logging.info(users)
@@ -182,8 +200,12 @@ if __name__ == '__main__':
         logging.info('Found vpn %s' % json.dumps(str(vpn), ensure_ascii=False))
         logging.info('Found users %s' % users)
         logging.info('Found queues %s' % queues)
-        logging.info("Provisioning %s" % vpn['id'])
+        jobs.append((vpn, users, queues))
 
+    def provision(job):
+        vpn, users, queues = job
+        logging.info("Provisioning %s" % vpn['id'])
+        start = time.time()
         result = SolaceProvision(
             vpn_dict = vpn,
             queue_dict = queues,
@@ -194,5 +216,26 @@ if __name__ == '__main__':
             shutdown_on_apply = options.shutdown_on_apply,
             version = options.soltr_version,
             detect_status = options.detect_status,
-            create_queues = options.create_queues
+            reconcile = options.reconcile,
+            create_queues = options.create_queues,
+            api = api,
+            executor = executor
         )
+        return result, time.time() - start
+
+    outcomes = call_concurrently(provision, jobs, workers=options.parallel)
+
+    print("Summary:")
+    for (vpn, users, queues), (outcome, exc_info) in zip(jobs, outcomes):
+        if exc_info is not None:
+            print("  %s: error: %s" % (vpn['id'], exc_info[1]))
+            continue
+        result, elapsed = outcome
+        not_ok = [r for r in result.results if not r.ok]
+        print("  %s: %s, %s commands, %s not ok, %.1fs" % (vpn['id'], "ok" if not not_ok else "failed",
+                                                          len(result.results), len(not_ok), elapsed))
+    api.close()
+
+    for outcome, exc_info in outcomes:
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
@@ -0,0 +1,283 @@
+import logging
+import Queue
+import sys
+import threading
+
+from libsolace.SolaceAPI import SolaceAPI
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+__doc__ = """
+A non blocking variant of :class:`libsolace.SolaceAPI.SolaceAPI`, for services which keep many SEMP
+requests in flight, e.g. across many environments.
+
+Every request returns a :class:`SolaceFuture` at once, and is sent by a :class:`WorkerPool` thread
+through a shared SolaceAPI, its connection pools and its request cache. A pool can be shared by the
+AsyncSolaceAPI instances of several environments, so the number of threads stays bounded however many
+requests are waiting.
+
+Example:
+    >>> api = AsyncSolaceAPI("dev")
+    >>> spool = api.rpc('<rpc semp-version="soltr/7_1_1"><show><message-spool/></show></rpc>', primaryOnly=True)
+    >>> vpns = api.rpc_iter('<rpc semp-version="soltr/7_1_1"><show><message-vpn><vpn-name>*</vpn-name></message-vpn>'
+    ...                     '</show></rpc>', 'rpc-reply.rpc.show.message-vpn.vpn')
+    >>> spool, vpns = gather([spool, vpns])
+    >>> api.close()
+"""
+
+
+class SolaceTimeout(Exception):
+    """ A future was not done in time """
+    pass
+
+
+class SolaceFuture(object):
+    """
+    The result of a call running in the background.
+
+    Example:
+        >>> future = SolaceFuture()
+        >>> future.add_done_callback(lambda f: sys.stdout.write("done: %s\\n" % f.result()))
+        >>> future.set_result(42)
+        done: 42
+        >>> future.result()
+        42
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.callbacks = []
+        self.value = None
+        self.exc_info = None
+
+    def done(self):
+        """ :returns: True once the call returned or raised """
+        return self.event.is_set()
+
+    def result(self, timeout=None):
+        """
+        Waits for the call and returns its result, or raises its exception.
+
+        :param timeout: seconds to wait, default until it is done
+        :type timeout: float
+        :raises SolaceTimeout: if the call is not done in time
+        """
+        self.__wait(timeout)
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+        return self.value
+
+    def exception(self, timeout=None):
+        """ Waits for the call and returns the exception it raised, None if it returned """
+        self.__wait(timeout)
+        return self.exc_info[1] if self.exc_info is not None else None
+
+    def add_done_callback(self, callback):
+        """ Calls `callback(future)` once the call is done, at once if it already is """
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return
+        self.__call(callback)
+
+    def set_result(self, value):
+        self.value = value
+        self.__finish()
+
+    def set_exception(self, exc_info):
+        """ :param exc_info: the exception as returned by sys.exc_info() """
+        self.exc_info = exc_info
+        self.__finish()
+
+    def __wait(self, timeout):
+        # Event.wait without a timeout can not be interrupted in python 2
+        while not self.event.wait(timeout if timeout is not None else 3600):
+            if timeout is not None:
+                raise SolaceTimeout("Not done in %ss" % timeout)
+
+    def __finish(self):
+        with self.lock:
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            self.__call(callback)
+
+    def __call(self, callback):
+        try:
+            callback(self)
+        except Exception, e:
+            logger.exception("Future callback failed: %s" % e)
+
+
+class WorkerPool(object):
+    """
+    A fixed number of threads running submitted calls in the order they were submitted.
+
+    The threads are started on the first call, and are daemons, so a pool which is not shut down does
+    not keep the process alive.
+
+    :param workers: number of threads
+    :type workers: int
+
+    Example:
+        >>> pool = WorkerPool(2)
+        >>> gather([pool.submit(pow, 2, n) for n in range(4)])
+        [1, 2, 4, 8]
+        >>> pool.shutdown()
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.queue = Queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Calls `func(*args, **kwargs)` in a pool thread.
+
+        :rtype: SolaceFuture
+        """
+        future = SolaceFuture()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("The worker pool is shut down")
+            if len(self.threads) < self.workers:
+                thread = threading.Thread(target=self.__work, name="libsolace-async-%s" % len(self.threads))
+                thread.daemon = True
+                thread.start()
+                self.threads.append(thread)
+            self.queue.put((future, func, args, kwargs))
+        return future
+
+    def shutdown(self, wait=True):
+        """ Stops the threads once the calls submitted so far are done """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            threads = list(self.threads)
+            for thread in threads:
+                self.queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def __work(self):
+        while True:
+            call = self.queue.get()
+            if call is None:
+                return
+            future, func, args, kwargs = call
+            try:
+                future.set_result(func(*args, **kwargs))
+            except:
+                future.set_exception(sys.exc_info())
+
+
+def gather(futures, timeout=None):
+    """
+    Waits for all the futures and returns their results in order, raising the first exception.
+
+    :param futures: list of SolaceFuture
+    :param timeout: seconds to wait for each of them
+    :type timeout: float
+    :rtype: list
+    """
+    return [future.result(timeout) for future in futures]
+
+
+class AsyncSolaceAPI(object):
+    """
+    Sends the requests of a :class:`libsolace.SolaceAPI.SolaceAPI` in the background, and returns
+    :class:`SolaceFuture` objects for their replies.
+
+    :param environment: the environment
+    :type environment: str
+    :param api: the api to send the requests with, default a new one for the environment, made with the
+        other kwargs
+    :type api: libsolace.SolaceAPI.SolaceAPI
+    :param pool: the threads to send the requests from, shared with other instances, default one of the
+        instance's own with `workers` threads
+    :type pool: WorkerPool
+    :param workers: threads of the instance's own pool, default the `ASYNC_WORKERS` setting of the
+        environment, or 4 per appliance connection in `POOL_SIZE`
+    :type workers: int
+    """
+
+    def __init__(self, environment, api=None, pool=None, workers=None, **kwargs):
+        self.environment = environment
+        self.api = api if api is not None else SolaceAPI(environment, **kwargs)
+        self.own_pool = pool is None
+        if pool is None:
+            if workers is None:
+                workers = self.api.config.get('ASYNC_WORKERS', self.api.pool_size * 4)
+            pool = WorkerPool(workers)
+        self.pool = pool
+
+    def rpc(self, xml, **kwargs):
+        """
+        Sends a request, see :func:`libsolace.SolaceAPI.SolaceAPI.rpc` for the kwargs.
+
+        :rtype: SolaceFuture
+        :returns: future of the list of replies
+        """
+        return self.pool.submit(self.api.rpc, xml, **kwargs)
+
+    def rpc_iter(self, xml, path, item_callback=None, **kwargs):
+        """
+        Pages through a show request, see :func:`libsolace.SolaceAPI.SolaceAPI.rpc_iter` for the kwargs.
+
+        :param item_callback: called with each element in a pool thread as the pages are read, instead of
+            keeping them
+        :rtype: SolaceFuture
+        :returns: future of the list of elements, or of their number if `item_callback` is set
+        """
+        def page():
+            items = self.api.rpc_iter(xml, path, **kwargs)
+            if item_callback is None:
+                return list(items)
+            count = 0
+            for item in items:
+                item_callback(item)
+                count += 1
+            return count
+
+        return self.pool.submit(page)
+
+    def manage(self, plugin_name, **kwargs):
+        """
+        Gets a plugin, see :func:`libsolace.SolaceAPI.SolaceAPI.manage`. Plugins which send requests while
+        they are set up do so in a pool thread.
+
+        :rtype: SolaceFuture
+        :returns: future of the plugin instance
+        """
+        return self.pool.submit(self.api.manage, plugin_name, **kwargs)
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Calls anything blocking in a pool thread, e.g. a plugin's method.
+
+        >>> api = AsyncSolaceAPI("dev")
+        >>> queue = api.manage("SolaceQueue").result()
+        >>> reply = api.submit(queue.get, queue_name="q1", vpn_name="dev_testvpn").result()
+
+        :rtype: SolaceFuture
+        """
+        return self.pool.submit(func, *args, **kwargs)
+
+    def close(self):
+        """ Waits for the requests in flight and releases the threads and connections """
+        if self.own_pool:
+            self.pool.shutdown()
+        self.api.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
@@ -2,6 +2,7 @@ import logging
 from functools import wraps
 
 from libsolace.Exceptions import MissingException
+from libsolace.SolaceExistenceIndex import PRIMARY, BACKUP
 from libsolace.util import get_calling_module
 
 logger = logging.getLogger(__name__)
@@ -27,7 +28,7 @@ def deprecation_warning(warning_msg):
     def wrap(f):
         @wraps(f)
         def wrapped_f(*args, **kwargs):
-            module = get_calling_module()
+            module = get_calling_module(logger=logger, level=logging.WARNING)
             logger.warning("Deprecation Warning: %s: %s %s" % (warning_msg, module, f.__name__))
             return f(*args, **kwargs)
 
@@ -36,6 +37,58 @@ def deprecation_warning(warning_msg):
     return wrap
 
 
+def _find(obj, entity, data_path, index, nodes, kwargs):
+    """
+    Finds out which of the appliances in `nodes` have the object. The api's existence index is asked first, if it can
+    not tell, the `entity` getter is called and the answer is recorded in the index, so each object is looked up at
+    most once.
+
+    :returns: dict of node to True if the object exists on it
+    """
+    existence = getattr(getattr(obj, "api", None), "index", None) if index is not None else None
+
+    if existence is not None:
+        found = dict((node, existence.exists(index, node, **kwargs)) for node in nodes)
+        if None not in found.values():
+            logger.info("Existence index: %s %s exists: %s" % (index.name, index.object_key(kwargs), found))
+            return found
+
+    logger.info("Asking entity: %s, for args: %s, kwargs: %s via data_path: %s" % (entity, obj, kwargs, data_path))
+    try:
+        res = getattr(obj, entity)(**kwargs)
+    except MissingException:
+        found = dict((node, False) for node in nodes)
+    else:
+        logger.debug("Response %s" % res)
+        found = {}
+        # try peek into attributes, any raises means the node does not have the object.
+        for position, node in enumerate(nodes):
+            try:
+                document = res[position]
+                for p in data_path.split('.'):
+                    document = document[p]
+                found[node] = True
+            except (KeyError, TypeError, IndexError):
+                logger.info("Object not found on %s" % node.upper())
+                found[node] = False
+
+    if existence is not None:
+        existence.record(index, found, **kwargs)
+    return found
+
+
+def _nodes(primaryOnly, backupOnly, module, kwargs):
+    """ The nodes to check, sets the primaryOnly / backupOnly kwargs for the getter """
+    if primaryOnly:
+        kwargs['primaryOnly'] = primaryOnly
+        return [PRIMARY]
+    elif backupOnly:
+        kwargs['backupOnly'] = backupOnly
+        return [BACKUP]
+    logger.info("Package: %s requests that Both primary and backup be queried" % module)
+    return [PRIMARY, BACKUP]
+
+
 def before(method_name, skip_before=False):
     """
     Call a named method before. This is typically used to tell a object to shutdown so some modification can be made.
@@ -134,7 +187,7 @@ def only_on_shutdown(entity, **kwargs):
                 return f(*args, **kwargs)
             if entity == 'user' and mode in ['b', 'u', True]:
                 return f(*args, **kwargs)
-            module = get_calling_module()
+            module = get_calling_module(logger=logger)
             logger.info(
                 "Package %s requires shutdown of this object, shutdown_on_apply is not set for this object type, "
                 "bypassing %s for entity %s" % (module, f.__name__, entity))
@@ -144,13 +197,16 @@ def only_on_shutdown(entity, **kwargs):
     return wrap
 
 
-def only_if_not_exists(entity, data_path, primaryOnly=False, backupOnly=False, **kwargs):
+def only_if_not_exists(entity, data_path, primaryOnly=False, backupOnly=False, index=None, **kwargs):
     """
     Call the method only if the Solace object does NOT exist in the Solace appliance.
 
-        - if the object's exists caching bit is False, return the method
-        - If the object does not exist, return the method and set the exists bit to False
-        - If the object exists in the appliance, set the exists bit to True
+        - If the object does not exist on some appliances, call the method for those appliances only
+        - If the object exists on all of the appliances, do not call the method
+
+    Whether the object exists is tracked per object in the api's existence index, keyed by the `index` type, the
+    vpn and the object's name, see :class:`libsolace.SolaceExistenceIndex.SolaceExistenceIndex`. Without a `index`
+    type a single exists bit is cached on the plugin instance, see :func:`libsolace.plugin.Plugin.set_exists`.
 
     Example:
 
@@ -171,6 +227,9 @@ def only_if_not_exists(entity, data_path, primaryOnly=False, backupOnly=False, *
     :type primaryOnly: bool
     :param backupOnly: :data:`libsolace.Kwargs.backupOnly`
     :type backupOnly: bool
+    :param index: the object's type in the api's existence index, when set the index is asked instead of calling
+        `entity` for every object
+    :type index: libsolace.SolaceExistenceIndex.IndexedType
     :param force: :data:`libsolace.Kwargs.force`
     :type force: bool
     :rtype: object
@@ -184,114 +243,62 @@ def only_if_not_exists(entity, data_path, primaryOnly=False, backupOnly=False, *
 
             logger.info(kwargs)
 
-            # force kwarg, just return the method to allow exec
-            if "force" in kwargs and kwargs.get('force'):
-                args[0].set_exists(True)
-                return f(*args, **kwargs)
-
-            # default false
-            check_primary = False
-            check_backup = False
-
             # extract package name
-            module = get_calling_module()
+            module = get_calling_module(logger=logger)
 
             # force kwarg, just return the method to allow exec
             if "force" in kwargs and kwargs.get('force'):
                 logger.info("Force being used, returning obj")
-                args[0].set_exists(False)
+                args[0].set_exists(True)
                 return f(*args, **kwargs)
-            else:
-                logger.info("Not forcing return of object")
 
             # determine if were checking both or a single node
-            if primaryOnly:
-                kwargs['primaryOnly'] = primaryOnly
-                check_primary = True
-            elif backupOnly:
-                kwargs['backupOnly'] = backupOnly
-                check_backup = True
-            else:
-                logger.info("Package: %s requests that Both primary and backup be queried" % module)
-                check_primary = True
-                check_backup = True
-
-            # if exists bit is set on the object ( caching )
-            try:
-                if not args[0].exists:
-                    logger.info("Cache hit, object does NOT exist")
-                    return f(*args, **kwargs)
-            except Exception, e:
-                pass
-
-            logger.debug("Cache miss")
-
-            logger.info("Package: %s, asking entity: %s, for args: %s, kwargs: %s via data_path: %s" % (
-                module, entity, str(args), str(kwargs), data_path))
-
-            response_path = data_path.split('.')
-
-            # if the getattr fails with a MissingException, which means our condition is met
-            try:
-                res = getattr(args[0], entity)(**kwargs)
-            except MissingException:
-                exists = False
+            nodes = _nodes(primaryOnly, backupOnly, module, kwargs)
+
+            # plugins without a indexed type cache one exists bit on the instance
+            if index is None:
+                try:
+                    if not args[0].exists:
+                        logger.info("Cache hit, object does NOT exist")
+                        return f(*args, **kwargs)
+                except Exception, e:
+                    pass
+                logger.debug("Cache miss")
+
+            found = _find(args[0], entity, data_path, index, nodes, kwargs)
+
+            # call the method for the nodes which do not have the object
+            if PRIMARY in found and not found[PRIMARY]:
+                kwargs['primaryOnly'] = True
+            if BACKUP in found and not found[BACKUP]:
+                kwargs['backupOnly'] = True
+            exists = all(found.values())
+
+            if index is None:
                 args[0].set_exists(exists)
-                return f(*args, **kwargs)
-
-            logger.info("Response %s" % res)
-
-            # try peek into attributes, any raises means one of the nodes does not have the object.
-            o_res = res
-
-            exists = True
-
-            for p in response_path:
-                if check_primary:
-                    try:
-                        res[0] = res[0][p]
-                    except (KeyError, TypeError, IndexError):
-                        logger.info("Object not found on PRIMARY, key:%s setting primaryOnly" % p)
-                        logger.info(o_res)
-                        kwargs['primaryOnly'] = True
-                        exists = False
-                if check_backup:
-                    try:
-                        res[1] = res[1][p]
-                    except (KeyError, TypeError, IndexError):
-                        logger.info("Object not found on BACKUP, key:%s setting backupOnly" % p)
-                        logger.info(o_res)
-                        kwargs['backupOnly'] = True
-                        exists = False
-
             if not exists:
-                args[0].set_exists(exists)
                 return f(*args, **kwargs)
             else:
                 # if we reach here, the object exists
                 logger.info(
                     "Package %s - %s, the requested object already exists, ignoring creation" % (
                         module, f.__name__))
-                args[0].set_exists(exists)
 
         return wrapped_f
 
     return wrap
 
 
-def only_if_exists(entity, data_path, primaryOnly=False, backupOnly=False, **kwargs):
-    """ The inverse of :func:`only_if_not_exists` """
+def only_if_exists(entity, data_path, primaryOnly=False, backupOnly=False, index=None, **kwargs):
+    """ The inverse of :func:`only_if_not_exists`, call the method only if the object exists on all of the appliances
+    """
 
     def wrap(f):
         @wraps(f)
         def wrapped_f(*args, **kwargs):
 
-            # default false
-            check_primary = False
-            check_backup = False
-
             # extract package name
-            module = get_calling_module()
+            module = get_calling_module(logger=logger)
 
             # force kwarg, just return the method to allow exec
             if "force" in kwargs and kwargs.get('force'):
@@ -302,65 +309,81 @@ def only_if_exists(entity, data_path, primaryOnly=False, backupOnly=False, **kwa
                 logger.info("Not forcing return of object")
 
             # determine if were checking both or a single node
-            if primaryOnly:
-                kwargs['primaryOnly'] = primaryOnly
-                check_primary = True
-            elif backupOnly:
-                kwargs['backupOnly'] = backupOnly
-                check_backup = True
-            else:
-                logger.info("Package: %s requests that Both primary and backup be queried" % module)
-                check_primary = True
-                check_backup = True
-
-            # if exists bit is set on the object ( caching )
-            try:
-                if args[0].exists:
-                    logger.info("Cache hit, object exists")
-                    return f(*args, **kwargs)
-            except Exception, e:
-                pass
-
-            logger.debug("Cache miss")
-            logger.info("Package: %s, asking entity: %s, for args: %s, kwargs: %s via data_path: %s" % (
-                module, entity, str(args), str(kwargs), data_path))
-
-            response_path = data_path.split('.')
-
-            res = getattr(args[0], entity)(**kwargs)
-            o_res = res
-            logger.debug("Response %s" % res)
-
-            exists = True
-
-            # try peek into attributes, any raises means one of the nodes does not have the object.
-            for p in response_path:
-                if check_primary:
-                    try:
-                        res[0] = res[0][p]
-                    except (TypeError, IndexError):
-                        logger.info("Object not found on PRIMARY, key:%s error" % p)
-                        logger.info(o_res)
-                        kwargs['primaryOnly'] = True
-                        args[0].set_exists(False)
-                        exists = False
-                if check_backup:
-                    try:
-                        res[1] = res[1][p]
-                    except (TypeError, IndexError):
-                        logger.info("Object not found on BACKUP, key:%s error" % p)
-                        logger.info(o_res)
-                        kwargs['backupOnly'] = True
-                        args[0].set_exists(False)
-                        exists = False
-
+            nodes = _nodes(primaryOnly, backupOnly, module, kwargs)
+
+            # plugins without a indexed type cache one exists bit on the instance
+            if index is None:
+                try:
+                    if args[0].exists:
+                        logger.info("Cache hit, object exists")
+                        return f(*args, **kwargs)
+                except Exception, e:
+                    pass
+                logger.debug("Cache miss")
+
+            found = _find(args[0], entity, data_path, index, nodes, kwargs)
+            exists = all(found.values())
+
+            if index is None:
+                args[0].set_exists(exists)
             if exists:
-                module = get_calling_module()
                 logger.info(
                     "Package %s - the requested object exists, calling method %s, check entity was: %s" % (
                         module, f.__name__, entity))
-                args[0].set_exists(True)
                 return f(*args, **kwargs)
+            else:
+                logger.info("Package %s - the requested object does not exist, not calling method %s" % (
+                    module, f.__name__))
+
+        return wrapped_f
+
+    return wrap
+
+
+def only_if_changed(object_type, settings=()):
+    """
+    In reconcile mode, call the method only if it changes something: if the object does not exist, or one of the
+    `settings` differs from the api's snapshot, see :class:`libsolace.SolaceSnapshot.SolaceSnapshot`. The settings
+    the method sets are then recorded in the snapshot. Without reconcile mode, the method is always called.
+
+    Put it below :func:`primary` and :func:`backup`, it compares the appliances the command is sent to.
+
+    Example:
+
+    .. doctest::
+        :options: +SKIP
+
+        >>> @only_if_changed(QUEUE_SNAPSHOT, [Setting("info.max-bind-count", from_kwarg("max_bind_count"))])
+        >>> def max_bind_count(self, **kwargs):
+        >>>    return PluginResponse(xml, **kwargs)
+
+    :param object_type: the object's type in the snapshot
+    :type object_type: libsolace.SolaceSnapshot.SnapshotType
+    :param settings: the settings the method sets, none if it creates the object
+    :type settings: list of libsolace.SolaceSnapshot.Setting
+    :param force: :data:`libsolace.Kwargs.force`
+    :type force: bool
+    :rtype: object
+    :returns: the object to call
+
+    """
+
+    def wrap(f):
+        @wraps(f)
+        def wrapped_f(*args, **kwargs):
+            snapshot = getattr(getattr(args[0], "api", None), "snapshot", None)
+            if snapshot is None or kwargs.get('force'):
+                return f(*args, **kwargs)
+
+            if snapshot.unchanged(object_type, settings, **kwargs):
+                logger.info("Reconcile: %s %s is up to date, not calling %s" % (
+                    object_type.name, object_type.object_key(kwargs), f.__name__))
+                return None
+
+            response = f(*args, **kwargs)
+            if response is not None:
+                snapshot.record(object_type, settings, **kwargs)
+            return response
 
         return wrapped_f
 
@@ -380,7 +403,7 @@ def primary():
         @wraps(f)
         def wrapped_f(*args, **kwargs):
             kwargs['primaryOnly'] = True
-            module = get_calling_module()
+            module = get_calling_module(logger=logger)
             logger.info("Calling package %s - Setting primaryOnly: %s" % (module, f.__name__))
             return f(*args, **kwargs)
 
@@ -402,7 +425,7 @@ def backup():
         @wraps(f)
         def wrapped_f(*args, **kwargs):
             kwargs['backupOnly'] = True
-            module = get_calling_module()
+            module = get_calling_module(logger=logger)
             logger.info("Calling package %s - Setting backupOnly: %s" % (module, f.__name__))
             return f(*args, **kwargs)
 
@@ -27,3 +27,30 @@ class MissingClientProfile(MissingException):
 
 class MissingACLProfileException(MissingException):
     pass
+
+
+class ApplianceError(Exception):
+    """
+    A appliance could not be reached, or replied with a server error instead of SEMP, or its reply could not be
+    read. `retryable` is False if sending the request again would repeat some of its effects, e.g. streamed
+    elements already passed on.
+    """
+
+    def __init__(self, host, message, code=None, retryable=True):
+        Exception.__init__(self, "Device: %s: %s" % (host, message))
+        self.host = host
+        self.code = code
+        self.retryable = retryable
+
+
+class CircuitOpenException(ApplianceError):
+    """ Requests to a appliance are not sent while it keeps failing """
+
+    def __init__(self, host, failures, retry_in):
+        ApplianceError.__init__(self, host, "circuit open after %s failed requests in a row, not sending requests "
+                                            "to it for %.1fs" % (failures, retry_in))
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(Exception):
+    pass
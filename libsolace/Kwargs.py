@@ -44,3 +44,9 @@ backupOnly = None
 """
 Not really a "only" flag, it adds the "backup" node to the "appliances to call" list
 """
+
+anyNode = None
+"""
+Marks a read only request which either node can answer, it is sent to the node chosen by the `READ_ROUTING` setting
+unless :data:`primaryOnly` or :data:`backupOnly` is set, see :func:`libsolace.SolaceAPI.SolaceAPI.route`
+"""
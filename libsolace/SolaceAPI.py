@@ -1,12 +1,23 @@
+import copy
+import itertools
 import logging
+import random
+import re
+import threading
+import time
 import traceback
 from collections import OrderedDict
 
 import libsolace
 from libsolace.settingsloader import settings
 from libsolace import xml2dict
-from libsolace.Exceptions import LoginException
+from libsolace.Exceptions import LoginException, ApplianceError, CircuitOpenException, DeadlineExceeded
 from libsolace.SolaceCommandQueue import SolaceCommandQueue
+from libsolace.SolaceExistenceIndex import SolaceExistenceIndex
+from libsolace.SolaceLimiter import ApplianceLimiter, CircuitBreaker
+from libsolace.SolaceSnapshot import SolaceSnapshot
+from libsolace.SolaceRequestCache import SolaceRequestCache, DetectionCache, DEFAULT_DIRECTORY, is_read_only, \
+    is_runtime
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
 from libsolace.plugin import PluginResponse
 
@@ -15,12 +26,51 @@ try:
 except ImportError:
     from json import simplejson
 
-from libsolace.util import httpRequest, generateRequestHeaders, generateBasicAuthHeader
+from libsolace.util import httpRequest, generateRequestHeaders, generateBasicAuthHeader, get_connection_pool, \
+    call_concurrently, READ_ERRORS
+
+# values of the READ_ROUTING setting, see SolaceAPI.route
+READ_ROUTING = ('primary', 'backup', 'spread')
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
+class SempResponse(object):
+    """
+    A appliance's reply to a SEMP request, parsed once as it is received.
+
+    :param host: the appliance's SEMP url
+    :type host: str
+    :param code: HTTP status code
+    :type code: int
+    :param document: the parsed reply
+    :type document: dict
+    :param raw: the reply's XML, None if the reply was streamed
+    :type raw: str
+    :param elapsed: seconds from sending the request until the reply was parsed
+    :type elapsed: float
+    :param complete: False if the reading of a streamed reply was stopped early, or it had too
+        many elements to keep them
+    :type complete: bool
+
+    The elements of a streamed reply are not kept, except by the request cache, which
+    keeps up to `REQUEST_CACHE_ITEMS` of them in `items` to pass them on again.
+    """
+
+    def __init__(self, host, code, document, raw=None, elapsed=None, complete=True):
+        self.host = host
+        self.code = code
+        self.document = document
+        self.raw = raw
+        self.elapsed = elapsed
+        self.complete = complete
+        self.items = None
+
+    def __repr__(self):
+        return "SempResponse(host=%s, code=%s, elapsed=%.3f)" % (self.host, self.code, self.elapsed or 0)
+
+
 class SolaceAPI:
     """
     Connects to a Solace cluster's *primary* and *backup* appliance(s)
@@ -54,9 +104,75 @@ class SolaceAPI:
         `libsolace.yaml`. Any key configured in this parameter will take precedence
         over keys specified in `libsolace.yaml`.
     :type setting_overrides: dict
+    :keyword request_cache: cache the replies to `show` requests for the life of the
+        instance, see :class:`libsolace.SolaceRequestCache.SolaceRequestCache`. Defaults
+        to the `REQUEST_CACHE` setting of the environment, or False. The cache is tuned
+        with the `REQUEST_CACHE_TTL`, `REQUEST_CACHE_SIZE`, `REQUEST_CACHE_DIR` and
+        `REQUEST_CACHE_ITEMS` settings, or can be passed in, e.g. to share it between instances.
+    :type request_cache: bool or libsolace.SolaceRequestCache.SolaceRequestCache
+    :keyword reconcile: only queue the plugin commands which change something on the
+        appliances, see :class:`libsolace.SolaceSnapshot.SolaceSnapshot`. Defaults to the
+        `RECONCILE` setting of the environment, or False.
+    :type reconcile: bool
     :rtype: SolaceAPI.SolaceAPI
     :returns: instance
 
+    Each appliance gets one persistent HTTP connection pool which is reused for the
+    life of the instance. The pools are tuned per environment in `libsolace.yaml`
+    with the `POOL_SIZE` (requests in flight per appliance to start with, default 2) and
+    `KEEP_ALIVE` (default True) keys, and honour `VERIFY_SSL`. A pool keeps as many
+    connections as the admission control below lets requests in flight, up to
+    `MAX_CONCURRENCY`. Call :func:`close` or use the instance as a context manager
+    to release the connections.
+
+    The primary and backup appliances and the version are detected on first use of
+    `primaryRouter`, `backupRouter` or `version`, not when the instance is made, so
+    errors detecting them are raised by the first request. Set `DETECTION_CACHE_TTL`
+    (seconds) for the environment to keep what was detected in a file in
+    `DETECTION_CACHE_DIR` (default the request cache's directory), shared by the
+    processes using the environment. The roles are detected again, keeping the
+    version, when a request fails while they came from the file, e.g. after a
+    failover, or when :func:`redetect` is called.
+
+    The requests to each appliance pass a :class:`libsolace.SolaceLimiter.ApplianceLimiter`,
+    which keeps the requests in flight under a limit adapting to the appliance's reply times
+    and errors, between `POOL_SIZE` to start with and `MAX_CONCURRENCY` (default 16), and
+    sends at most `RATE_LIMIT` requests per second (default no budget) with bursts of
+    `RATE_BURST`. Replies whose headers take longer than `SLOW_REPLY` seconds (default 2)
+    count as overload. The current limits are returned by :func:`limits`.
+
+    Each call has a deadline, the `deadline` kwarg of :func:`rpc` or the
+    `REQUEST_DEADLINE` setting (default 60 seconds), which bounds the wait for
+    admission, the connect (at most `CONNECT_TIMEOUT`, default 5 seconds) and each
+    read of the reply. Read only requests which fail to reach a appliance, get a
+    server error instead of SEMP, or whose reply breaks off while it is read, are
+    retried up to `READ_RETRIES` times (default 2) after a jittered exponential
+    backoff from `RETRY_BACKOFF` seconds (default 0.2), within the deadline. A
+    streamed reply is not retried once some of its elements were passed on. After `CIRCUIT_FAILURES` (default 5) such failures in a row,
+    requests to the appliance fail at once with a CircuitOpenException for
+    `CIRCUIT_RESET` seconds (default 30), see
+    :class:`libsolace.SolaceLimiter.CircuitBreaker`. With `allowfail`, :func:`rpc`
+    returns a `circuit-open` execute-result for the appliance instead of raising.
+
+    Read only requests which either appliance can answer, which are sent with the
+    `anyNode` kwarg, e.g. by :func:`libsolace.items.SolaceVPN.SolaceVPN.list_vpns`, are sent to one
+    appliance chosen by the `READ_ROUTING` setting of the environment: `primary`
+    (the default), `backup` to offload the active appliance, or `spread` to send them
+    to each appliance in turn. Requests about the state of the appliance, like its
+    clients, spool, queues or stats, stay on the primary, and a appliance with an open
+    circuit is skipped, see :func:`route`.
+
+    Plugins check if the objects they change exist through the instance's
+    existence `index`, see :class:`libsolace.SolaceExistenceIndex.SolaceExistenceIndex`.
+    Set `EXISTENCE_INDEX: False` for the environment to ask the appliances about
+    each object instead of listing them in bulk.
+
+    A instance can be shared by several threads, along with its connection pools.
+    It works on its own copy of the settings, so `testmode` and `setting_overrides`
+    do not change them for other instances. The plugins build each request in a
+    builder of their own; the `x` builder and `cq` queue are kept for scripts, and
+    are not meant to be used by several threads at once.
+
 
     Examples:
         >>> from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
@@ -95,15 +211,20 @@ class SolaceAPI:
         >>> type(api.manage("NullPlugin"))
         <class 'libsolace.items.NullPlugin.NullPlugin'>
 
+        Release the connection pools when done
+
+        >>> with SolaceAPI("dev") as api:
+        ...     response = api.get_redundancy()
+
         """
 
     def __init__(self, environment, version=None, detect_status=True, testmode=False,
-                 setting_overrides=None, **kwargs):
+                 setting_overrides=None, request_cache=None, reconcile=None, **kwargs):
         try:
             logger.info("Solace Client SEMP version: %s", version)
-            self.version = version
 
-            self.settings = settings
+            # a copy of the settings, so testmode and the overrides do not change them for other instances
+            self.settings = copy.deepcopy(settings)
             setting_overrides = [] if setting_overrides is None else setting_overrides
             self.settings.update(setting_overrides)
 
@@ -126,32 +247,48 @@ class SolaceAPI:
             if 'VERIFY_SSL' not in self.config:
                 self.config['VERIFY_SSL'] = True
 
+            # persistent connection pools, one per appliance, created on first use
+            self.pools = {}
+            self.pools_lock = threading.Lock()
+            # admission control and circuit breakers per appliance, created on first use
+            self.limiters = {}
+            self.breakers = {}
+            self.pool_size = self.config.get('POOL_SIZE', 2)
+            # the most requests in flight per appliance, each pool keeps a connection for every one of them
+            self.max_concurrency = max(self.pool_size, self.config.get('MAX_CONCURRENCY', 16))
+            # where the read only requests which either appliance can answer go, see route
+            self.read_routing = self.config.get('READ_ROUTING', 'primary')
+            if self.read_routing not in READ_ROUTING:
+                raise ValueError("READ_ROUTING must be one of %s, not %s" % (", ".join(READ_ROUTING),
+                                                                             self.read_routing))
+            self.reads = itertools.count()
+            self.keep_alive = self.config.get('KEEP_ALIVE', True)
+
+            # opt in cache of read only requests, for the life of the instance unless it has a ttl
+            if request_cache is None:
+                request_cache = self.config.get('REQUEST_CACHE', False)
+            if isinstance(request_cache, SolaceRequestCache) or not request_cache:
+                self.request_cache = request_cache or None
+            else:
+                self.request_cache = SolaceRequestCache(ttl=self.config.get('REQUEST_CACHE_TTL'),
+                                                        max_entries=self.config.get('REQUEST_CACHE_SIZE', 1000),
+                                                        directory=self.config.get('REQUEST_CACHE_DIR'))
+
             # detect primary / backup node instance states or assume
-            # 1st node is primary and second is backup
+            # 1st node is primary and second is backup, on first use, see __detect
             self.detect_status = detect_status
-            if self.detect_status:
-                logger.info("Detecting primary and backup node states")
-                self.status = self.get_message_spool(**kwargs)
-                self.primaryRouter = None
-                self.backupRouter = None
-
-                for node in self.status:
-                    result = self.__detect_state(node)
-                    if result == 'Primary':
-                        self.primaryRouter = node['HOST']
-                    elif result == 'Backup':
-                        self.backupRouter = node['HOST']
-                if self.primaryRouter is None:
-                    raise Exception("Failed to detect primary router")
-                if self.backupRouter is None:
-                    raise Exception("Failed to detect backup router")
-                if self.primaryRouter == self.backupRouter:
-                    # impossible to test, but possible to happen...
-                    raise Exception("Error, detected router %s to be both primary and backup", self.primaryRouter)
-                logger.info("Detected primary Router: %s", self.primaryRouter)
-                logger.info("Detected backup Router: %s", self.backupRouter)
-
+            self.detect_kwargs = kwargs
+            self.detect_lock = threading.RLock()
+            self.detecting = False
+            self.detected_from_cache = False
+            detection_ttl = self.config.get('DETECTION_CACHE_TTL')
+            if detection_ttl:
+                self.detection_cache = DetectionCache(detection_ttl, directory=self.config.get('DETECTION_CACHE_DIR',
+                                                                                               DEFAULT_DIRECTORY))
             else:
+                self.detection_cache = None
+
+            if not self.detect_status:
                 logger.info("Not detecting statuses, using config")
                 try:
                     self.primaryRouter = self.config['MGMT'][0]
@@ -166,34 +303,163 @@ class SolaceAPI:
                     kwargs["backupOnly"] = False
                     pass
 
-            # if the version is NOT specified, query appliance versions
-            # assumes that backup and primary are SAME firmware version.s
-            if version == None:
-                logger.debug("Detecting Version")
-                self.xmlbuilder = SolaceXMLBuilder("Detecting SolOS-TR Version", version="soltr/5_0")
-                self.xmlbuilder.show.version
-                result = self.rpc(str(self.xmlbuilder), **kwargs)
-                self.version = result[0]['rpc-reply']['@semp-version']
-            else:
+            if version is not None:
                 logger.info("Override SolOS-TR Version: %s", version)
                 self.version = version
-            logger.info("SolOS-TR Version: %s", self.version)
 
-            # backwards compatibility
-            # self.xmlbuilder = SolaceXMLBuilder(version=self.version)
+            # which objects exist on the appliances, shared by the plugins, listed per type and vpn on first use
+            self.index = SolaceExistenceIndex(self, listing=self.config.get('EXISTENCE_INDEX', True))
 
-            # shortcut / new methods
-            self.x = SolaceXMLBuilder("XML Buider", version=self.version)
-            self.cq = SolaceCommandQueue(version=self.version)
+            # reconcile mode, the settings of the objects on the appliances, listed per type and vpn on first use
+            if reconcile is None:
+                reconcile = self.config.get('RECONCILE', False)
+            self.snapshot = SolaceSnapshot(self) if reconcile else None
 
         except Exception, e:
             logger.warn("Solace Error %s" % e)
             raise
 
-    def __restcall(self, request, primaryOnly=False, backupOnly=False, **kwargs):
+    def __getattr__(self, name):
+        """ Detects the appliances and the version on first use of the attributes holding them """
+        if name in ("primaryRouter", "backupRouter", "version") and 'detect_lock' in self.__dict__:
+            self.__detect()
+            try:
+                return self.__dict__[name]
+            except KeyError:
+                # not detected yet while detecting, or no backup in the config
+                raise AttributeError(name)
+        if name == "x" and 'detect_lock' in self.__dict__:
+            self.x = SolaceXMLBuilder("XML Buider", version=self.version)
+            return self.x
+        if name == "cq" and 'detect_lock' in self.__dict__:
+            self.cq = SolaceCommandQueue(version=self.version)
+            return self.cq
+        raise AttributeError(name)
+
+    def __detect(self):
+        """
+        Detects the primary and backup appliances, unless they are configured, and the version, unless it
+        was given, from the detection cache if it has them. The requests detecting them are sent to the
+        appliances in the config, which is what __restcall does while they are unknown.
+        """
+        with self.detect_lock:
+            if self.detecting or ('primaryRouter' in self.__dict__ and 'version' in self.__dict__):
+                return
+            self.detecting = True
+            try:
+                key = "%s\n%s" % (self.environment, "\n".join(self.config['MGMT']))
+                cached = self.detection_cache.get(key) if self.detection_cache is not None else None
+                if cached is not None and (self.detect_status or 'version' not in self.__dict__):
+                    logger.info("Using the appliances and version detected at most %ss ago" % self.detection_cache.ttl)
+                    if self.detect_status and 'primaryRouter' not in self.__dict__:
+                        self.primaryRouter = str(cached['primary'])
+                        self.backupRouter = str(cached['backup'])
+                        self.detected_from_cache = True
+                    if 'version' not in self.__dict__:
+                        self.version = str(cached['version'])
+                    logger.info("Primary Router: %s, backup Router: %s, SolOS-TR Version: %s" % (
+                        self.primaryRouter, self.__dict__.get('backupRouter'), self.version))
+                    return
+
+                if 'primaryRouter' not in self.__dict__:
+                    self.__detect_routers()
+                if 'version' not in self.__dict__:
+                    self.__detect_version()
+                if self.detection_cache is not None:
+                    self.detection_cache.put(key, {"primary": self.primaryRouter,
+                                                   "backup": self.__dict__.get('backupRouter'),
+                                                   "version": self.version})
+            finally:
+                self.detecting = False
+
+    def __detect_routers(self):
+        logger.info("Detecting primary and backup node states")
+        request = SolaceXMLBuilder("Getting message spool status", version=self.__dict__.get('version'))
+        request.show.message_spool
+        self.status = self.rpc(str(request), **self.detect_kwargs)
+        primaryRouter = None
+        backupRouter = None
+
+        for node in self.status:
+            result = self.__detect_state(node)
+            if result == 'Primary':
+                primaryRouter = node['HOST']
+            elif result == 'Backup':
+                backupRouter = node['HOST']
+        if primaryRouter is None:
+            raise Exception("Failed to detect primary router")
+        if backupRouter is None:
+            raise Exception("Failed to detect backup router")
+        if primaryRouter == backupRouter:
+            # impossible to test, but possible to happen...
+            raise Exception("Error, detected router %s to be both primary and backup", primaryRouter)
+        logger.info("Detected primary Router: %s", primaryRouter)
+        logger.info("Detected backup Router: %s", backupRouter)
+        self.primaryRouter = primaryRouter
+        self.backupRouter = backupRouter
+
+    def __detect_version(self):
+        # assumes that backup and primary are SAME firmware version.s
+        logger.debug("Detecting Version")
+        request = SolaceXMLBuilder("Detecting SolOS-TR Version", version="soltr/5_0")
+        request.show.version
+        result = self.rpc(str(request), **self.detect_kwargs)
+        self.version = result[0]['rpc-reply']['@semp-version']
+        logger.info("SolOS-TR Version: %s", self.version)
+
+    def redetect(self):
+        """
+        Detects which appliance is the primary and which the backup again, e.g. after a failover.
+        The version is kept, this is a single request to each appliance.
+        """
+        if not self.detect_status:
+            return
+        with self.detect_lock:
+            logger.info("Detecting primary and backup node states again")
+            self.__dict__.pop('primaryRouter', None)
+            self.__dict__.pop('backupRouter', None)
+            self.detected_from_cache = False
+            if self.detection_cache is not None:
+                self.detection_cache.discard("%s\n%s" % (self.environment, "\n".join(self.config['MGMT'])))
+            self.__detect()
+
+    def route(self, request):
+        """
+        Chooses the appliance to send a read only request to which either appliance can answer, following
+        the `READ_ROUTING` setting. Writes and requests about the state of the appliance, e.g. its clients,
+        spool, queues or stats, go to the primary, see :func:`libsolace.SolaceRequestCache.is_runtime`.
+        A appliance whose circuit is open is skipped while the other is not.
+
+        :param request: the SEMP request
+        :type request: str
+        :rtype: tuple
+        :returns: the `primaryOnly` and `backupOnly` kwargs to send it with
+
+        Example:
+            >>> api = SolaceAPI("dev", detect_status=False)
+            >>> api.read_routing = "backup"
+            >>> api.route('<rpc semp-version="soltr/7_1_1"><show><acl-profile><name>p</name></acl-profile></show>'
+            ...           '</rpc>')
+            (False, True)
+            >>> api.route('<rpc semp-version="soltr/7_1_1"><show><client><name>*</name></client></show></rpc>')
+            (True, False)
+        """
+        if self.read_routing == 'primary' or not is_read_only(request) or is_runtime(request) or \
+                len(self.config['MGMT']) < 2:
+            return True, False
+        if self.read_routing == 'backup' or next(self.reads) % 2:
+            nodes = [(False, True, self.backupRouter), (True, False, self.primaryRouter)]
+        else:
+            nodes = [(True, False, self.primaryRouter), (False, True, self.backupRouter)]
+        for primaryOnly, backupOnly, host in nodes:
+            if host not in self.breakers or self.breakers[host].retry_in() == 0:
+                return primaryOnly, backupOnly
+        return nodes[0][:2]
+
+    def __restcall(self, request, primaryOnly=False, backupOnly=False, item_path=None, item_callback=None,
+                   allowfail=False, deadline=None, **kwargs):
         logger.info("%s user requesting: %s kwargs:%s primaryOnly:%s backupOnly:%s"
                     % (self.config['USER'], request, kwargs, primaryOnly, backupOnly))
-        self.kwargs = kwargs
 
         # appliances in the query
         # appliances = self.config['MGMT']
@@ -221,61 +487,314 @@ class SolaceAPI:
             logger.info("Only one appliance in configuration, running in non-HA mode")
             appliances = [self.primaryRouter]
 
+        cache = self.request_cache
+        read_only = is_read_only(request)
+        cached = cache is not None and read_only
+        expires = time.time() + (deadline if deadline is not None else self.config.get('REQUEST_DEADLINE', 60))
+        retries = self.config.get('READ_RETRIES', 2) if read_only else 0
+        max_items = self.config.get('REQUEST_CACHE_ITEMS', 1000)
+
+        def send(host, item_path=None, item_callback=None):
+            return self.__send(host, request, item_path, item_callback, expires, retries)
+
+        def fetch(host):
+            if not cached:
+                return send(host, item_path, item_callback)
+            if item_path is None:
+                return cache.fetch(host, request, lambda: send(host), deadline=expires)
+
+            # the elements of a streamed reply are kept with it, and passed to the callback again on a hit. A reply
+            # with more of them than the cache keeps is not cached, so it still streams in flat memory
+            kept = {"items": []}
+            loaded = []
+
+            def collect(host, item):
+                if kept["items"] is not None:
+                    if len(kept["items"]) < max_items:
+                        kept["items"].append(item)
+                    else:
+                        kept["items"] = None
+                return item_callback(host, item)
+
+            def load():
+                loaded.append(True)
+                response = send(host, item_path, collect)
+                response.items = kept["items"]
+                if response.items is None:
+                    response.complete = False
+                return response
+
+            response = cache.fetch(host, request, load, deadline=expires)
+            if not loaded:
+                for item in response.items or []:
+                    if item_callback(host, item) is False:
+                        break
+            return response
+
         try:
-            data = OrderedDict()
-            codes = OrderedDict()
-            for host in appliances:
-                logger.debug("Querying host: %s" % host)
-                url = host
-                request_headers = generateRequestHeaders(
-                    default_headers={
-                        'Content-type': 'text/xml',
-                        'Accept': 'text/xml'
-                    },
-                    auth_headers=generateBasicAuthHeader(self.config['USER'], self.config['PASS'])
-                )
-                logger.debug("request_headers: %s" % request_headers)
-                (response, response_headers, code) = httpRequest(url, method='POST', headers=request_headers,
-                                                                 fields=request, timeout=5000,
-                                                                 verifySsl=self.config['VERIFY_SSL'])
-                logger.debug("response: %s" % response)
-                data[host] = response
-                logger.debug("code: %s" % code)
-                codes[host] = code
-            logger.debug(data)
-
-            for k in data:
-                thisreply = None
+            if cache is not None and not read_only:
+                cache.invalidate(request)
+
+            # query the appliances concurrently, results are kept in appliance order
+            results = call_concurrently(fetch, appliances)
+
+            if cache is not None and not read_only:
+                # again, in case a read raced the write
+                cache.invalidate(request)
+
+            if allowfail:
+                # appliances which are not sent requests while they keep failing are reported in their reply's place
+                for index, (result, exc_info) in enumerate(results):
+                    if exc_info and isinstance(exc_info[1], CircuitOpenException):
+                        logger.warn(str(exc_info[1]))
+                        results[index] = (SempResponse(appliances[index], None, {'rpc-reply': {'execute-result': {
+                            '@code': 'circuit-open', '@reason': str(exc_info[1])}}}), None)
+
+            failures = [(host, exc_info) for host, (result, exc_info) in zip(appliances, results) if exc_info]
+            for host, exc_info in failures:
+                logger.error("Device: %s: request failed: %s" % (host, exc_info[1]))
+            if failures and self.detected_from_cache:
+                # the roles may have changed since they were cached, the next requests use the current ones
                 try:
-                    thisreply = xml2dict.parse(data[k])
-                    if thisreply['rpc-reply'].has_key('execute-result'):
-                        if thisreply['rpc-reply']['execute-result']['@code'] != 'ok':
-                            logger.warn("Device: %s: %s %s" % (k, thisreply['rpc-reply']['execute-result']['@code'],
-                                                               "Request that failed: %s" % request))
-                            logger.warn("Device: %s: %s: %s" % (k, thisreply['rpc-reply']['execute-result']['@code'],
-                                                                "Reply from appliance: %s" %
-                                                                thisreply['rpc-reply']['execute-result']['@reason']))
-                        else:
-                            logger.debug("Device: %s: %s" % (k, thisreply['rpc-reply']['execute-result']['@code']))
-                        logger.debug("Device: %s: %s" % (k, thisreply))
-                    else:
-                        logger.debug("no execute-result in response. Device: %s" % k)
+                    self.redetect()
                 except Exception, e:
-                    logger.error("Error decoding response from appliance")
-                    logger.error("Response Codes: %s" % codes)
-                    logger.error("Data Object: key: %s, data: %s " % (k, data))
-                    logger.error(codes.items()[0][1])
-                    if codes.items()[0][1] == 401:
-                        raise LoginException("Username / Password failure")
-                    raise  # (Exception("Appliance Communication Failure"))
+                    logger.warn("Unable to detect the primary and backup appliances: %s" % e)
+            if failures:
+                exc_info = failures[0][1]
+                raise exc_info[0], exc_info[1], exc_info[2]
+
+            responses = OrderedDict()
+            for host, (response, exc_info) in zip(appliances, results):
+                responses[host] = response
+                thisreply = response.document
+                if thisreply['rpc-reply'].has_key('execute-result'):
+                    if thisreply['rpc-reply']['execute-result']['@code'] != 'ok':
+                        logger.warn("Device: %s: %s %s" % (host, thisreply['rpc-reply']['execute-result']['@code'],
+                                                           "Request that failed: %s" % request))
+                        logger.warn("Device: %s: %s: %s" % (host, thisreply['rpc-reply']['execute-result']['@code'],
+                                                            "Reply from appliance: %s" %
+                                                            thisreply['rpc-reply']['execute-result']['@reason']))
+                    else:
+                        logger.debug("Device: %s: %s" % (host, thisreply['rpc-reply']['execute-result']['@code']))
+                    logger.debug("Device: %s: %s" % (host, thisreply))
+                else:
+                    logger.debug("no execute-result in response. Device: %s" % host)
             logger.debug("Returning Data from rest_call")
-            return data, codes
+            return responses
 
         except Exception, e:
             traceback.print_exc()
             logger.warn("Solace Error %s" % e)
             raise
 
+    def __send(self, host, request, item_path, item_callback, deadline, retries):
+        """
+        POST a SEMP request to a single appliance through its circuit breaker, retrying up to `retries` times
+        if the appliance could not be reached or replied with a server error, as long as the deadline allows.
+
+        :rtype: SempResponse
+        """
+        breaker = self.get_breaker(host)
+        backoff = self.config.get('RETRY_BACKOFF', 0.2)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenException(host, breaker.failures, breaker.retry_in())
+            # any reply, even an error, shows the appliance is up
+            ok = True
+            try:
+                return self.__post(host, request, item_path, item_callback, deadline)
+            except DeadlineExceeded:
+                ok = None
+                raise
+            except ApplianceError, e:
+                ok = False
+                # full jitter, so the retries of concurrent callers are spread out
+                delay = random.uniform(0, backoff * 2 ** attempt)
+                if not e.retryable or attempt >= retries or time.time() + delay >= deadline:
+                    raise
+                attempt += 1
+                logger.warn("%s, retry %s of %s in %.2fs" % (e, attempt, retries, delay))
+            finally:
+                breaker.record(ok)
+            time.sleep(delay)
+
+    def __post(self, host, request, item_path=None, item_callback=None, deadline=None):
+        """
+        POST a SEMP request to a single appliance, and parse the reply.
+
+        If `item_path` is set, the body is parsed while it is read, the elements at `item_path` are passed to
+        `item_callback(host, item)` and the rest of the reply becomes the document.
+
+        :rtype: SempResponse
+        :raises ApplianceError: if the appliance could not be reached, replied with a server error, or its reply
+            could not be read
+        """
+        logger.debug("Querying host: %s" % host)
+        start = time.time()
+        request_headers = generateRequestHeaders(
+            default_headers={
+                'Content-type': 'text/xml',
+                'Accept': 'text/xml'
+            },
+            auth_headers=generateBasicAuthHeader(self.config['USER'], self.config['PASS'])
+        )
+        logger.debug("request_headers: %s" % request_headers)
+        limiter = self.get_limiter(host)
+        sent = limiter.acquire(deadline)
+        code = None
+        latency = None
+        try:
+            timeout = max(deadline - time.time(), 0.001) if deadline is not None else 5000
+            try:
+                (body, response_headers, code) = httpRequest(host, method='POST', headers=request_headers,
+                                                             fields=request, timeout=timeout,
+                                                             connect_timeout=self.config.get('CONNECT_TIMEOUT', 5),
+                                                             verifySsl=self.config['VERIFY_SSL'],
+                                                             pool=self.get_pool(host),
+                                                             stream=item_path is not None)
+            except Exception, e:
+                raise ApplianceError(host, "request failed: %s" % e)
+            # how long the appliance took to answer, a streamed body is still to be read
+            latency = time.time() - sent
+            logger.debug("code: %s" % code)
+            raw = None
+            complete = True
+            # elements passed to the callback, which a retry would pass again
+            delivered = [0]
+
+            def deliver(path, item):
+                delivered[0] += 1
+                return item_callback(host, item) is not False
+
+            try:
+                if item_path is None or code != 200:
+                    # error pages are not SEMP, they fail to parse below and are reported with their body
+                    raw = body.read() if item_path is not None else body
+                    logger.debug("response: %s" % raw)
+                    document = xml2dict.parse(raw)
+                else:
+                    try:
+                        document = xml2dict.stream(body, item_path, deliver, keep_xml=('more-cookie',))
+                    except xml2dict.ParsingInterrupted:
+                        # the rest of the reply is unread, so the connection cannot be reused
+                        logger.debug("Device: %s: stopped reading reply" % host)
+                        body.close()
+                        document = {'rpc-reply': {}}
+                        complete = False
+                if not isinstance(document, dict) or 'rpc-reply' not in document:
+                    raise Exception("Not a SEMP reply")
+            except READ_ERRORS, e:
+                raise ApplianceError(host, "reading the reply failed: %s" % e, code, retryable=not delivered[0])
+            except Exception, e:
+                logger.error("Error decoding response from appliance")
+                logger.error("Device: %s: response code: %s, data: %s" % (host, code, raw))
+                if code == 401:
+                    raise LoginException("Username / Password failure")
+                if code == 429 or code >= 500:
+                    raise ApplianceError(host, "HTTP %s instead of a SEMP reply" % code, code)
+                raise
+            finally:
+                if hasattr(body, 'release_conn'):
+                    body.release_conn()
+            return SempResponse(host, code, document, raw, time.time() - start, complete)
+        finally:
+            limiter.release(sent, code, latency)
+
+    def get_pool(self, host):
+        """
+        Returns the persistent connection pool for a appliance, creating it on first use.
+
+        :param host: the appliance's SEMP url as in the `MGMT` config
+        :type host: str
+        :rtype: urllib3.HTTPConnectionPool
+        :returns: connection pool or None if pooling is not available
+        """
+        try:
+            return self.pools[host]
+        except KeyError:
+            pass
+        with self.pools_lock:
+            if host not in self.pools:
+                self.pools[host] = get_connection_pool(host, maxsize=self.max_concurrency, keep_alive=self.keep_alive,
+                                                       verifySsl=self.config['VERIFY_SSL'])
+            return self.pools[host]
+
+    def get_limiter(self, host):
+        """
+        Returns the admission control of a appliance, creating it on first use.
+
+        :param host: the appliance's SEMP url as in the `MGMT` config
+        :type host: str
+        :rtype: libsolace.SolaceLimiter.ApplianceLimiter
+        """
+        try:
+            return self.limiters[host]
+        except KeyError:
+            pass
+        with self.pools_lock:
+            if host not in self.limiters:
+                self.limiters[host] = ApplianceLimiter(rate=self.config.get('RATE_LIMIT'),
+                                                       burst=self.config.get('RATE_BURST'),
+                                                       concurrency=self.pool_size,
+                                                       max_concurrency=self.max_concurrency,
+                                                       slow=self.config.get('SLOW_REPLY', 2.0))
+            return self.limiters[host]
+
+    def get_breaker(self, host):
+        """
+        Returns the circuit breaker of a appliance, creating it on first use.
+
+        :param host: the appliance's SEMP url as in the `MGMT` config
+        :type host: str
+        :rtype: libsolace.SolaceLimiter.CircuitBreaker
+        """
+        try:
+            return self.breakers[host]
+        except KeyError:
+            pass
+        with self.pools_lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(failures=self.config.get('CIRCUIT_FAILURES', 5),
+                                                     reset=self.config.get('CIRCUIT_RESET', 30.0))
+            return self.breakers[host]
+
+    def limits(self):
+        """
+        The current admission control limits, circuit breaker states and counters of each appliance requests
+        were sent to, see :func:`libsolace.SolaceLimiter.ApplianceLimiter.metrics` and
+        :func:`libsolace.SolaceLimiter.CircuitBreaker.metrics`
+
+        :rtype: dict
+        :returns: appliance SEMP url -> metrics
+        """
+        limits = dict((host, limiter.metrics()) for host, limiter in self.limiters.items())
+        for host, breaker in self.breakers.items():
+            limits.setdefault(host, {}).update(breaker.metrics())
+        return limits
+
+    def close(self):
+        """
+        Close all connections to the appliances. The instance remains usable, new
+        connections are made on the next request.
+        """
+        with self.pools_lock:
+            pools, self.pools = self.pools, {}
+        for host, pool in pools.items():
+            logger.debug("Closing connection pool for %s" % host)
+            if pool is not None:
+                pool.close()
+        if self.request_cache is not None:
+            logger.info("Request cache: %s" % self.request_cache.stats())
+        for host, metrics in sorted(self.limits().items()):
+            logger.info("Admission control %s: %s" % (host, metrics))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
     def get_redundancy(self):
         """
         Return redundancy status
@@ -322,7 +841,8 @@ class SolaceAPI:
         else:
             raise Exception("Unknown message-spool operational-status '%s'" % message_spool['operational-status'])
 
-    def rpc(self, xml, allowfail=False, primaryOnly=False, backupOnly=False, xml_response=False, **kwargs):
+    def rpc(self, xml, allowfail=False, primaryOnly=False, backupOnly=False, xml_response=False, item_path=None,
+            item_callback=None, deadline=None, **kwargs):
         """
         Execute a SEMP command on the appliance(s), call with a string representation
         of a SolaceXMLBuilder instance.
@@ -333,6 +853,20 @@ class SolaceAPI:
                 appliance.
             primaryOnly(Optional(bool)): only execute on primary appliance.
             backupOnly(Optional(bool)): only execute on backup appliance.
+            anyNode(Optional(bool)): a read which either appliance can answer,
+                sent to the one chosen by :func:`route` unless `primaryOnly` or
+                `backupOnly` is set.
+            item_path(Optional(str)): dot separated path of elements to stream,
+                e.g. 'rpc-reply.rpc.show.client.primary-virtual-router.client'.
+                The replies are parsed while they are read, and each element at
+                the path is passed to `item_callback` instead of being kept in the
+                returned data.
+            item_callback(Optional(callable)): called as `item_callback(host, item)`
+                for every streamed element, return False to stop reading the
+                reply. Replies are read concurrently, so the callback is called
+                from one thread per appliance.
+            deadline(Optional(float)): seconds the call may take, including
+                retries, default the `REQUEST_DEADLINE` setting or 60.
 
         Returns:
             data response list as from appliances. Json-like data
@@ -346,6 +880,16 @@ class SolaceAPI:
             >>> type(conn.rpc(str(conn.x)))
             <type 'list'>
 
+        Streaming example:
+            >>> conn.x = SolaceXMLBuilder(version = conn.version)
+            >>> conn.x.show.client.name = '*'
+            >>> clients = []
+            >>> reply = conn.rpc(str(conn.x), primaryOnly=True,
+            ...                  item_path='rpc-reply.rpc.show.client.primary-virtual-router.client',
+            ...                  item_callback=lambda host, client: clients.append(client['name']))
+            >>> len(clients) > 0
+            True
+
         """
 
         logger.debug(type(xml))
@@ -374,7 +918,8 @@ class SolaceAPI:
             raise Exception("Not a valid RPC argument")
 
         responses = None
-        mywargs = kwargs
+        # the kwargs of a queued command are popped below, and it may be sent again
+        mywargs = dict(kwargs)
         logger.debug("Kwargs: %s" % mywargs)
         logger.info("Request SEMP: %s" % xml)
         logger.debug("primaryOnly: %s" % primaryOnly)
@@ -386,27 +931,30 @@ class SolaceAPI:
         if "backupOnly" in mywargs:
             backupOnly = mywargs.pop("backupOnly")
 
+        if "deadline" in mywargs:
+            deadline = mywargs.pop("deadline")
+
+        if mywargs.pop("anyNode", False) and not primaryOnly and not backupOnly:
+            primaryOnly, backupOnly = self.route(xml)
+
+        if "allowfail" in mywargs:
+            allowfail = mywargs.pop("allowfail")
+
+        if item_path is not None:
+            item_path = item_path.split('.')
+
         try:
             data = []
-            responses, codes = self.__restcall(xml, primaryOnly=primaryOnly, backupOnly=backupOnly, **mywargs)
+            responses = self.__restcall(xml, primaryOnly=primaryOnly, backupOnly=backupOnly,
+                                        item_path=item_path, item_callback=item_callback, allowfail=allowfail,
+                                        deadline=deadline, **mywargs)
             if xml_response:
-                return responses
+                return OrderedDict((k, responses[k].raw) for k in responses)
             for k in responses:
-                response = xml2dict.parse(responses[k])
+                response = responses[k].document
                 logger.debug("Response: %s" % response)
                 response['HOST'] = k
-                if not allowfail:
-                    if 'parse-error' in response['rpc-reply']:
-                        raise Exception(str(response))
-                    elif 'permission-error' in response['rpc-reply']:
-                        if self.testmode:
-                            logger.debug('tolerable permission error in test mode')
-                        else:
-                            logger.critical("Error occured, request was: %s" % xml)
-                            raise Exception(str(response))
-                    else:
-                        data.append(response)
-                else:
+                if allowfail or self.__check_response(response, xml):
                     data.append(response)
             if len(data) is 1:
                 data.append(None)
@@ -415,6 +963,98 @@ class SolaceAPI:
             logger.error("responses: %s" % responses)
             raise
 
+    def __check_response(self, response, xml):
+        """ Raises on parse and permission errors, returns False if the response should be dropped """
+        if 'parse-error' in response['rpc-reply']:
+            raise Exception(str(response))
+        elif 'permission-error' in response['rpc-reply']:
+            if self.testmode:
+                logger.debug('tolerable permission error in test mode')
+                return False
+            logger.critical("Error occured, request was: %s" % xml)
+            raise Exception(str(response))
+        return True
+
+    def rpc_iter(self, xml, path, page_size=None, allowfail=False, primaryOnly=False, backupOnly=False, **kwargs):
+        """
+        Execute a SEMP show command which supports paging, and yield the elements
+        found at `path` one at a time. More-cookies returned by the appliance are
+        followed automatically, and each page is parsed while it is read, so only
+        one page of `page_size` elements is held in memory at any time.
+
+        Paging is per appliance, so only one appliance is queried, the primary unless
+        `backupOnly` is set, or the one chosen by :func:`route` if `anyNode` is set.
+
+        Args:
+            xml(str): string representation of a SolaceXMLBuilder instance, a
+                SolaceXMLBuilder or a PluginResponse.
+            path(str): dot separated path of the elements to yield, e.g.
+                'rpc-reply.rpc.show.queue.queues.queue'
+            page_size(Optional(int)): number of elements per page, defaults to the
+                `PAGE_SIZE` environment setting or 100. Ignored if the request
+                already contains a `<count/>`.
+            allowfail(Optional(bool)): tollerate some types of errors from the
+                appliance.
+            backupOnly(Optional(bool)): query the backup appliance instead.
+            anyNode(Optional(bool)): either appliance can answer, see :func:`route`.
+
+        Returns:
+            generator of the elements, Json-like data
+
+        Example:
+            >>> from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
+            >>> conn = SolaceAPI("dev")
+            >>> request = SolaceXMLBuilder(version=conn.version)
+            >>> request.show.queue.name = '*'
+            >>> request.show.queue.vpn_name = 'dev_testvpn'
+            >>> [q['name'] for q in conn.rpc_iter(request, 'rpc-reply.rpc.show.queue.queues.queue')]
+            [u'testqueue1']
+
+        """
+
+        if isinstance(xml, PluginResponse):
+            kwargs = dict(xml.kwargs)
+            xml = xml.xml
+        xml = str(xml)
+
+        primaryOnly = kwargs.pop("primaryOnly", primaryOnly)
+        backupOnly = kwargs.pop("backupOnly", backupOnly)
+        if kwargs.pop("anyNode", False) and not primaryOnly and not backupOnly:
+            primaryOnly, backupOnly = self.route(xml)
+        if not backupOnly or primaryOnly:
+            primaryOnly, backupOnly = True, False
+
+        if page_size is None:
+            page_size = self.config.get('PAGE_SIZE', 100)
+
+        # ask for a page of results, the count belongs at the end of the show command
+        if '<count/>' not in xml:
+            xml = re.sub(r'(</[\w-]+>\s*</show>)',
+                         r'<count/><num-elements>%s</num-elements>\1' % int(page_size), xml, count=1)
+
+        path = path.split('.')
+        request = xml
+        while request is not None:
+            items = []
+            responses = self.__restcall(request, primaryOnly=primaryOnly, backupOnly=backupOnly,
+                                        item_path=path, item_callback=lambda host, item: items.append(item), **kwargs)
+            host, response = responses.items()[0]
+            response = response.document
+            response['HOST'] = host
+            if not allowfail and not self.__check_response(response, request):
+                return
+
+            # the next page is requested by posting the more-cookie's rpc verbatim
+            request = response['rpc-reply'].get('more-cookie')
+            if request is not None:
+                request = request.strip()
+                logger.debug("Following more-cookie: %s" % request)
+            del response
+
+            for item in items:
+                if item is not None:
+                    yield item
+
     def manage(self, plugin_name, **kwargs):
         """
         Gets a plugin, configures it, then allows direct communication with it.
@@ -0,0 +1,396 @@
+import heapq
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+from libsolace.SolaceExistenceIndex import PRIMARY, BACKUP, nodes_from_kwargs
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+__doc__ = """
+Runs the commands of a :class:`libsolace.SolaceCommandQueue.SolaceCommandQueue` against the appliances
+with several requests in flight, instead of one after the other.
+
+The commands about one object, e.g. the create, shutdown, settings and enable of a queue, are run in
+the order they were queued. Commands about different objects run concurrently, with at most
+`concurrency` requests in flight to each appliance. A :class:`SolacePlan` also orders objects after
+the objects they depend on, e.g. a queue after the VPN it is in and the user which owns it.
+"""
+
+# CommandResult.status
+OK = "ok"
+FAILED = "failed"
+ERROR = "error"
+SKIPPED = "skipped"
+
+# kwargs which name the object a command is about, in order of precedence, see object_key
+OBJECT_KWARGS = ("queue_name", "username", "name")
+
+
+def object_key(kwargs):
+    """
+    The object a command is about, from the kwargs it was queued with. Commands with the same key are
+    run in order.
+
+    >>> object_key({"vpn_name": "dev_testvpn", "queue_name": "testqueue1", "primaryOnly": True})
+    ('dev_testvpn', 'queue_name', 'testqueue1')
+    >>> object_key({"vpn_name": "dev_testvpn"})
+    ('dev_testvpn', None, None)
+    >>> object_key({}) is None
+    True
+
+    :param kwargs: the kwargs of the command
+    :type kwargs: dict
+    :returns: (vpn_name, kwarg, name), or None if the kwargs do not name a object
+    """
+    for kwarg in OBJECT_KWARGS:
+        if kwargs.get(kwarg) is not None:
+            return kwargs.get("vpn_name"), kwarg, kwargs[kwarg]
+    if kwargs.get("vpn_name") is not None:
+        return kwargs["vpn_name"], None, None
+    return None
+
+
+class CommandResult(object):
+    """
+    The outcome of one command.
+
+    :param index: position of the command in the queue
+    :type index: int
+    :param xml: the SEMP request
+    :type xml: str
+    :param kwargs: the kwargs it was queued with
+    :type kwargs: dict
+    :param key: the key of the :class:`Operation` it is part of
+    :type key: tuple
+
+    `status` is one of OK, FAILED if a appliance did not reply `ok`, ERROR if the request raised, or
+    SKIPPED if it was not sent. `reason` says why it is not OK, `latency` is the seconds the request
+    took, `responses` the replies as returned by :func:`libsolace.SolaceAPI.SolaceAPI.rpc` and `exc_info`
+    the exception of a ERROR.
+    """
+
+    def __init__(self, index, xml, kwargs, key=None):
+        self.index = index
+        self.xml = xml
+        self.kwargs = kwargs
+        self.key = key
+        self.status = None
+        self.reason = None
+        self.latency = None
+        self.responses = None
+        self.exc_info = None
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    def __repr__(self):
+        return "CommandResult(%s, %s, %s, %s)" % (self.index, self.status, self.reason, self.latency)
+
+
+class Operation(object):
+    """
+    A node of a :class:`SolacePlan`, the commands about one object.
+
+    :param key: (kind, vpn_name, kwarg, name), see :func:`SolacePlan.add`
+    :type key: tuple
+    :param order: position of the operation in the plan
+    :type order: int
+    """
+
+    def __init__(self, key, order):
+        self.key = key
+        self.order = order
+        # (index in the plan, xml, kwargs)
+        self.commands = []
+        # keys of the operations which must be done before this one is started
+        self.requires = set()
+
+    def __repr__(self):
+        return "Operation(%s, %s commands)" % (self.key, len(self.commands))
+
+
+class SolacePlan(object):
+    """
+    A dependency graph of operations on objects, run by :func:`SolaceCommandExecutor.run_plan`. Each
+    operation is started as soon as those it requires are done.
+
+    Example:
+        >>> plan = SolacePlan()
+        >>> vpn = plan.add("vpn", [("<rpc>vpn</rpc>", {"vpn_name": "v"})])
+        >>> vpn
+        [('vpn', 'v', None, None)]
+        >>> users = plan.add("user", [("<rpc>u1</rpc>", {"vpn_name": "v", "username": "u1"})], requires=vpn)
+        >>> queues = plan.add("queue", [("<rpc>q1</rpc>", {"vpn_name": "v", "queue_name": "q1"}),
+        ...                             ("<rpc>q2</rpc>", {"vpn_name": "v", "queue_name": "q2"})], requires=vpn)
+        >>> plan.require(queues[1], users[0])
+        >>> [operation.key[-1] for operation in plan.sorted()]
+        [None, 'u1', 'q1', 'q2']
+    """
+
+    def __init__(self):
+        # key -> Operation, in the order they were added
+        self.operations = OrderedDict()
+        self.size = 0
+
+    def add(self, kind, commands, requires=()):
+        """
+        Adds the commands, as one operation per object they are about, see :func:`object_key`.
+
+        :param kind: the type of the objects, e.g. "queue", to tell apart objects of the same name
+        :type kind: str
+        :param commands: the commands, a queue or a list of (xml, kwargs) tuples
+        :type commands: libsolace.SolaceCommandQueue.SolaceCommandQueue or list
+        :param requires: keys of the operations which must be done before these are started
+        :type requires: list
+        :rtype: list
+        :returns: the keys of the operations the commands were added to
+        """
+        keys = []
+        for xml, kwargs in getattr(commands, "commands", commands):
+            key = (kind,) + (object_key(kwargs) or (None, None, None))
+            operation = self.operations.get(key)
+            if operation is None:
+                operation = self.operations[key] = Operation(key, len(self.operations))
+            if key not in keys:
+                keys.append(key)
+            operation.commands.append((self.size, xml, kwargs))
+            self.size += 1
+        for key in keys:
+            self.require(key, *requires)
+        return keys
+
+    def require(self, key, *requires):
+        """
+        Makes a operation wait for others. Keys without a operation, e.g. of objects which are already
+        as they should be, are done from the start.
+        """
+        self.operations[key].requires.update(requirement for requirement in requires if requirement != key)
+
+    def sorted(self):
+        """
+        :returns: the operations, each after those it requires, otherwise in the order they were added
+        :rtype: list of Operation
+        :raises ValueError: if the operations require each other
+        """
+        waiting, dependents = self.dependencies()
+        ready = [(operation.order, operation) for operation in self.operations.values() if not waiting[operation.key]]
+        heapq.heapify(ready)
+        operations = []
+        while ready:
+            order, operation = heapq.heappop(ready)
+            operations.append(operation)
+            for key in dependents[operation.key]:
+                waiting[key] -= 1
+                if not waiting[key]:
+                    heapq.heappush(ready, (self.operations[key].order, self.operations[key]))
+        if len(operations) != len(self.operations):
+            cycle = [key for key in self.operations if waiting[key]]
+            raise ValueError("operations require each other: %s" % cycle)
+        return operations
+
+    def dependencies(self):
+        """
+        :returns: (key -> number of operations it waits for, key -> keys of the operations waiting for it)
+        """
+        waiting = dict((key, 0) for key in self.operations)
+        dependents = dict((key, []) for key in self.operations)
+        for operation in self.operations.values():
+            for requirement in operation.requires:
+                if requirement in self.operations:
+                    waiting[operation.key] += 1
+                    dependents[requirement].append(operation.key)
+        return waiting, dependents
+
+
+class SolaceCommandExecutor(object):
+    """
+    Runs command queues with up to `concurrency` requests in flight per appliance.
+
+    A command holds a slot on every appliance it is sent to, see the `primaryOnly` and `backupOnly`
+    kwargs of :func:`libsolace.SolaceAPI.SolaceAPI.rpc`, for as long as its request takes. Commands
+    naming the same object, see :func:`object_key`, run one at a time in queue order. Commands which
+    do not name a object are run in queue order with each other.
+
+    :param api: the api to send the commands with
+    :type api: libsolace.SolaceAPI.SolaceAPI
+    :param concurrency: requests in flight per appliance, defaults to `COMMAND_CONCURRENCY` in the
+        environment's config, or the api's connection pool size
+    :type concurrency: int
+    :param fail_fast: stop starting commands once one is not OK, the rest are SKIPPED. Otherwise every
+        command is sent, as a serial loop over the queue would.
+    :type fail_fast: bool
+
+    Example:
+        >>> from libsolace.SolaceAPI import SolaceAPI
+        >>> api = SolaceAPI("dev")
+        >>> queue = api.manage("SolaceQueue", vpn_name="dev_testvpn",
+        ...                    queues=[{"name": "testqueue1", "queue_config": {}}])
+        >>> results = SolaceCommandExecutor(api, concurrency=4).run(queue.commands)
+        >>> [result.status for result in results if not result.ok]
+        []
+    """
+
+    def __init__(self, api, concurrency=None, fail_fast=True):
+        self.api = api
+        if concurrency is None:
+            concurrency = api.config.get('COMMAND_CONCURRENCY', getattr(api, "pool_size", 1))
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1, not %s" % concurrency)
+        self.concurrency = concurrency
+        self.fail_fast = fail_fast
+        self.slots = {PRIMARY: threading.Semaphore(concurrency), BACKUP: threading.Semaphore(concurrency)}
+
+    def run(self, commands):
+        """
+        Sends the commands and waits for all of them.
+
+        :param commands: the commands, a queue or a list of (xml, kwargs) tuples
+        :type commands: libsolace.SolaceCommandQueue.SolaceCommandQueue or list
+        :rtype: list of CommandResult
+        :returns: the result of every command, in queue order
+        """
+        plan = SolacePlan()
+        plan.add(None, commands)
+        return self.run_plan(plan)
+
+    def run_plan(self, plan):
+        """
+        Runs the operations of the plan, each as soon as the operations it requires are done, and waits
+        for all of them. Without `fail_fast` a operation is run even if one it requires failed, as the
+        appliance may have failed a create because the object exists.
+
+        :param plan: the operations to run
+        :type plan: SolacePlan
+        :rtype: list of CommandResult
+        :returns: the result of every command, in the order they were added to the plan
+        :raises ValueError: if the operations require each other
+        """
+        plan.sorted()
+        results = [None] * plan.size
+        for operation in plan.operations.values():
+            for index, xml, kwargs in operation.commands:
+                results[index] = CommandResult(index, str(xml), dict(kwargs), key=operation.key)
+
+        waiting, dependents = plan.dependencies()
+        ready = deque(operation for operation in plan.operations.values() if not waiting[operation.key])
+        state = {"stop": False, "remaining": len(plan.operations)}
+        condition = threading.Condition()
+
+        def work():
+            while True:
+                with condition:
+                    while not ready and state["remaining"]:
+                        condition.wait()
+                    if not ready:
+                        return
+                    operation = ready.popleft()
+                for index, xml, kwargs in operation.commands:
+                    result = results[index]
+                    if state["stop"]:
+                        result.status = SKIPPED
+                        result.reason = "an earlier command was not ok"
+                        continue
+                    self.__send(result)
+                    if not result.ok and self.fail_fast:
+                        state["stop"] = True
+                with condition:
+                    state["remaining"] -= 1
+                    for key in dependents[operation.key]:
+                        waiting[key] -= 1
+                        if not waiting[key]:
+                            ready.append(plan.operations[key])
+                    condition.notify_all()
+
+        # enough workers to fill every slot of both appliances
+        workers = min(len(plan.operations), self.concurrency * 2)
+        logger.info("Running %s commands about %s objects with %s workers" % (len(results), len(plan.operations),
+                                                                             workers))
+        threads = []
+        for index in range(workers - 1):
+            t = threading.Thread(target=work, name="libsolace-executor-%s" % index)
+            t.daemon = True
+            t.start()
+            threads.append(t)
+        if workers:
+            work()
+        for t in threads:
+            t.join()
+
+        failures = [result for result in results if result.status in (FAILED, ERROR)]
+        if failures:
+            logger.warning("%s of %s commands failed, first: %s" % (len(failures), len(results), failures[0]))
+        return results
+
+    def __send(self, result):
+        nodes = nodes_from_kwargs(primaryOnly=result.kwargs.get("primaryOnly", False),
+                                  backupOnly=result.kwargs.get("backupOnly", False))
+        if getattr(self.api, "backupRouter", None) is None:
+            # non HA, commands are only sent to the primary
+            nodes = [PRIMARY]
+        # always acquired in the same order, so two commands can not wait on each other
+        for node in nodes:
+            self.slots[node].acquire()
+        start = time.time()
+        try:
+            result.responses = self.api.rpc(result.xml, **result.kwargs)
+            result.status = OK
+            for response in result.responses or []:
+                execute_result = (response or {}).get('rpc-reply', {}).get('execute-result') or {}
+                if execute_result.get('@code', 'ok') != 'ok':
+                    result.status = FAILED
+                    result.reason = "%s: %s" % (response.get('HOST'), execute_result.get('@reason'))
+                    break
+        except Exception, e:
+            result.status = ERROR
+            result.reason = str(e)
+            result.exc_info = sys.exc_info()
+        finally:
+            result.latency = time.time() - start
+            for node in nodes:
+                self.slots[node].release()
+        logger.debug("Command %s: %s in %.3fs" % (result.index, result.status, result.latency))
+
+
+def raise_for_errors(results):
+    """
+    Raises the exception of the first command which raised one, like a serial loop over the
+    queue would have.
+
+    :param results: as returned by :func:`SolaceCommandExecutor.run`
+    :type results: list of CommandResult
+    """
+    for result in results:
+        if result.status == ERROR:
+            raise result.exc_info[0], result.exc_info[1], result.exc_info[2]
+
+
+def report(results):
+    """
+    Summarises the results per object, in the order the objects were added to the plan, whichever
+    order they ran in.
+
+    >>> result = CommandResult(0, "<rpc/>", {}, key=("queue", "v", "queue_name", "q1"))
+    >>> result.status, result.latency = OK, 0.25
+    >>> report([result])
+    ['queue v q1: ok, 1 commands in 0.250s']
+
+    :param results: as returned by :func:`SolaceCommandExecutor.run_plan`
+    :type results: list of CommandResult
+    :rtype: list of str
+    """
+    operations = OrderedDict()
+    for result in results:
+        operations.setdefault(result.key, []).append(result)
+    lines = []
+    for key, operation in operations.items():
+        name = " ".join(str(part) for i, part in enumerate(key or ()) if part is not None and i != 2)
+        latency = sum(result.latency or 0 for result in operation)
+        not_ok = [result for result in operation if not result.ok]
+        status = OK if not not_ok else "%s: %s" % (not_ok[0].status, not_ok[0].reason)
+        lines.append("%s: %s, %s commands in %.3fs" % (name or "commands", status, len(operation), latency))
+    return lines
@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 
 from lxml import etree
 
@@ -9,12 +10,22 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
+class ValidatedXML(str):
+    """ SEMP XML which is known to validate against the schema, e.g. rendered by a
+    :class:`libsolace.SolaceXMLTemplate.SolaceXMLTemplate` without parameters. The
+    command queue does not validate it again. """
+    pass
+
+
 class SolaceCommandQueue:
     """ Solace Command Queue Class
 
     A simple queue which validates SEMP XML against correct version of xsd,
     and then puts returns the commands list object.
 
+    The compiled schemas are cached for the life of the process, and shared by all
+    queues of the same SolOS version.
+
     """
 
     schema_files = {
@@ -26,21 +37,45 @@ class SolaceCommandQueue:
         "soltr/7_1_1": os.path.join(os.path.dirname(__file__), 'data/semp-rpc-soltr_7_1.xsd')
     }
 
+    # compiled schemas by schema file
+    schemas = {}
+    schemas_lock = threading.Lock()
+
     def __init__(self, version="soltr/6_0"):
         """
         Initializes the queue as a list
         """
         logger.debug("Init with soltr version: %s" % version)
+        # parsers are not thread safe, so each queue has its own, the schema is shared
+        self.parser = etree.XMLParser(schema=self.get_schema(version))
+        self.commands = []
+        self.commandsv2 = []  # list or tuples ( command, kwargs )
+
+    @classmethod
+    def get_schema(cls, version):
+        """
+        Returns the compiled schema for a SolOS version, reading and compiling the
+        xsd on first use only.
+
+        :param version: SolOS version e.g. "soltr/7_1_1"
+        :type version: str
+        :rtype: lxml.etree.XMLSchema
+        """
         try:
-            schema_file = open(self.schema_files[version])
+            schema_file = cls.schema_files[version]
         except KeyError:
             logger.info("SolOS version '%s' unknown, falling back to latest known schema", version)
-            schema_file = open(self.schema_files["soltr/7_1_1"])
-        schema_root = etree.XML(schema_file.read())
-        schema = etree.XMLSchema(schema_root)
-        self.parser = etree.XMLParser(schema=schema)
-        self.commands = []
-        self.commandsv2 = []  # list or tuples ( command, kwargs )
+            schema_file = cls.schema_files["soltr/7_1_1"]
+        try:
+            return cls.schemas[schema_file]
+        except KeyError:
+            pass
+        with cls.schemas_lock:
+            if schema_file not in cls.schemas:
+                logger.debug("Compiling schema %s" % schema_file)
+                with open(schema_file) as f:
+                    cls.schemas[schema_file] = etree.XMLSchema(etree.XML(f.read()))
+            return cls.schemas[schema_file]
 
     def enqueue(self, command, **kwargs):
         """ Validate and append a command onto the command list.
@@ -58,6 +93,10 @@ class SolaceCommandQueue:
         logger.info("command %s" % str(command))
         logger.debug("kwargs: %s" % kwargs)
 
+        if isinstance(command, ValidatedXML):
+            self.commands.append((command, kwargs))
+            return
+
         try:
             root = etree.fromstring(str(command), self.parser)
             logger.debug('XML Validated')
@@ -80,6 +119,10 @@ class SolaceCommandQueue:
         logger.debug("command %s" % str(command))
         logger.debug("kwargs: %s" % kwargs)
 
+        if isinstance(command, ValidatedXML):
+            self.commands.append((command, kwargs))
+            return
+
         try:
             root = etree.fromstring(str(command), self.parser)
             logger.debug('XML Validated')
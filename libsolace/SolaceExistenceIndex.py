@@ -0,0 +1,221 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+__doc__ = """
+An index of which objects exist on the appliances, used by the
+:func:`libsolace.Decorators.only_if_exists` and :func:`libsolace.Decorators.only_if_not_exists`
+decorators instead of asking the appliance about every object they are called for.
+
+The state of each object is kept per (VPN, object type, name), and shared by all the plugins
+of a api. It comes from one paged wildcard `show` per object type, VPN and appliance, listed the
+first time the index is asked about them, or from the plugin's getter for types which can not be
+listed. It is kept current as create and delete commands are queued.
+"""
+
+PRIMARY = "primary"
+BACKUP = "backup"
+
+
+class IndexedType(object):
+    """
+    Describes how to list every object of a type in a VPN.
+
+    :param name: the object type, e.g. "queue"
+    :type name: str
+    :param template: show request, rendered with `name_kwarg` set to "*" and `vpn_name` to list the objects
+    :type template: libsolace.SolaceXMLTemplate.SolaceXMLTemplate
+    :param path: dot separated path of the objects in the reply, see
+        :func:`libsolace.SolaceAPI.SolaceAPI.rpc_iter`
+    :type path: str
+    :param key: the element of a object holding its name
+    :type key: str
+    :param name_kwarg: the kwarg naming the object in the plugin's methods, e.g. "queue_name"
+    :type name_kwarg: str
+    :param per_vpn: False if the objects are not in a VPN, e.g. VPNs themselves
+    :type per_vpn: bool
+
+    Example:
+        >>> from libsolace.SolaceXMLTemplate import SolaceXMLTemplate
+        >>> QUEUES = IndexedType("queue", SolaceXMLTemplate(("show.queue.name", "queue_name"),
+        ...                                                 ("show.queue.vpn_name", "vpn_name")),
+        ...                      "rpc-reply.rpc.show.queue.queues.queue", "name", "queue_name")
+        >>> QUEUES.object_key({"queue_name": "q1", "vpn_name": "dev_testvpn"})
+        ('dev_testvpn', 'q1')
+        >>> QUEUES.request("soltr/7_1_1", "dev_testvpn")
+        '<rpc semp-version="soltr/7_1_1"><show><queue><name>*</name><vpn-name>dev_testvpn</vpn-name></queue></show></rpc>'
+    """
+
+    def __init__(self, name, template, path, key, name_kwarg, per_vpn=True):
+        self.name = name
+        self.template = template
+        self.path = path
+        self.key = key
+        self.name_kwarg = name_kwarg
+        self.per_vpn = per_vpn
+
+    def object_key(self, kwargs):
+        """
+        :returns: (vpn_name, name) of the object the kwargs are about, vpn_name is None for objects which are not
+            in a VPN, name is None if the kwargs do not name a object
+        """
+        vpn_name = kwargs.get("vpn_name") if self.per_vpn else None
+        return vpn_name, kwargs.get(self.name_kwarg)
+
+    def request(self, version, vpn_name):
+        """ :returns: the show request listing every object of the type in the vpn """
+        params = {self.name_kwarg: "*"}
+        if self.per_vpn:
+            params["vpn_name"] = vpn_name
+        return self.template.render(version, **params)
+
+    def __repr__(self):
+        return "IndexedType(%s)" % self.name
+
+
+def nodes_from_kwargs(primaryOnly=False, backupOnly=False, **kwargs):
+    """
+    The appliances a request with these kwargs is sent to, see :func:`libsolace.SolaceAPI.SolaceAPI.rpc`
+
+    >>> nodes_from_kwargs(primaryOnly=True)
+    ['primary']
+    >>> nodes_from_kwargs()
+    ['primary', 'backup']
+    """
+    if primaryOnly and not backupOnly:
+        return [PRIMARY]
+    if backupOnly and not primaryOnly:
+        return [BACKUP]
+    return [PRIMARY, BACKUP]
+
+
+class SolaceExistenceIndex(object):
+    """
+    Which objects exist on each appliance.
+
+    The state of a object is known once it has been recorded, see :func:`record`, :func:`add` and
+    :func:`discard`. Otherwise its type and VPN are listed from the appliance the first time the index
+    is asked about them. If they can not be listed, the index answers None and the decorators fall
+    back to asking the appliance about the object, and record the answer.
+
+    Set `EXISTENCE_INDEX: False` in the environment's config to turn the listing off.
+
+    :param api: the api to list the objects with
+    :type api: libsolace.SolaceAPI.SolaceAPI
+    :param listing: list the objects of a type in bulk
+    :type listing: bool
+    """
+
+    def __init__(self, api, listing=True):
+        self.api = api
+        self.listing = listing
+        # (vpn name, type name, object name) -> {node: exists}
+        self.objects = {}
+        # (node, type name, vpn name) -> set of object names, None if they could not be listed
+        self.names = {}
+        # (node, type name, vpn name) -> Event set when the thread listing them is done
+        self.loading = {}
+        # listings started before a clear are not kept
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        """ Forget everything, the objects are looked up again when next asked about """
+        with self.lock:
+            self.objects = {}
+            self.names = {}
+            self.generation += 1
+
+    def exists(self, object_type, node, **kwargs):
+        """
+        Checks if a object exists on a appliance.
+
+        :param object_type: the type of the object
+        :type object_type: IndexedType
+        :param node: PRIMARY or BACKUP
+        :type node: str
+        :param kwargs: the kwargs of the plugin method, naming the object and its vpn
+        :rtype: bool
+        :returns: True or False, or None if the index can not tell
+        """
+        vpn_name, name = object_type.object_key(kwargs)
+        if name is None:
+            return None
+        state = self.objects.get((vpn_name, object_type.name, name), {}).get(node)
+        if state is not None or not self.listing:
+            return state
+        names = self.__names(object_type, node, vpn_name)
+        if names is None:
+            return None
+        return name in names
+
+    def record(self, object_type, found, **kwargs):
+        """
+        Records if a object exists on some appliances.
+
+        :param object_type: the type of the object
+        :type object_type: IndexedType
+        :param found: node to True if the object exists on it
+        :type found: dict
+        :param kwargs: the kwargs of the plugin method, naming the object and its vpn
+        """
+        vpn_name, name = object_type.object_key(kwargs)
+        if name is None:
+            return
+        with self.lock:
+            self.objects.setdefault((vpn_name, object_type.name, name), {}).update(found)
+
+    def add(self, object_type, **kwargs):
+        """ Records a object as created on the appliances the kwargs send its create command to """
+        self.record(object_type, dict((node, True) for node in nodes_from_kwargs(**kwargs)), **kwargs)
+
+    def discard(self, object_type, **kwargs):
+        """ Records a object as deleted on the appliances the kwargs send its delete command to """
+        self.record(object_type, dict((node, False) for node in nodes_from_kwargs(**kwargs)), **kwargs)
+
+    def __names(self, object_type, node, vpn_name):
+        """ Lists the objects once, the other threads asking about the same ones wait for the listing """
+        key = (node, object_type.name, vpn_name)
+        while True:
+            with self.lock:
+                if key in self.names:
+                    return self.names[key]
+                event = self.loading.get(key)
+                if event is None:
+                    event = self.loading[key] = threading.Event()
+                    generation = self.generation
+                    break
+            logger.debug("Waiting for another thread to list %s %s %s" % key)
+            event.wait()
+        try:
+            names = self.__list(object_type, node, vpn_name)
+            with self.lock:
+                if generation == self.generation:
+                    self.names[key] = names
+            return names
+        finally:
+            with self.lock:
+                del self.loading[key]
+            event.set()
+
+    def __list(self, object_type, node, vpn_name):
+        if node == BACKUP and getattr(self.api, "backupRouter", None) is None:
+            # non HA, there is no backup to have the object
+            return set()
+        snapshot = getattr(self.api, "snapshot", None)
+        if snapshot is not None:
+            # in reconcile mode the snapshot lists the objects with their settings anyway
+            names = snapshot.names(object_type.name, node, vpn_name)
+            if names is not None:
+                return names
+        logger.info("Listing %s objects in vpn %s on the %s appliance" % (object_type.name, vpn_name, node))
+        try:
+            xml = object_type.request(self.api.version, vpn_name)
+            items = self.api.rpc_iter(xml, object_type.path, primaryOnly=node == PRIMARY, backupOnly=node == BACKUP)
+            return set(item[object_type.key] for item in items)
+        except Exception, e:
+            logger.warning("Unable to list %s objects in vpn %s on the %s appliance, not indexing them: %s" % (
+                object_type.name, vpn_name, node, e))
+            return None
@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+
+from libsolace.Exceptions import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+__doc__ = """
+Admission control of the SEMP requests sent to one appliance, so concurrent callers do not overload
+its management plane, which is shared by every tenant of the router.
+
+Each appliance also has a :class:`CircuitBreaker`, which stops the requests to a appliance which
+keeps failing, so they fail at once instead of waiting for it to time out.
+
+A request is admitted when there is a token in the bucket, which is refilled at `rate` requests per
+second up to `burst`, and when fewer than `limit` requests are in flight. The limit adapts to the
+appliance (AIMD): while it is reached, it grows by one every `limit` healthy replies. It halves on a
+slow reply, a HTTP 429 or 5xx, or a request which failed before a reply was received. Requests already
+in flight when the limit was halved do not halve it again.
+"""
+
+
+class ApplianceLimiter(object):
+    """
+    Admission control of the requests to one appliance.
+
+    :param rate: requests per second, default no budget
+    :type rate: float
+    :param burst: requests which may be sent at once after a quiet period, default `rate`
+    :type burst: float
+    :param concurrency: initial limit of requests in flight
+    :type concurrency: int
+    :param max_concurrency: the limit does not grow beyond this
+    :type max_concurrency: int
+    :param slow: seconds, replies taking longer are a sign of overload
+    :type slow: float
+
+    Example:
+        >>> limiter = ApplianceLimiter(rate=100, concurrency=2, max_concurrency=4)
+        >>> first, second = limiter.acquire(), limiter.acquire()
+        >>> limiter.release(first, 200)
+        >>> limiter.release(second, 200)
+        >>> limiter.release(limiter.acquire(), 503)
+        >>> limiter.metrics()['limit'], limiter.metrics()['backoffs']
+        (1, 1)
+    """
+
+    def __init__(self, rate=None, burst=None, concurrency=2, max_concurrency=16, slow=2.0):
+        self.rate = rate
+        self.burst = max(1, burst or rate or 1)
+        self.tokens = self.burst
+        self.refilled = time.time()
+        self.limit = float(min(concurrency, max_concurrency))
+        self.max_concurrency = max_concurrency
+        self.slow = slow
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.last_backoff = 0
+        # counters, see metrics()
+        self.requests = 0
+        self.throttled = 0
+        self.backoffs = 0
+        self.latency = None
+
+    def acquire(self, deadline=None):
+        """
+        Waits until a request may be sent.
+
+        :param deadline: time.time() to give up waiting at
+        :type deadline: float
+        :rtype: float
+        :returns: the time it was admitted, to pass to :func:`release`
+        :raises DeadlineExceeded: if the request was not admitted by the deadline
+        """
+        with self.condition:
+            waited = False
+            while True:
+                if self.in_flight < int(self.limit):
+                    delay = self.__take_token()
+                    if delay == 0:
+                        break
+                else:
+                    delay = None
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise DeadlineExceeded("Not admitted before the deadline, %s requests in flight" %
+                                               self.in_flight)
+                    delay = remaining if delay is None else min(delay, remaining)
+                waited = True
+                self.condition.wait(delay)
+            self.in_flight += 1
+            self.requests += 1
+            if waited:
+                self.throttled += 1
+            return time.time()
+
+    def release(self, sent, code=None, latency=None):
+        """
+        Records the outcome of a request and adapts the limit.
+
+        :param sent: the time returned by :func:`acquire`
+        :type sent: float
+        :param code: HTTP status code of the reply, None if the request failed without one
+        :type code: int
+        :param latency: seconds the appliance took to reply, until the headers of a streamed reply so a large body
+            being read does not count as slow, default the time since `sent`
+        :type latency: float
+        """
+        now = time.time()
+        if latency is None:
+            latency = now - sent
+        with self.condition:
+            # the limit only grows while it is what holds the requests back
+            limited = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if code is None or code == 429 or code >= 500 or latency > self.slow:
+                if sent >= self.last_backoff and self.limit > 1:
+                    self.limit = max(1.0, self.limit / 2)
+                    self.last_backoff = now
+                    self.backoffs += 1
+                    logger.info("Backing off to %s requests in flight, reply %s in %.3fs" % (
+                        int(self.limit), code, latency))
+            elif limited:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def metrics(self):
+        """
+        :returns: the current limits and counters
+        :rtype: dict
+        """
+        with self.condition:
+            if self.rate is not None:
+                self.__refill()
+            return {"limit": int(self.limit), "in_flight": self.in_flight, "rate": self.rate,
+                    "tokens": self.tokens if self.rate is not None else None, "requests": self.requests,
+                    "throttled": self.throttled, "backoffs": self.backoffs, "latency": self.latency}
+
+    def __refill(self):
+        now = time.time()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+
+    def __take_token(self):
+        """ :returns: 0 if a token was taken, else seconds until there is one """
+        if self.rate is None:
+            return 0
+        self.__refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker(object):
+    """
+    Stops the requests to a appliance after `failures` failed requests in a row. After `reset` seconds
+    one request is let through, and closes the circuit again if it succeeds.
+
+    :param failures: failed requests in a row which open the circuit
+    :type failures: int
+    :param reset: seconds the circuit stays open before a request is tried again
+    :type reset: float
+
+    Example:
+        >>> breaker = CircuitBreaker(failures=2, reset=60)
+        >>> breaker.record(False)
+        >>> breaker.allow(), breaker.state
+        (True, 'closed')
+        >>> breaker.record(False)
+        >>> breaker.allow(), breaker.state
+        (False, 'open')
+    """
+
+    def __init__(self, failures=5, reset=30.0):
+        self.threshold = failures
+        self.reset = reset
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.probing = False
+        self.opens = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """ :returns: True if a request may be sent """
+        with self.lock:
+            if self.state == OPEN:
+                if time.time() - self.opened < self.reset:
+                    return False
+                self.state = HALF_OPEN
+                self.probing = False
+            if self.state == HALF_OPEN:
+                # a single request finds out if the appliance is back
+                if self.probing:
+                    return False
+                self.probing = True
+            return True
+
+    def record(self, ok):
+        """
+        Records the outcome of a request which was allowed.
+
+        :param ok: False if the appliance could not be reached or replied with a server error, None if the
+            request was not sent after all
+        :type ok: bool
+        """
+        with self.lock:
+            self.probing = False
+            if ok is None:
+                return
+            if ok:
+                if self.state != CLOSED:
+                    logger.info("Circuit closed, the appliance replied again")
+                self.state = CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+                logger.warning("Circuit open after %s failed requests in a row" % self.failures)
+                self.state = OPEN
+                self.opened = time.time()
+                self.opens += 1
+
+    def retry_in(self):
+        """ :returns: seconds until a request is tried again, 0 if the circuit is not open """
+        with self.lock:
+            if self.state != OPEN:
+                return 0
+            return max(0, self.opened + self.reset - time.time())
+
+    def metrics(self):
+        """
+        :returns: the state and counters
+        :rtype: dict
+        """
+        with self.lock:
+            return {"circuit": self.state, "circuit_open": int(self.state != CLOSED), "failures": self.failures,
+                    "opens": self.opens}
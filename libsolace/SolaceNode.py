@@ -1,34 +1,58 @@
 from collections import OrderedDict
 
-import re
+# python names of elements mapped to their xml names, see mangle()
+_mangled = {}
 
 
-class SolaceNode:
+def mangle(name):
+    """
+    Rewrites a python attribute name to a SEMP element name, `_` becomes `-`. The names
+    come from the code, so they are memoised.
+
+    >>> mangle("message_vpn")
+    'message-vpn'
+    """
+    try:
+        return _mangled[name]
+    except KeyError:
+        return _mangled.setdefault(name, name.replace("_", "-"))
+
+
+class SolaceNode(object):
     """
     A data node / leaf. recursive implemented creating keys on demand.
+
+    The children are kept in a plain dict, and their order in a list, rather than in a
+    OrderedDict per node.
     """
 
+    __slots__ = ('_names', '_children')
+
     def __init__(self):
-        self.__dict__ = OrderedDict()
+        object.__setattr__(self, '_names', [])
+        object.__setattr__(self, '_children', {})
 
     # cant have `-` in the key names, rewrite em.
     def __getattr__(self, name):
-        name = re.sub("_", "-", name)
+        name = mangle(name)
         try:
-            return self.__dict__[name]
-        except:
-            self.__dict__[name] = SolaceNode()
-            return self.__dict__[name]
+            return self._children[name]
+        except KeyError:
+            node = self._children[name] = SolaceNode()
+            self._names.append(name)
+            return node
 
     def __str__(self):
-        return str(self.__dict__)
+        return str(self())
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(self())
 
     def __call__(self, *args, **kwargs):
-        return self.__dict__
+        return OrderedDict((name, self._children[name]) for name in self._names)
 
     def __setattr__(self, name, value):
-        name = re.sub("_", "-", name)
-        self.__dict__[name] = value
+        name = mangle(name)
+        if name not in self._children:
+            self._names.append(name)
+        self._children[name] = value
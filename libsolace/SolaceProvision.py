@@ -5,8 +5,10 @@ solacehelper is a class to construct solace commands and sets of commands.
 """
 
 import logging
+import threading
 
 from libsolace.SolaceAPI import SolaceAPI
+from libsolace.SolaceCommandExecutor import SolaceCommandExecutor, SolacePlan, raise_for_errors, report
 
 try:
     import simplejson as json
@@ -33,6 +35,11 @@ class SolaceProvision:
     :type testmode: bool
     :type create_queues: bool
     :type shutdown_on_apply: bool
+    :type reconcile: bool
+    :type concurrency: int
+    :type api: libsolace.SolaceAPI.SolaceAPI
+    :type executor: libsolace.SolaceCommandExecutor.SolaceCommandExecutor
+    :type lock: threading.Lock
 
     :param vpn_dict: vpn dictionary
     :param queue_dict: queue dictionary list
@@ -43,6 +50,15 @@ class SolaceProvision:
     :param testmode: only test, dont apply changes
     :param create_queues: disable queue creation, default = True
     :param shutdown_on_apply: force shutdown Queue and User for config change, default = False
+    :param reconcile: only send the commands which change something on the appliances, default = False,
+        see :class:`libsolace.SolaceSnapshot.SolaceSnapshot`
+    :param concurrency: requests in flight per appliance while applying the commands, see
+        :class:`libsolace.SolaceCommandExecutor.SolaceCommandExecutor`
+    :param api: the api to provision with, shared with other instances, default a new one for the environment
+    :param executor: the executor to apply the commands with, shared with other instances to share its
+        requests in flight per appliance, default a new one
+    :param lock: held while the plugins prepare their commands, default one of its own. The api can be shared
+        between threads without one, so it is only needed to serialise the preparing with other work.
 
     """
 
@@ -64,6 +80,8 @@ class SolaceProvision:
             self.shutdown_on_apply = kwargs['shutdown_on_apply']
             self.version = kwargs['version']
             self.detect_status = kwargs['detect_status']
+            self.reconcile = kwargs.get('reconcile', False)
+            self.concurrency = kwargs.get('concurrency')
         except Exception, e:
             raise KeyError('missing kwarg %s' % e)
         logger.info("vpn_dict: %s" % self.vpn_dict)
@@ -76,8 +94,15 @@ class SolaceProvision:
             logger.info('TESTMODE ACTIVE')
 
         # create a connection for RPC calls to the environment
-        self.connection = SolaceAPI(self.environment_name, testmode=self.testmode, version=self.version,
-                                    detect_status=self.detect_status)
+        self.connection = kwargs.get('api')
+        if self.connection is None:
+            self.connection = SolaceAPI(self.environment_name, testmode=self.testmode, version=self.version,
+                                        detect_status=self.detect_status, reconcile=self.reconcile)
+        # every command is sent, as the appliance may reply "already exists" to a create
+        self.executor = kwargs.get('executor')
+        if self.executor is None:
+            self.executor = SolaceCommandExecutor(self.connection, concurrency=self.concurrency, fail_fast=False)
+        self.lock = kwargs.get('lock') or threading.Lock()
 
         # get version of semp TODO FIXME, this should not be needed after Plugin implemented
         if self.version is None:
@@ -86,6 +111,18 @@ class SolaceProvision:
             logger.warn("Overriding default semp version %s" % self.version)
             self.version = self.version
 
+        # the other plugins look up their objects in the vpn, so it is created before they are prepared
+        logger.info("Create VPN %s" % self.vpn_name)
+        with self.lock:
+            plan = self.__plan_vpn()
+        self.results = self.__apply(plan)
+
+        with self.lock:
+            plan = self.__plan_objects()
+        self.results += self.__apply(plan)
+
+    def __plan_vpn(self):
+        """ Prepares the commands creating the vpn """
         logger.debug("VPN Data Node: %s" % json.dumps(str(self.vpn_dict), ensure_ascii=False))
 
         # prepare vpn commands
@@ -94,12 +131,12 @@ class SolaceProvision:
                                           owner_name=self.vpn_name,
                                           max_spool_usage=self.vpn_dict['vpn_config']['spool_size'])
 
-        logger.info("Create VPN %s" % self.vpn_name)
-        for cmd in self.vpn.commands.commands:
-            logger.debug(str(cmd))
-            if not self.testmode:
-                self.connection.rpc(str(cmd[0]), **cmd[1])
+        plan = SolacePlan()
+        plan.add("vpn", self.vpn.commands)
+        return plan
 
+    def __plan_objects(self):
+        """ Prepares the commands creating the profiles, users and queues in the vpn """
         # prepare the client_profile commands
         self.client_profile = self.connection.manage("SolaceClientProfile", name=self.client_profile_name,
                                                      vpn_name=self.vpn_name, version=self.version)
@@ -164,32 +201,42 @@ class SolaceProvision:
             self.create_queues = False
             raise
 
-        logger.info("Create Client Profile")
-        # Provision profile now already since we need to link to it.
-        for cmd in self.client_profile.commands.commands:
-            logger.debug(str(cmd))
-            if not self.testmode:
-                self.connection.rpc(str(cmd[0]), **cmd[1])
-
-        logger.info("Create ACL Profile for vpn %s" % self.vpn_name)
-        for cmd in self.acl_profile.commands.commands:
-            logger.debug(str(cmd))
-            if not self.testmode:
-                self.connection.rpc(str(cmd[0]), **cmd[1])
+        # the profiles are linked to the users, and the users own the queues, otherwise objects are independent
+        plan = SolacePlan()
+        logger.info("Create Client Profile and ACL Profile for vpn %s" % self.vpn_name)
+        profiles = plan.add("client-profile", self.client_profile.commands)
+        profiles += plan.add("acl-profile", self.acl_profile.commands)
 
         logger.info("Creating users for vpn %s" % self.vpn_name)
-        for cmd in self.userMgr.commands.commands:
-            logger.debug(cmd)
-            if not self.testmode:
-                self.connection.rpc(str(cmd[0]), **cmd[1])
+        plan.add("user", self.userMgr.commands, requires=profiles)
 
         logger.info("Create Queues Bool?: %s in %s" % (self.create_queues, self.vpn_name))
         if self.create_queues:
             logger.info("Create Queues for vpn %s" % self.vpn_name)
-            for cmd in self.queueMgr.commands.commands:
+            for key in plan.add("queue", self.queueMgr.commands):
+                plan.require(key, *self.__owners(plan.operations[key]))
+        return plan
+
+    def __apply(self, plan):
+        """ Runs the plan unless in testmode, and raises the first exception a command raised
+
+        :returns: the results of the commands, see :func:`libsolace.SolaceCommandExecutor.SolaceCommandExecutor.run_plan`
+        """
+        for operation in plan.sorted():
+            for cmd in operation.commands:
                 logger.debug(cmd)
-                if not self.testmode:
-                    self.connection.rpc(str(cmd[0]), **cmd[1])
+        if self.testmode:
+            return []
+        results = self.executor.run_plan(plan)
+        for line in report(results):
+            logger.info(line)
+        raise_for_errors(results)
+        return results
+
+    def __owners(self, operation):
+        """ The keys of the operations on the users owning a queue, see :class:`libsolace.SolaceCommandExecutor.SolacePlan` """
+        owners = [kwargs["owner_username"] for index, xml, kwargs in operation.commands if "owner_username" in kwargs]
+        return [("user", self.vpn_name, "username", self.vpn_name if owner == "%lsVPN" else owner) for owner in owners]
 
     def __set_vpn_confg__(self):
         try:
@@ -1,8 +1,9 @@
 import logging
-import re
 
 import simplejson as json
 
+from libsolace.SolaceNode import mangle
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
@@ -54,48 +55,44 @@ class SolaceReplyHandler(object):
 
 
 class SolaceReply(object):
-    """ Create a "dot-name-space" navigable object from a dictionary """
+    """ Create a "dot-name-space" navigable object from a dictionary
+
+    The document is wrapped as it is navigated rather than copied up front, nested dicts
+    are returned as SolaceReply and None values as the string 'None'.
+    """
+
+    __slots__ = ('_document',)
 
     def __init__(self, document):
-        for k in document:
-            logger.debug("%s: %s" % (k, document[k]))
-            try:
-                self.__dict__[k] = SolaceReply(document[k])
-            except:
-                logger.debug("Final value %s" % document[k])
-                if document[k] == None:
-                    self.__dict__[k] = str(document[k])
-                else:
-                    self.__dict__[k] = document[k]
+        object.__setattr__(self, '_document', document)
 
     # cant have `-` in the key names, rewrite em.
     def __getattr__(self, name):
-        logger.debug("getattr: name: %s from %s " % (name, self.__dict__))
-        name = re.sub("_", "-", name)
-
         try:
-            return self.__dict__[name]
-        except:
+            value = self._document[mangle(name)]
+        except KeyError:
             logger.error("Unable to retrieve key: %s" % name)
             raise
+        if isinstance(value, dict):
+            return SolaceReply(value)
+        if value is None:
+            return 'None'
+        return value
 
     def __str__(self):
-        return str(self.__dict__)
+        return str(self._document)
 
     def __repr__(self):
-        return str(self.__dict__)
-        # return str(json.loads(str(self.__dict__).replace("'", '"').replace('u"', '"').replace('None', '"None"')))
+        return str(self._document)
 
     def __call__(self, *args, **kwargs):
-        return self.__dict__
+        return self._document
 
     def __setattr__(self, name, value):
-        # name = re.sub("_", "-", name)
-        logger.debug("Setting key %s" % name)
-        if value == None:
-            self.__dict__[name] = str(value)
+        if value is None:
+            self._document[name] = str(value)
         else:
-            self.__dict__[name] = value
+            self._document[name] = value
 
 
 if __name__ == "__main__":
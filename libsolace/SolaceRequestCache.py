@@ -0,0 +1,442 @@
+import copy
+import errno
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import simplejson as json
+
+from libsolace.Exceptions import DeadlineExceeded
+
+try:
+    import fcntl
+except ImportError:
+    # no cross process locking, e.g. on windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+__doc__ = """
+A cache of the replies to read only SEMP requests. By default the replies are kept in memory
+for the life of a :class:`libsolace.SolaceAPI.SolaceAPI` instance, typically one provisioning
+run. With a `ttl` and a `directory` they are also kept on disk for that many seconds, and
+shared by the scripts which run against the same appliances, e.g. from cron or a dashboard.
+"""
+
+READ_ONLY = re.compile(r'^<rpc\b[^>]*>\s*<show\b')
+# show commands about the state of the appliance they are sent to rather than its configuration, the queues and
+# topic endpoints are provisioned in the message spool of the primary
+RUNTIME = re.compile(r'<show>\s*<(client|message-spool|queue|topic-endpoint|redundancy|memory|version)[\s/>]'
+                     r'|<(stats|message-spool-stats|rates)\s*/>')
+VPN_NAME = re.compile(r'<vpn-name>([^<]*)</vpn-name>')
+
+# the on disk tier of the scripts in bin/, per user as the replies are those of the user's credentials
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(),
+                                 "libsolace-cache-%s" % (os.getuid() if hasattr(os, "getuid") else "shared"))
+
+# file in the directory holding the time of the last write to the appliances, see SolaceRequestCache.invalidate
+GENERATION = "generation"
+
+
+def prepare_directory(directory):
+    """
+    Creates a cache directory only the user can read, or checks a existing one belongs to the user.
+
+    :returns: True if the directory can be used
+    :rtype: bool
+    """
+    try:
+        os.makedirs(directory, 0700)
+    except OSError, e:
+        if e.errno != errno.EEXIST:
+            logger.warning("Unable to create cache directory %s: %s" % (directory, e))
+            return False
+    if hasattr(os, "getuid") and os.stat(directory).st_uid != os.getuid():
+        # the files are read back as they are, so they must be our own
+        logger.warning("Cache directory %s belongs to another user, not using it" % directory)
+        return False
+    return True
+
+
+def replace_file(directory, path, data):
+    """ Writes a file in the directory atomically, readers see the old or the new contents """
+    try:
+        fd, temporary = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.rename(temporary, path)
+    except (IOError, OSError), e:
+        logger.warning("Unable to write to cache directory %s: %s" % (directory, e))
+
+
+def normalise(request):
+    """
+    Normalises a SEMP request for use as a cache key.
+
+    >>> normalise('<rpc semp-version="soltr/7_1_1">\\n  <show>\\n    <version/>\\n  </show>\\n</rpc>\\n')
+    '<rpc semp-version="soltr/7_1_1"><show><version/></show></rpc>'
+    """
+    return re.sub(r'>\s+<', '><', request.strip())
+
+
+def is_read_only(request):
+    """
+    >>> is_read_only('<rpc semp-version="soltr/7_1_1"><show><version/></show></rpc>')
+    True
+    >>> is_read_only('<rpc semp-version="soltr/7_1_1"><message-vpn><vpn-name>v</vpn-name></message-vpn></rpc>')
+    False
+    """
+    return READ_ONLY.match(request) is not None
+
+
+def is_runtime(request):
+    """
+    True if the request asks about the state of the appliance it is sent to, e.g. its clients, its
+    message spool and the queues in it, or statistics, which the other appliance of the pair does not have.
+
+    >>> is_runtime('<rpc semp-version="soltr/7_1_1"><show><message-vpn><vpn-name>*</vpn-name><stats/></message-vpn></show></rpc>')
+    True
+    >>> is_runtime('<rpc semp-version="soltr/7_1_1"><show><client-username><name>u</name></client-username></show></rpc>')
+    False
+    """
+    return RUNTIME.search(request) is not None
+
+
+def vpn_names(request):
+    """
+    >>> vpn_names('<rpc semp-version="soltr/7_1_1"><show><queue><name>*</name><vpn-name>v</vpn-name></queue></show></rpc>')
+    frozenset(['v'])
+    """
+    return frozenset(VPN_NAME.findall(request))
+
+
+def succeeded(response):
+    """
+    True if the appliance executed the request, replies with any other execute-result are not cached.
+
+    >>> from libsolace.SolaceAPI import SempResponse
+    >>> succeeded(SempResponse("http://solace1/SEMP", 200, {'rpc-reply': {'execute-result': {'@code': 'ok'}}}))
+    True
+    >>> succeeded(SempResponse("http://solace1/SEMP", 200, {'rpc-reply': {'execute-result': {'@code': 'fail'}}}))
+    False
+    """
+    try:
+        return response.document['rpc-reply']['execute-result']['@code'] == 'ok'
+    except (KeyError, TypeError):
+        return False
+
+
+class SolaceRequestCache(object):
+    """
+    Caches the replies to `show` requests per appliance, keyed by the normalised request.
+
+    A request which is not a `show` is a write, and invalidates the cached replies of the VPNs it
+    names, along with the replies which are not about specific VPNs. A write which does not name
+    a VPN invalidates everything.
+
+    The replies are copied in and out of the cache, so callers can change the documents they are
+    given.
+
+    :param ttl: seconds a reply is kept for, None to keep it until it is invalidated
+    :type ttl: float
+    :param max_entries: replies kept in memory, the least recently used are dropped first
+    :type max_entries: int
+    :param directory: also keep the replies in this directory, where other processes using the same
+        directory find them. Requires a `ttl`.
+    :type directory: str
+
+    Concurrent misses for the same request are loaded once, see :func:`fetch`. With a directory,
+    this holds across processes where `fcntl` is available. A write through any cache using the
+    directory marks every reply stored in it before the write as stale.
+
+    Example:
+        >>> from libsolace.SolaceAPI import SempResponse
+        >>> cache = SolaceRequestCache()
+        >>> show = '<rpc semp-version="soltr/7_1_1"><show><queue><name>q</name><vpn-name>v</vpn-name></queue></show></rpc>'
+        >>> cache.get("http://solace1/SEMP", show) is None
+        True
+        >>> cache.put("http://solace1/SEMP", show, SempResponse("http://solace1/SEMP", 200, {'rpc-reply': {}}))
+        >>> cache.get("http://solace1/SEMP", show).document
+        {'rpc-reply': {}}
+        >>> cache.invalidate('<rpc semp-version="soltr/7_1_1"><message-spool><vpn-name>v</vpn-name></message-spool></rpc>')
+        >>> cache.get("http://solace1/SEMP", show) is None
+        True
+        >>> cache.hits, cache.misses, cache.invalidations
+        (1, 2, 1)
+
+    """
+
+    def __init__(self, ttl=None, max_entries=1000, directory=None):
+        if directory is not None and ttl is None:
+            raise ValueError("a ttl is required to keep replies in a directory")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory = directory
+        # (host, normalised request) -> (expires, vpn names, SempResponse), least recently used first
+        self.entries = OrderedDict()
+        # keys being loaded by fetch() -> threading.Event set when they are
+        self.loading = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        if directory is not None and not prepare_directory(directory):
+            self.directory = None
+
+    def get(self, host, request):
+        """
+        :returns: a copy of the cached reply from the host, or None
+        """
+        key = (host, normalise(request))
+        response = self.__get(key)
+        with self.lock:
+            if response is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        logger.debug("Cache hit: %s %s" % key)
+        return self.__copy(response)
+
+    def put(self, host, request, response, created=None):
+        """
+        Caches a copy of the host's reply to a request
+
+        :param created: when the request was sent, defaults to now. A reply sent before the last
+            write to the appliances is not kept on disk.
+        :type created: float
+        """
+        key = (host, normalise(request))
+        response = self.__copy(response)
+        self.__remember(key, self.__expires(), response)
+        if self.directory is not None:
+            self.__write(key, time.time() if created is None else created, response)
+
+    def fetch(self, host, request, load, deadline=None):
+        """
+        Read through: returns a copy of the cached reply from the host, or calls `load()` for it and
+        caches its result if it is a complete reply with HTTP status 200 which the appliance executed.
+
+        If other threads, or processes sharing the directory, are loading the same request, waits
+        for them and returns their reply instead of loading it again.
+
+        :param load: function returning the host's reply to the request
+        :type load: callable
+        :param deadline: time.time() to stop waiting for another thread loading the request at
+        :type deadline: float
+        :rtype: libsolace.SolaceAPI.SempResponse
+        :raises DeadlineExceeded: if the other thread did not load the request by the deadline
+        """
+        key = (host, normalise(request))
+        while True:
+            response = self.get(host, request)
+            if response is not None:
+                return response
+            with self.lock:
+                event = self.loading.get(key)
+                if event is None:
+                    event = self.loading[key] = threading.Event()
+                    break
+            logger.debug("Waiting for another thread to load %s %s" % key)
+            if deadline is None:
+                event.wait()
+            elif not event.wait(max(deadline - time.time(), 0)):
+                raise DeadlineExceeded("Another thread loading %s %s did not finish before the deadline" % key)
+        try:
+            with self.__file_lock(key):
+                # another process may have loaded it while we waited for the lock
+                entry = self.__read(key)
+                if entry is not None:
+                    self.__remember(key, *entry)
+                    return self.__copy(entry[1])
+                created = time.time()
+                response = load()
+                if response.code == 200 and getattr(response, "complete", True) and succeeded(response):
+                    self.put(host, request, response, created=created)
+                return response
+        finally:
+            with self.lock:
+                del self.loading[key]
+            event.set()
+
+    def invalidate(self, request):
+        """ Drops the cached replies a write request can change """
+        vpns = vpn_names(request)
+        with self.lock:
+            if not vpns:
+                stale = self.entries.keys()
+            else:
+                stale = [key for key, (expires, entry_vpns, response) in self.entries.items()
+                         if not entry_vpns or '*' in entry_vpns or entry_vpns & vpns]
+            for key in stale:
+                del self.entries[key]
+            self.invalidations += len(stale)
+        if stale:
+            logger.debug("Invalidated %s cached replies" % len(stale))
+        if self.directory is not None:
+            replace_file(self.directory, os.path.join(self.directory, GENERATION), repr(time.time()))
+
+    def clear(self):
+        with self.lock:
+            self.entries = OrderedDict()
+
+    def stats(self):
+        """
+        :rtype: dict
+        :returns: the hits, misses and invalidations so far
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations}
+
+    def __expires(self):
+        return None if self.ttl is None else time.time() + self.ttl
+
+    def __get(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None and (entry[0] is None or entry[0] > time.time()):
+                # most recently used
+                self.entries[key] = entry
+                return entry[2]
+        if self.directory is None:
+            return None
+        entry = self.__read(key)
+        if entry is None:
+            return None
+        self.__remember(key, *entry)
+        return entry[1]
+
+    def __remember(self, key, expires, response):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (expires, vpn_names(key[1]), response)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    # the on disk tier
+
+    def __path(self, key):
+        return os.path.join(self.directory, hashlib.sha1("%s\n%s" % key).hexdigest())
+
+    def __read(self, key):
+        """ :returns: (expires, SempResponse) stored by any process, or None """
+        if self.directory is None:
+            return None
+        from libsolace.SolaceAPI import SempResponse
+        try:
+            with open(self.__path(key)) as f:
+                entry = json.load(f)
+            generation = self.__generation()
+        except (IOError, ValueError):
+            return None
+        if entry['expires'] <= time.time() or entry['created'] <= generation:
+            return None
+        response = SempResponse(key[0], entry['code'], entry['document'], entry['raw'])
+        response.items = entry['items']
+        return entry['expires'], response
+
+    def __write(self, key, created, response):
+        entry = {'created': created, 'expires': created + self.ttl, 'code': response.code,
+                 'document': response.document, 'raw': response.raw, 'items': getattr(response, 'items', None)}
+        replace_file(self.directory, self.__path(key), json.dumps(entry))
+
+    def __generation(self):
+        try:
+            with open(os.path.join(self.directory, GENERATION)) as f:
+                return float(f.read())
+        except (IOError, ValueError):
+            return 0
+
+    def __file_lock(self, key):
+        return _FileLock(self.__path(key) + ".lock" if self.directory is not None and fcntl is not None else None)
+
+    @staticmethod
+    def __copy(response):
+        response = copy.copy(response)
+        response.document = copy.deepcopy(response.document)
+        if getattr(response, "items", None) is not None:
+            response.items = copy.deepcopy(response.items)
+        return response
+
+
+class DetectionCache(object):
+    """
+    The primary and backup appliances and the SolOS-TR version detected for a environment, kept
+    on disk for `ttl` seconds so short lived scripts do not detect them again, see
+    :class:`libsolace.SolaceAPI.SolaceAPI`.
+
+    :param ttl: seconds a detection is kept for
+    :type ttl: float
+    :param directory: the directory to keep them in, shared with the request cache by default
+    :type directory: str
+
+    Example:
+        >>> cache = DetectionCache(60, directory=tempfile.mkdtemp())
+        >>> cache.put("dev", {"primary": "http://solace1/SEMP", "backup": "http://solace2/SEMP",
+        ...                   "version": "soltr/7_1_1"})
+        >>> print(cache.get("dev")["version"])
+        soltr/7_1_1
+        >>> cache.discard("dev")
+        >>> cache.get("dev") is None
+        True
+    """
+
+    def __init__(self, ttl, directory=DEFAULT_DIRECTORY):
+        self.ttl = ttl
+        self.directory = directory if prepare_directory(directory) else None
+
+    def get(self, key):
+        """ :returns: the detection stored by any process, None if there is none or it expired """
+        if self.directory is None:
+            return None
+        try:
+            with open(self.__path(key)) as f:
+                entry = json.load(f)
+        except (IOError, ValueError):
+            return None
+        if entry.pop('expires') <= time.time():
+            return None
+        return entry
+
+    def put(self, key, detection):
+        """ Stores a detection, a dict with the primary, backup and version """
+        if self.directory is not None:
+            replace_file(self.directory, self.__path(key), json.dumps(dict(detection, expires=time.time() + self.ttl)))
+
+    def discard(self, key):
+        """ Drops a detection, e.g. after a failover """
+        if self.directory is None:
+            return
+        try:
+            os.remove(self.__path(key))
+        except OSError:
+            pass
+
+    def __path(self, key):
+        return os.path.join(self.directory, "detection-%s" % hashlib.sha1(key).hexdigest())
+
+
+class _FileLock(object):
+    """ Exclusive lock on a file while in the with block, a no-op without a path """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        if self.path is not None:
+            try:
+                self.file = open(self.path, "a")
+                fcntl.flock(self.file, fcntl.LOCK_EX)
+            except IOError, e:
+                logger.warning("Unable to lock %s: %s" % (self.path, e))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,263 @@
+import logging
+import threading
+
+from libsolace.SolaceExistenceIndex import IndexedType, PRIMARY, BACKUP, nodes_from_kwargs
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+__doc__ = """
+A snapshot of the settings of the objects on the appliances, for reconcile mode.
+
+In reconcile mode the plugins compare the settings they are about to change with the snapshot, see
+:func:`libsolace.Decorators.only_if_changed`, and only queue the commands which change something. The
+snapshot is one paged, detailed `show` per object type, VPN and appliance, listed the first time it is
+asked about them. A setting which is not in the listing counts as changed, so the command is sent as it
+is without reconcile mode.
+"""
+
+# type name -> SnapshotType, see SolaceSnapshot.names
+_types = {}
+
+
+class Setting(object):
+    """
+    A setting of a object, as shown in the detailed `show` of the object and as set by a plugin method.
+
+    :param path: dot separated path of the setting in the object's element of the `show` reply
+    :type path: str
+    :param desired: the value the plugin method sets, or a function returning it from the method's kwargs
+    :type desired: str or callable
+    :param shown: function to rewrite the shown value before comparing, e.g. to drop units
+    :type shown: callable
+    :param shutdown: the appliance only lets the setting change while the object is shut down
+    :type shutdown: bool
+
+    The values are compared as lowercase strings, a empty element is shown as "".
+
+    Example:
+        >>> setting = Setting("info.max-bind-count", lambda kwargs: kwargs["max_bind_count"])
+        >>> setting.matches({"info": {"max-bind-count": u"10"}}, {"max_bind_count": 10})
+        True
+        >>> setting.matches({"info": {}}, {"max_bind_count": 10})
+        False
+        >>> Setting("radius-domain", "").matches({"radius-domain": None}, {})
+        True
+    """
+
+    def __init__(self, path, desired, shown=None, shutdown=False):
+        self.path = path.split('.')
+        self.desired = desired
+        self.shown = shown
+        self.shutdown = shutdown
+
+    def value(self, kwargs):
+        """ :returns: the value the plugin method sets, None if the kwargs do not say """
+        if callable(self.desired):
+            try:
+                return self.desired(kwargs)
+            except KeyError:
+                return None
+        return self.desired
+
+    def current(self, item):
+        """ :returns: the value shown by the appliance, None if it is not shown """
+        for p in self.path:
+            if not isinstance(item, dict) or p not in item:
+                return None
+            item = item[p]
+        if item is None:
+            return u""
+        if isinstance(item, dict):
+            return None
+        return self.shown(item) if self.shown is not None else item
+
+    def matches(self, item, kwargs):
+        desired = self.value(kwargs)
+        current = self.current(item)
+        if desired is None or current is None:
+            return False
+        return unicode(current).strip().lower() == unicode(desired).strip().lower()
+
+    def apply(self, item, kwargs):
+        """ Sets the shown value to the one the plugin method sets """
+        for p in self.path[:-1]:
+            item = item.setdefault(p, {})
+        item[self.path[-1]] = self.value(kwargs)
+
+    def __repr__(self):
+        return "Setting(%s)" % '.'.join(self.path)
+
+
+def from_kwarg(name):
+    """
+    :returns: a function returning a kwarg, for :class:`Setting`
+
+    >>> from_kwarg("acl_profile")({"acl_profile": "dev_testvpn"})
+    'dev_testvpn'
+    """
+    return lambda kwargs: kwargs[name]
+
+
+class SnapshotType(IndexedType):
+    """
+    A object type listed with its settings, the same as a :class:`libsolace.SolaceExistenceIndex.IndexedType` with
+    a `show` request which returns the details.
+
+    The snapshot also lists the objects for the existence index, for the indexed type of the same `name`.
+    """
+
+    def __init__(self, name, template, path, key, name_kwarg, per_vpn=True):
+        IndexedType.__init__(self, name, template, path, key, name_kwarg, per_vpn=per_vpn)
+        _types[name] = self
+
+
+class SolaceSnapshot(object):
+    """
+    The settings of the objects on each appliance, listed on demand and kept current as commands are queued.
+
+    Set `RECONCILE: True` in the environment's config, or pass `reconcile=True` to
+    :class:`libsolace.SolaceAPI.SolaceAPI`, to use it.
+
+    :param api: the api to list the objects with
+    :type api: libsolace.SolaceAPI.SolaceAPI
+    """
+
+    def __init__(self, api):
+        self.api = api
+        # (node, type name, vpn name) -> {object name: element of the show reply}, None if they could not be listed
+        self.objects = {}
+        # (node, type name, vpn name) -> Event set when the thread listing them is done
+        self.loading = {}
+        # listings started before a clear are not kept
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        """ Forget everything, the objects are listed again when next asked about """
+        with self.lock:
+            self.objects = {}
+            self.generation += 1
+
+    def item(self, object_type, node, **kwargs):
+        """
+        :returns: the object's element of the `show` reply from the appliance, None if the object is not there or
+            the snapshot can not tell
+        """
+        vpn_name, name = object_type.object_key(kwargs)
+        if name is None:
+            return None
+        objects = self.__objects(object_type, node, vpn_name)
+        if objects is None:
+            return None
+        return objects.get(name)
+
+    def names(self, type_name, node, vpn_name):
+        """
+        The names of the objects of a type, for the existence index.
+
+        :returns: set of names, or None if the type is not in the snapshot or could not be listed
+        """
+        object_type = _types.get(type_name)
+        if object_type is None:
+            return None
+        objects = self.__objects(object_type, node, vpn_name)
+        if objects is None:
+            return None
+        # record() adds to the same dict
+        with self.lock:
+            return set(objects)
+
+    def unchanged(self, object_type, settings, **kwargs):
+        """
+        Checks if the object exists with the settings on the appliances the kwargs send commands to.
+
+        :param object_type: the type of the object
+        :type object_type: SnapshotType
+        :param settings: the settings to compare, none to only check the object exists
+        :type settings: list of Setting
+        :param kwargs: the kwargs of the plugin method
+        :rtype: bool
+        """
+        for node in self.__nodes(kwargs):
+            item = self.item(object_type, node, **kwargs)
+            if item is None:
+                return False
+            for setting in settings:
+                if not setting.matches(item, kwargs):
+                    logger.debug("Reconcile: %s %s %s differs on %s" % (object_type.name, object_type.object_key(kwargs),
+                                                                       setting, node))
+                    return False
+        return True
+
+    def requires_shutdown(self, object_type, settings, **kwargs):
+        """
+        Checks if applying the settings to a existing object changes any of those which can only be
+        changed while the object is shut down, see :class:`Setting`.
+
+        :param object_type: the type of the object
+        :type object_type: SnapshotType
+        :param settings: the settings about to be applied
+        :type settings: list of Setting
+        :param kwargs: the kwargs of the plugin method
+        :rtype: bool
+        """
+        return not self.unchanged(object_type, [setting for setting in settings if setting.shutdown], **kwargs)
+
+    def record(self, object_type, settings, **kwargs):
+        """ Records the settings as set on the appliances the kwargs send the command to """
+        vpn_name, name = object_type.object_key(kwargs)
+        if name is None:
+            return
+        for node in self.__nodes(kwargs):
+            objects = self.__objects(object_type, node, vpn_name)
+            if objects is None:
+                continue
+            with self.lock:
+                item = objects.setdefault(name, {})
+                for setting in settings:
+                    setting.apply(item, kwargs)
+
+    def __nodes(self, kwargs):
+        nodes = nodes_from_kwargs(primaryOnly=kwargs.get("primaryOnly", False),
+                                  backupOnly=kwargs.get("backupOnly", False))
+        if getattr(self.api, "backupRouter", None) is None:
+            # non HA, commands are only sent to the primary
+            nodes = [node for node in nodes if node == PRIMARY]
+        return nodes
+
+    def __objects(self, object_type, node, vpn_name):
+        """ Lists the objects once, the other threads asking about the same ones wait for the listing """
+        key = (node, object_type.name, vpn_name)
+        while True:
+            with self.lock:
+                if key in self.objects:
+                    return self.objects[key]
+                event = self.loading.get(key)
+                if event is None:
+                    event = self.loading[key] = threading.Event()
+                    generation = self.generation
+                    break
+            logger.debug("Waiting for another thread to list %s %s %s" % key)
+            event.wait()
+        try:
+            objects = self.__list(object_type, node, vpn_name)
+            with self.lock:
+                if generation == self.generation:
+                    self.objects[key] = objects
+            return objects
+        finally:
+            with self.lock:
+                del self.loading[key]
+            event.set()
+
+    def __list(self, object_type, node, vpn_name):
+        logger.info("Snapshot of %s objects in vpn %s on the %s appliance" % (object_type.name, vpn_name, node))
+        try:
+            xml = object_type.request(self.api.version, vpn_name)
+            items = self.api.rpc_iter(xml, object_type.path, primaryOnly=node == PRIMARY, backupOnly=node == BACKUP)
+            return dict((item[object_type.key], item) for item in items)
+        except Exception, e:
+            logger.warning("Unable to list %s objects in vpn %s on the %s appliance, not reconciling them: %s" % (
+                object_type.name, vpn_name, node, e))
+            return None
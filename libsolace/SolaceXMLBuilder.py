@@ -1,15 +1,54 @@
 import logging
-import re
-from collections import OrderedDict
+from xml.dom.minidom import parseString
 
 from libsolace.SolaceNode import SolaceNode
-from libsolace.util import d2x, get_calling_module
+from libsolace.util import get_calling_module
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
-class SolaceXMLBuilder(object):
+def escape(text):
+    """
+    Escapes text for use as XML element content, the same way as xml.dom.minidom does.
+
+    >>> escape('a&b<c>"d')
+    'a&amp;b&lt;c&gt;&quot;d'
+    """
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def _write_xml(parts, name, value):
+    """
+    Appends the XML of a element to `parts`. Nodes and dicts become nested elements, lists become repeated
+    elements, anything else becomes escaped text.
+    """
+    if isinstance(value, SolaceNode):
+        children = value._children
+        if not children:
+            parts.append('<%s/>' % name)
+        else:
+            parts.append('<%s>' % name)
+            for key in value._names:
+                _write_xml(parts, key, children[key])
+            parts.append('</%s>' % name)
+    elif isinstance(value, dict):
+        start = len(parts)
+        parts.append('<%s>' % name)
+        for key in value:
+            _write_xml(parts, key, value[key])
+        if len(parts) == start + 1:
+            parts[start] = '<%s/>' % name
+        else:
+            parts.append('</%s>' % name)
+    elif isinstance(value, list):
+        for item in value:
+            _write_xml(parts, name, item)
+    else:
+        parts.append('<%s>%s</%s>' % (name, escape(str(value)), name))
+
+
+class SolaceXMLBuilder(SolaceNode):
     """Builds Solace's SEMP XML Configuration Commands
 
     Creating a instance of this, and then calling any obj on the instance, will create
@@ -31,39 +70,43 @@ class SolaceXMLBuilder(object):
         >>> str(a)
         Traceback (most recent call last):
           ...
-        AttributeError: d2x instance has no attribute 'root'
+        AttributeError: the XML must have exactly one root element, found: ['foo', 'bar']
 
 
 
     """
 
+    __slots__ = ('description', 'version')
+
     def __init__(self, description=None, version=None, **kwargs):
 
         if version is None:
             version = "soltr/6_0"
 
-        self.__dict__ = OrderedDict()
-        self.__setattr__ = None
-        if description is not None:
-            self.description = description
+        SolaceNode.__init__(self)
+        self.description = description
         self.version = version
-        calling_module = get_calling_module()
+        calling_module = get_calling_module(logger=logger)
         logger.info("Called by module: %s - %s description: %s " % (calling_module, self.version, description))
 
-    def __getattr__(self, name):
-        name = re.sub("_", "-", name)
-        try:
-            return self.__dict__[name]
-        except:
-            self.__dict__[name] = SolaceNode()
-            return self.__dict__[name]
+    def __setattr__(self, name, value):
+        if name in SolaceXMLBuilder.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            SolaceNode.__setattr__(self, name, value)
 
     def __repr__(self):
-        myxml = d2x(eval(str(self.__dict__)))
+        roots = self._names
+        if len(roots) != 1:
+            logger.error("the root leaf node was not found, maybe you registered two roots!")
+            raise AttributeError("the XML must have exactly one root element, found: %s" % roots)
         # I had to conjur up my own header cause solace doesnt like </rpc> to have attribs
-        complete_xml = str('<rpc semp-version="%s">%s</rpc>' % (self.version, myxml.display(version=self.version)))
-        logger.debug("Returning XML: %s" % complete_xml)
+        parts = ['<rpc semp-version="%s">' % self.version]
+        _write_xml(parts, roots[0], self._children[roots[0]])
+        parts.append('</rpc>')
+        complete_xml = str(''.join(parts))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Returning XML: %s" % parseString(complete_xml).documentElement.toprettyxml(indent="  "))
         return complete_xml
 
-    def __call__(self, *args, **kwargs):
-        return self.__dict__
+    __str__ = __repr__
@@ -0,0 +1,110 @@
+import logging
+
+from lxml import etree
+
+from libsolace.Exceptions import MissingProperty
+from libsolace.SolaceCommandQueue import SolaceCommandQueue, ValidatedXML
+from libsolace.SolaceXMLBuilder import SolaceXMLBuilder, escape
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# parameters are marked with a private use character (U+E000, utf-8 encoded) which the
+# builder does not escape, and which the shape of a request never contains
+MARKER = '\xee\x80\x80'
+
+
+class Param(object):
+    """ Placeholder for a parameter while a template is compiled """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return "%s%s%s" % (MARKER, self.name, MARKER)
+
+
+class SolaceXMLTemplate(object):
+    """Precompiled SEMP request with parameters
+
+    A template is declared with the shape of a request, as (path, param) pairs in the
+    order a SolaceXMLBuilder would be called. `path` is the builder's attribute path
+    e.g. "message_spool.queue.name", and `param` is the name of the parameter which
+    fills in the element's text, or None for an empty element.
+
+    The shape is compiled once per SolOS version with a SolaceXMLBuilder, rendering it is
+    plain string joining. The first request rendered for each version is validated against
+    the XSD. A template without parameters always renders the same request, which
+    :class:`libsolace.SolaceCommandQueue.SolaceCommandQueue` does not validate again. The
+    parameter values of other templates are validated when the request is queued.
+
+    Example
+
+        >>> from libsolace.SolaceXMLTemplate import SolaceXMLTemplate
+        >>> t = SolaceXMLTemplate(("message_spool.vpn_name", "vpn_name"),
+        ...                       ("message_spool.queue.name", "queue_name"),
+        ...                       ("message_spool.queue.no.shutdown.full", None))
+        >>> t.render("soltr/7_1_1", vpn_name="dev_testvpn", queue_name="a&b")
+        '<rpc semp-version="soltr/7_1_1"><message-spool><vpn-name>dev_testvpn</vpn-name><queue><name>a&amp;b</name><no><shutdown><full/></shutdown></no></queue></message-spool></rpc>'
+
+    """
+
+    def __init__(self, *shape):
+        self.shape = shape
+        self.compiled = {}
+        self.validated = set()
+        self.fixed = all(param is None for path, param in shape)
+
+    def compile(self, version):
+        """
+        Compiles the shape for a SolOS version.
+
+        :param version: SolOS version e.g. "soltr/7_1_1"
+        :type version: str
+        :rtype: list
+        :returns: the literal XML parts, with the parameter names at the odd indexes
+        """
+        # the detected version is unicode, keep the template a byte string like the marker
+        builder = SolaceXMLBuilder("Compiling template", version=str(version))
+        for path, param in self.shape:
+            names = path.split('.')
+            node = builder
+            for name in names[:-1]:
+                node = getattr(node, name)
+            if param is None:
+                getattr(node, names[-1])
+            else:
+                setattr(node, names[-1], Param(param))
+        parts = str(builder).split(MARKER)
+        logger.debug("Compiled template for %s: %s" % (version, parts))
+        return parts
+
+    def render(self, version, **params):
+        """
+        Renders a request with the given parameter values, which are escaped.
+
+        :param version: SolOS version e.g. "soltr/7_1_1"
+        :type version: str
+        :param params: a value for every parameter of the template
+        :rtype: str
+        :returns: the SEMP request, a ValidatedXML if the template has no parameters
+        """
+        try:
+            parts = self.compiled[version]
+        except KeyError:
+            parts = self.compiled[version] = self.compile(version)
+
+        xml = parts[:]
+        for i in xrange(1, len(xml), 2):
+            try:
+                xml[i] = escape(str(params[xml[i]]))
+            except KeyError:
+                raise MissingProperty(xml[i])
+        xml = ''.join(xml)
+
+        if version not in self.validated:
+            etree.fromstring(xml, etree.XMLParser(schema=SolaceCommandQueue.get_schema(version)))
+            self.validated.add(version)
+        if self.fixed:
+            return ValidatedXML(xml)
+        return xml
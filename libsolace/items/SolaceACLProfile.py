@@ -2,14 +2,26 @@ import logging
 
 import libsolace
 from libsolace import Plugin
+from libsolace.Decorators import only_if_changed
 from libsolace.SolaceCommandQueue import SolaceCommandQueue
+from libsolace.SolaceSnapshot import SnapshotType, Setting
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
+from libsolace.SolaceXMLTemplate import SolaceXMLTemplate
 from libsolace.plugin import PluginResponse
 from libsolace.util import get_key_from_kwargs
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+SHOW_ACL_PROFILE_DETAIL = SolaceXMLTemplate(("show.acl_profile.name", "name"), ("show.acl_profile.vpn_name", "vpn_name"),
+                                            ("show.acl_profile.detail", None))
+ACL_PROFILE_SNAPSHOT = SnapshotType("acl-profile", SHOW_ACL_PROFILE_DETAIL,
+                                    "rpc-reply.rpc.show.acl-profile.acl-profiles.acl-profile", "profile-name", "name")
+# the settings in the detailed show of a acl-profile which the methods set, for reconcile mode
+PUBLISH_SETTING = Setting("publish-topic.default-action", "allow")
+SUBSCRIBE_SETTING = Setting("subscribe-topic.default-action", "allow")
+CONNECT_SETTING = Setting("client-connect.default-action", "allow")
+
 
 @libsolace.plugin_registry.register
 class SolaceACLProfile(Plugin):
@@ -80,12 +92,13 @@ class SolaceACLProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Profile %s" % name, version=self.api.version)
-        self.api.x.show.acl_profile.name = name
-        self.api.x.show.acl_profile.vpn_name = vpn_name
-        self.commands.enqueue(self.api.x)
-        return self.api.rpc(PluginResponse(str(self.api.x), **kwargs))
+        request = SolaceXMLBuilder("Profile %s" % name, version=self.api.version)
+        request.show.acl_profile.name = name
+        request.show.acl_profile.vpn_name = vpn_name
+        self.commands.enqueue(request)
+        return self.api.rpc(PluginResponse(str(request), **kwargs))
 
+    @only_if_changed(ACL_PROFILE_SNAPSHOT)
     def new_acl(self, **kwargs):
         """Returns a SEMP request for new ACL profile.
 
@@ -104,12 +117,13 @@ class SolaceACLProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Profile %s" % name, version=self.api.version)
-        self.api.x.create.acl_profile.name = name
-        self.api.x.create.acl_profile.vpn_name = vpn_name
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        request = SolaceXMLBuilder("Profile %s" % name, version=self.api.version)
+        request.create.acl_profile.name = name
+        request.create.acl_profile.vpn_name = vpn_name
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
+    @only_if_changed(ACL_PROFILE_SNAPSHOT, [PUBLISH_SETTING])
     def allow_publish(self, **kwargs):
         """Allow publish
 
@@ -128,13 +142,14 @@ class SolaceACLProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Allow Publish %s" % name, version=self.api.version)
-        self.api.x.acl_profile.name = name
-        self.api.x.acl_profile.vpn_name = vpn_name
-        self.api.x.acl_profile.publish_topic.default_action.allow
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        request = SolaceXMLBuilder("Allow Publish %s" % name, version=self.api.version)
+        request.acl_profile.name = name
+        request.acl_profile.vpn_name = vpn_name
+        request.acl_profile.publish_topic.default_action.allow
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
+    @only_if_changed(ACL_PROFILE_SNAPSHOT, [SUBSCRIBE_SETTING])
     def allow_subscribe(self, **kwargs):
         """ Allow subscribe
 
@@ -153,14 +168,15 @@ class SolaceACLProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("VPN %s Allowing ACL Profile to subscribe to VPN" % name,
+        request = SolaceXMLBuilder("VPN %s Allowing ACL Profile to subscribe to VPN" % name,
                                       version=self.api.version)
-        self.api.x.acl_profile.name = name
-        self.api.x.acl_profile.vpn_name = vpn_name
-        self.api.x.acl_profile.subscribe_topic.default_action.allow
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        request.acl_profile.name = name
+        request.acl_profile.vpn_name = vpn_name
+        request.acl_profile.subscribe_topic.default_action.allow
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
+    @only_if_changed(ACL_PROFILE_SNAPSHOT, [CONNECT_SETTING])
     def allow_connect(self, **kwargs):
         """ Allow Connect
 
@@ -179,9 +195,9 @@ class SolaceACLProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("VPN %s Allowing ACL Profile to connect to VPN" % name, version=self.api.version)
-        self.api.x.acl_profile.name = name
-        self.api.x.acl_profile.vpn_name = vpn_name
-        self.api.x.acl_profile.client_connect.default_action.allow
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        request = SolaceXMLBuilder("VPN %s Allowing ACL Profile to connect to VPN" % name, version=self.api.version)
+        request.acl_profile.name = name
+        request.acl_profile.vpn_name = vpn_name
+        request.acl_profile.client_connect.default_action.allow
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
@@ -16,6 +16,8 @@ class SolaceBridge(Plugin):
     """ Construct a bridge between two appliance clusters to link specific VPN's. This Plugin is still being developed,
     and is NOT ready for production. """
 
+    plugin_name = "SolaceBridge"
+
     def __init__(self, testmode=True, shutdown_on_apply=False, options=None, version=None, **kwargs):
         """ Init user object
 
@@ -26,10 +28,10 @@ class SolaceBridge(Plugin):
 
         """
         logger.debug("options: %s" % options)
-        self.cq = SolaceCommandQueue(version=version)
 
         self.primaryCluster = SolaceAPI(options.primary, testmode=testmode, version=version)
         self.drCluster = SolaceAPI(options.backup, testmode=testmode, version=version)
+        self.commands = SolaceCommandQueue(version=self.primaryCluster.version)
         self.vpns = []
 
         for vpn in options.vpns:
@@ -101,242 +103,247 @@ class SolaceBridge(Plugin):
                                                   options.primary_cluster_primary_node_name, options.queue,
                                                   version=version)
 
+    def enqueue(self, api, request, **kwargs):
+        """ Queues a request for the cluster of `api`, the name of the cluster's environment is in the
+        `cluster` kwarg of the command """
+        self.commands.enqueueV2(str(request), cluster=api.environment, **kwargs)
+
     def _create_bridge(self, api, bridgeName, vpn, **kwargs):
-        api.x = SolaceXMLBuilder("%s create primary bridge: %s on primary appliance" % (api.primaryRouter, bridgeName),
+        request = SolaceXMLBuilder("%s create primary bridge: %s on primary appliance" % (api.primaryRouter, bridgeName),
                                  version=api.version)
-        api.x.create.bridge.bridge_name = bridgeName
-        api.x.create.bridge.vpn_name = vpn
-        api.x.create.bridge.primary
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
+        request.create.bridge.bridge_name = bridgeName
+        request.create.bridge.vpn_name = vpn
+        request.create.bridge.primary
+        self.enqueue(api, request, primaryOnly=True)
 
-        api.x = SolaceXMLBuilder("%s create backup bridge: %s on backup appliance" % (api.backupRouter, bridgeName),
+        request = SolaceXMLBuilder("%s create backup bridge: %s on backup appliance" % (api.backupRouter, bridgeName),
                                  version=api.version)
-        api.x.create.bridge.bridge_name = bridgeName
-        api.x.create.bridge.vpn_name = vpn
-        api.x.create.bridge.backup
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.create.bridge.bridge_name = bridgeName
+        request.create.bridge.vpn_name = vpn
+        request.create.bridge.backup
+        self.enqueue(api, request, backupOnly=True)
 
     def _create_bridge_remote_vrouter(self, api, bridgeName, vpn, virtual_router, **kwargs):
-        api.x = SolaceXMLBuilder("%s configure primary bridge: %s vrouter: %s on primary appliance" % (
+        request = SolaceXMLBuilder("%s configure primary bridge: %s vrouter: %s on primary appliance" % (
             api.primaryRouter, bridgeName, virtual_router), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.create.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.create.message_vpn.router
-        api.x.bridge.remote.create.message_vpn.virtual_router_name = "v:%s" % virtual_router
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder("%s configure backup bridge: %s vrouter: %s on backup appliance" % (
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.create.message_vpn.vpn_name = vpn
+        request.bridge.remote.create.message_vpn.router
+        request.bridge.remote.create.message_vpn.virtual_router_name = "v:%s" % virtual_router
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder("%s configure backup bridge: %s vrouter: %s on backup appliance" % (
             api.backupRouter, bridgeName, virtual_router), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.create.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.create.message_vpn.router
-        api.x.bridge.remote.create.message_vpn.virtual_router_name = "v:%s" % virtual_router
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.create.message_vpn.vpn_name = vpn
+        request.bridge.remote.create.message_vpn.router
+        request.bridge.remote.create.message_vpn.virtual_router_name = "v:%s" % virtual_router
+        self.enqueue(api, request, backupOnly=True)
 
     def _create_bridge_remote_addr(self, api, bridgeName, vpn, backup_addr, phys_intf, **kwargs):
-        api.x = SolaceXMLBuilder(
+        request = SolaceXMLBuilder(
             "%s configure primary bridge: %s remote addr: %s phys_intf: %s on primary appliance" % (
                 api.primaryRouter, bridgeName, backup_addr, phys_intf), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.create.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.create.message_vpn.connect_via
-        api.x.bridge.remote.create.message_vpn.addr = backup_addr
-        api.x.bridge.remote.create.message_vpn.interface
-        api.x.bridge.remote.create.message_vpn.phys_intf = phys_intf
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder("%s configure backup bridge: %s remote addr: %s phys_intf: %s on backup appliance" % (
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.create.message_vpn.vpn_name = vpn
+        request.bridge.remote.create.message_vpn.connect_via
+        request.bridge.remote.create.message_vpn.addr = backup_addr
+        request.bridge.remote.create.message_vpn.interface
+        request.bridge.remote.create.message_vpn.phys_intf = phys_intf
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder("%s configure backup bridge: %s remote addr: %s phys_intf: %s on backup appliance" % (
             api.backupRouter, bridgeName, backup_addr, phys_intf), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.create.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.create.message_vpn.connect_via
-        api.x.bridge.remote.create.message_vpn.addr = backup_addr
-        api.x.bridge.remote.create.message_vpn.interface
-        api.x.bridge.remote.create.message_vpn.phys_intf = phys_intf
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.create.message_vpn.vpn_name = vpn
+        request.bridge.remote.create.message_vpn.connect_via
+        request.bridge.remote.create.message_vpn.addr = backup_addr
+        request.bridge.remote.create.message_vpn.interface
+        request.bridge.remote.create.message_vpn.phys_intf = phys_intf
+        self.enqueue(api, request, backupOnly=True)
 
     def _bridge_username_addr(self, api, bridgeName, vpn, backup_addr, phys_intf, username, password, **kwargs):
-        api.x = SolaceXMLBuilder("%s primary bridge: %s remote username: %s on primary appliance" % (
+        request = SolaceXMLBuilder("%s primary bridge: %s remote username: %s on primary appliance" % (
             api.primaryRouter, bridgeName, username), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.connect_via
-        api.x.bridge.remote.message_vpn.addr = backup_addr
-        api.x.bridge.remote.message_vpn.interface
-        api.x.bridge.remote.message_vpn.phys_intf = phys_intf
-        api.x.bridge.remote.message_vpn.client_username.name = username
-        api.x.bridge.remote.message_vpn.client_username.password = password
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder(
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.connect_via
+        request.bridge.remote.message_vpn.addr = backup_addr
+        request.bridge.remote.message_vpn.interface
+        request.bridge.remote.message_vpn.phys_intf = phys_intf
+        request.bridge.remote.message_vpn.client_username.name = username
+        request.bridge.remote.message_vpn.client_username.password = password
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder(
             "%s backup bridge: %s remote username: %s on backup appliance" % (api.backupRouter, bridgeName, username),
             version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.connect_via
-        api.x.bridge.remote.message_vpn.addr = backup_addr
-        api.x.bridge.remote.message_vpn.interface
-        api.x.bridge.remote.message_vpn.phys_intf = phys_intf
-        api.x.bridge.remote.message_vpn.client_username.name = username
-        api.x.bridge.remote.message_vpn.client_username.password = password
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.connect_via
+        request.bridge.remote.message_vpn.addr = backup_addr
+        request.bridge.remote.message_vpn.interface
+        request.bridge.remote.message_vpn.phys_intf = phys_intf
+        request.bridge.remote.message_vpn.client_username.name = username
+        request.bridge.remote.message_vpn.client_username.password = password
+        self.enqueue(api, request, backupOnly=True)
 
     def _bridge_username_vrouter(self, api, bridgeName, vpn, vrouter, username, password, **kwargs):
-        api.x = SolaceXMLBuilder("%s primary bridge: %s remote username: %s on primary appliance" % (
+        request = SolaceXMLBuilder("%s primary bridge: %s remote username: %s on primary appliance" % (
             api.primaryRouter, bridgeName, username), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.router
-        api.x.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
-        api.x.bridge.remote.message_vpn.client_username.name = username
-        api.x.bridge.remote.message_vpn.client_username.password = password
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder(
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.router
+        request.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
+        request.bridge.remote.message_vpn.client_username.name = username
+        request.bridge.remote.message_vpn.client_username.password = password
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder(
             "%s backup bridge: %s remote username: %s on backup appliance" % (api.backupRouter, bridgeName, username),
             version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.router
-        api.x.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
-        api.x.bridge.remote.message_vpn.client_username.name = username
-        api.x.bridge.remote.message_vpn.client_username.password = password
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.router
+        request.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
+        request.bridge.remote.message_vpn.client_username.name = username
+        request.bridge.remote.message_vpn.client_username.password = password
+        self.enqueue(api, request, backupOnly=True)
 
     def _bridge_enable(self, api, bridgeName, vpn, **kwargs):
-        api.x = SolaceXMLBuilder(
+        request = SolaceXMLBuilder(
             "%s enable bridge: %s for vpn: %s on primary appliance" % (api.primaryRouter, bridgeName, vpn),
             version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.no.shutdown
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.no.shutdown
+        self.enqueue(api, request, primaryOnly=True)
 
-        api.x = SolaceXMLBuilder(
+        request = SolaceXMLBuilder(
             "%s enable bridge: %s for vpn: %s on backup appliance" % (api.backupRouter, bridgeName, vpn),
             version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.no.shutdown
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.no.shutdown
+        self.enqueue(api, request, backupOnly=True)
 
     def _bridge_enable_remote_addr(self, api, bridgeName, vpn, backup_addr, phys_intf, **kwargs):
-        api.x = SolaceXMLBuilder("%s enable primary bridge: %s remote addr: %s phys_intf: %s on primary appliance" % (
+        request = SolaceXMLBuilder("%s enable primary bridge: %s remote addr: %s phys_intf: %s on primary appliance" % (
             api.primaryRouter, bridgeName, backup_addr, phys_intf), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.connect_via
-        api.x.bridge.remote.message_vpn.addr = backup_addr
-        api.x.bridge.remote.message_vpn.interface
-        api.x.bridge.remote.message_vpn.phys_intf = phys_intf
-        api.x.bridge.remote.message_vpn.no.shutdown
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder("%s enable backup bridge: %s remote addr: %s phys_intf: %s on backup appliance" % (
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.connect_via
+        request.bridge.remote.message_vpn.addr = backup_addr
+        request.bridge.remote.message_vpn.interface
+        request.bridge.remote.message_vpn.phys_intf = phys_intf
+        request.bridge.remote.message_vpn.no.shutdown
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder("%s enable backup bridge: %s remote addr: %s phys_intf: %s on backup appliance" % (
             api.backupRouter, bridgeName, backup_addr, phys_intf), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.connect_via
-        api.x.bridge.remote.message_vpn.addr = backup_addr
-        api.x.bridge.remote.message_vpn.interface
-        api.x.bridge.remote.message_vpn.phys_intf = phys_intf
-        api.x.bridge.remote.message_vpn.no.shutdown
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.connect_via
+        request.bridge.remote.message_vpn.addr = backup_addr
+        request.bridge.remote.message_vpn.interface
+        request.bridge.remote.message_vpn.phys_intf = phys_intf
+        request.bridge.remote.message_vpn.no.shutdown
+        self.enqueue(api, request, backupOnly=True)
 
     def _bridge_enable_remote_vrouter(self, api, bridgeName, vpn, vrouter, **kwargs):
-        api.x = SolaceXMLBuilder("%s enable primary bridge: %s vrouter: %s" % (api.primaryRouter, bridgeName, vrouter),
+        request = SolaceXMLBuilder("%s enable primary bridge: %s vrouter: %s" % (api.primaryRouter, bridgeName, vrouter),
                                  version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.router
-        api.x.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
-        api.x.bridge.remote.message_vpn.no.shutdown
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder("%s enable backup bridge: %s vrouter: %s" % (api.backupRouter, bridgeName, vrouter),
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.router
+        request.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
+        request.bridge.remote.message_vpn.no.shutdown
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder("%s enable backup bridge: %s vrouter: %s" % (api.backupRouter, bridgeName, vrouter),
                                  version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.router
-        api.x.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
-        api.x.bridge.remote.message_vpn.no.shutdown
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.router
+        request.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
+        request.bridge.remote.message_vpn.no.shutdown
+        self.enqueue(api, request, backupOnly=True)
 
     def _bridge_disable_remote_addr(self, api, bridgeName, vpn, backup_addr, phys_intf, **kwargs):
-        api.x = SolaceXMLBuilder("%s disable primary bridge: %s remote addr: %s phys_intf: %s on primary appliance" % (
+        request = SolaceXMLBuilder("%s disable primary bridge: %s remote addr: %s phys_intf: %s on primary appliance" % (
             api.primaryRouter, bridgeName, backup_addr, phys_intf), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.connect_via
-        api.x.bridge.remote.message_vpn.addr = backup_addr
-        api.x.bridge.remote.message_vpn.interface
-        api.x.bridge.remote.message_vpn.phys_intf = phys_intf
-        api.x.bridge.remote.message_vpn.shutdown
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder("%s disable backup bridge: %s remote addr: %s phys_intf: %s on backup appliance" % (
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.connect_via
+        request.bridge.remote.message_vpn.addr = backup_addr
+        request.bridge.remote.message_vpn.interface
+        request.bridge.remote.message_vpn.phys_intf = phys_intf
+        request.bridge.remote.message_vpn.shutdown
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder("%s disable backup bridge: %s remote addr: %s phys_intf: %s on backup appliance" % (
             api.backupRouter, bridgeName, backup_addr, phys_intf), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.connect_via
-        api.x.bridge.remote.message_vpn.addr = backup_addr
-        api.x.bridge.remote.message_vpn.interface
-        api.x.bridge.remote.message_vpn.phys_intf = phys_intf
-        api.x.bridge.remote.message_vpn.shutdown
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.connect_via
+        request.bridge.remote.message_vpn.addr = backup_addr
+        request.bridge.remote.message_vpn.interface
+        request.bridge.remote.message_vpn.phys_intf = phys_intf
+        request.bridge.remote.message_vpn.shutdown
+        self.enqueue(api, request, backupOnly=True)
 
     def _bridge_disable_remote_vrouter(self, api, bridgeName, vpn, vrouter, **kwargs):
-        api.x = SolaceXMLBuilder("%s enable primary bridge: %s vrouter: %s" % (api.primaryRouter, bridgeName, vrouter),
+        request = SolaceXMLBuilder("%s enable primary bridge: %s vrouter: %s" % (api.primaryRouter, bridgeName, vrouter),
                                  version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.router
-        api.x.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
-        api.x.bridge.remote.message_vpn.shutdown
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder("%s enable backup bridge: %s vrouter: %s" % (api.backupRouter, bridgeName, vrouter),
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.router
+        request.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
+        request.bridge.remote.message_vpn.shutdown
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder("%s enable backup bridge: %s vrouter: %s" % (api.backupRouter, bridgeName, vrouter),
                                  version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.router
-        api.x.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
-        api.x.bridge.remote.message_vpn.shutdown
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.router
+        request.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
+        request.bridge.remote.message_vpn.shutdown
+        self.enqueue(api, request, backupOnly=True)
 
     def _bridge_create_queue(self, api, queueName, vpnName, username, **kwargs):
         logger.info("%s:%s creating bridge queue: %s with owner username: %s" % (
@@ -346,65 +353,62 @@ class SolaceBridge(Plugin):
         queue1['queue_config']["exclusive"] = "true"
         queue1['queue_config']["queue_size"] = "4096"
         queue1['queue_config']["retries"] = 0
+        queue1['queue_config']["owner"] = username
         queue1["name"] = queueName
 
-        vpnd = {}
-        vpnd['vpn_name'] = vpnName
-        vpnd['owner_username'] = username
-
-        q1 = SolaceQueue(api, vpnd, [queue1])
+        q1 = api.manage("SolaceQueue", vpn_name=vpnName, queues=[queue1])
 
-        for c in q1.queue.commands:
-            api.cq.enqueue(str(api.x))
+        for command, command_kwargs in q1.commands.commands:
+            self.commands.enqueueV2(command, cluster=api.environment, **command_kwargs)
 
     def _bridge_set_remote_queue_addr(self, api, bridgeName, vpn, backup_addr, phys_intf, queueName, **kwargs):
-        api.x = SolaceXMLBuilder("%s primary bridge: %s set remote queue: %s on primary appliance" % (
+        request = SolaceXMLBuilder("%s primary bridge: %s set remote queue: %s on primary appliance" % (
             api.primaryRouter, bridgeName, queueName), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.connect_via
-        api.x.bridge.remote.message_vpn.addr = backup_addr
-        api.x.bridge.remote.message_vpn.interface
-        api.x.bridge.remote.message_vpn.phys_intf = phys_intf
-        api.x.bridge.remote.message_vpn.message_spool.queue.name = queueName
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder(
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.connect_via
+        request.bridge.remote.message_vpn.addr = backup_addr
+        request.bridge.remote.message_vpn.interface
+        request.bridge.remote.message_vpn.phys_intf = phys_intf
+        request.bridge.remote.message_vpn.message_spool.queue.name = queueName
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder(
             "%s backup bridge: %s set remote queue: %s on backup appliance" % (api.backupRouter, bridgeName, queueName),
             version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.connect_via
-        api.x.bridge.remote.message_vpn.addr = backup_addr
-        api.x.bridge.remote.message_vpn.interface
-        api.x.bridge.remote.message_vpn.phys_intf = phys_intf
-        api.x.bridge.remote.message_vpn.message_spool.queue.name = queueName
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.connect_via
+        request.bridge.remote.message_vpn.addr = backup_addr
+        request.bridge.remote.message_vpn.interface
+        request.bridge.remote.message_vpn.phys_intf = phys_intf
+        request.bridge.remote.message_vpn.message_spool.queue.name = queueName
+        self.enqueue(api, request, backupOnly=True)
 
     def _bridge_set_remote_queue_vrouter(self, api, bridgeName, vpn, vrouter, queueName, **kwargs):
-        api.x = SolaceXMLBuilder("%s primary bridge: %s set remote queue: %s on primary appliance" % (
+        request = SolaceXMLBuilder("%s primary bridge: %s set remote queue: %s on primary appliance" % (
             api.primaryRouter, bridgeName, queueName), version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.primary
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.router
-        api.x.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
-        api.x.bridge.remote.message_vpn.message_spool.queue.name = queueName
-        api.cq.enqueueV2(str(api.x), primaryOnly=True)
-
-        api.x = SolaceXMLBuilder(
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.primary
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.router
+        request.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
+        request.bridge.remote.message_vpn.message_spool.queue.name = queueName
+        self.enqueue(api, request, primaryOnly=True)
+
+        request = SolaceXMLBuilder(
             "%s backup bridge: %s set remote queue: %s on backup appliance" % (api.backupRouter, bridgeName, queueName),
             version=api.version)
-        api.x.bridge.bridge_name = bridgeName
-        api.x.bridge.vpn_name = vpn
-        api.x.bridge.backup
-        api.x.bridge.remote.message_vpn.vpn_name = vpn
-        api.x.bridge.remote.message_vpn.router
-        api.x.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
-        api.x.bridge.remote.message_vpn.message_spool.queue.name = queueName
-        api.cq.enqueueV2(str(api.x), backupOnly=True)
+        request.bridge.bridge_name = bridgeName
+        request.bridge.vpn_name = vpn
+        request.bridge.backup
+        request.bridge.remote.message_vpn.vpn_name = vpn
+        request.bridge.remote.message_vpn.router
+        request.bridge.remote.message_vpn.virtual_router_name = "v:%s" % vrouter
+        request.bridge.remote.message_vpn.message_spool.queue.name = queueName
+        self.enqueue(api, request, backupOnly=True)
@@ -1,8 +1,11 @@
 import logging
 
 import libsolace
+from libsolace.Decorators import only_if_changed
 from libsolace.SolaceCommandQueue import SolaceCommandQueue
+from libsolace.SolaceSnapshot import SnapshotType, Setting
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
+from libsolace.SolaceXMLTemplate import SolaceXMLTemplate
 from libsolace.plugin import Plugin, PluginResponse
 from libsolace.util import get_key_from_kwargs
 from libsolace.util import version_equal_or_greater_than
@@ -10,6 +13,31 @@ from libsolace.util import version_equal_or_greater_than
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+SHOW_CLIENT_PROFILE_DETAIL = SolaceXMLTemplate(("show.client_profile.name", "name"),
+                                               ("show.client_profile.vpn_name", "vpn_name"),
+                                               ("show.client_profile.detail", None))
+SHOW_GLOBAL_CLIENT_PROFILE_DETAIL = SolaceXMLTemplate(("show.client_profile.name", "name"),
+                                                      ("show.client_profile.detail", None))
+
+
+class ClientProfileSnapshotType(SnapshotType):
+    """ Client profiles are only scoped to a VPN from soltr/6_2, older versions list them all """
+
+    def request(self, version, vpn_name):
+        if version_equal_or_greater_than('soltr/6_2', version):
+            return SnapshotType.request(self, version, vpn_name)
+        return SHOW_GLOBAL_CLIENT_PROFILE_DETAIL.render(version, name="*")
+
+
+CLIENT_PROFILE_SNAPSHOT = ClientProfileSnapshotType("client-profile", SHOW_CLIENT_PROFILE_DETAIL,
+                                                    "rpc-reply.rpc.show.client-profile.profiles.profile", "name",
+                                                    "name")
+# the settings in the detailed show of a client-profile which the methods set, for reconcile mode
+CONSUME_SETTING = Setting("allow-guaranteed-message-receive", "true")
+SEND_SETTING = Setting("allow-guaranteed-message-send", "true")
+ENDPOINT_CREATE_SETTING = Setting("allow-guaranteed-endpoint-create", "true")
+TRANSACTED_SESSIONS_SETTING = Setting("allow-transacted-sessions", "true")
+
 
 @libsolace.plugin_registry.register
 class SolaceClientProfile(Plugin):
@@ -123,17 +151,18 @@ class SolaceClientProfile(Plugin):
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
         details = get_key_from_kwargs("details", kwargs, default=False)
 
-        self.api.x = SolaceXMLBuilder("Get Client Profile", version=self.api.version)
-        self.api.x.show.client_profile.name = name
+        request = SolaceXMLBuilder("Get Client Profile", version=self.api.version)
+        request.show.client_profile.name = name
         if version_equal_or_greater_than('soltr/6_2', self.api.version):
-            self.api.x.show.client_profile.vpn_name = vpn_name
+            request.show.client_profile.vpn_name = vpn_name
         if details:
-            self.api.x.show.client_profile.details
+            request.show.client_profile.details
         # enqueue to validate
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return self.api.rpc(PluginResponse(str(self.api.x), **kwargs))
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return self.api.rpc(PluginResponse(str(request), **kwargs))
 
     # @only_if_not_exists('get', 'rpc-reply.rpc.show.message-vpn.vpn')
+    @only_if_changed(CLIENT_PROFILE_SNAPSHOT)
     def new_client_profile(self, **kwargs):
         """Create a new client profile
 
@@ -157,12 +186,12 @@ class SolaceClientProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Create Client Profile", version=self.api.version)
-        self.api.x.create.client_profile.name = name
+        request = SolaceXMLBuilder("Create Client Profile", version=self.api.version)
+        request.create.client_profile.name = name
         if version_equal_or_greater_than('soltr/6_2', self.api.version):
-            self.api.x.create.client_profile.vpn_name = vpn_name
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+            request.create.client_profile.vpn_name = vpn_name
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
     def delete(self, **kwargs):
         """Delete a client profile
@@ -183,13 +212,14 @@ class SolaceClientProfile(Plugin):
         """
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
-        self.api.x = SolaceXMLBuilder("Delete Client Profile", version=self.api.version)
-        self.api.x.no.client_profile.name = name
+        request = SolaceXMLBuilder("Delete Client Profile", version=self.api.version)
+        request.no.client_profile.name = name
         if version_equal_or_greater_than('soltr/6_2', self.api.version):
-            self.api.x.no.client_profile.vpn_name = vpn_name
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+            request.no.client_profile.vpn_name = vpn_name
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
+    @only_if_changed(CLIENT_PROFILE_SNAPSHOT, [CONSUME_SETTING])
     def allow_consume(self, **kwargs):
         """Allow consume permission
 
@@ -211,14 +241,15 @@ class SolaceClientProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Allow profile consume", version=self.api.version)
-        self.api.x.client_profile.name = name
+        request = SolaceXMLBuilder("Allow profile consume", version=self.api.version)
+        request.client_profile.name = name
         if version_equal_or_greater_than('soltr/6_2', self.api.version):
-            self.api.x.client_profile.vpn_name = vpn_name
-        self.api.x.client_profile.message_spool.allow_guaranteed_message_receive
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+            request.client_profile.vpn_name = vpn_name
+        request.client_profile.message_spool.allow_guaranteed_message_receive
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
+    @only_if_changed(CLIENT_PROFILE_SNAPSHOT, [SEND_SETTING])
     def allow_send(self, **kwargs):
         """Allow send permission
 
@@ -240,14 +271,15 @@ class SolaceClientProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Allow profile send", version=self.api.version)
-        self.api.x.client_profile.name = name
+        request = SolaceXMLBuilder("Allow profile send", version=self.api.version)
+        request.client_profile.name = name
         if version_equal_or_greater_than('soltr/6_2', self.api.version):
-            self.api.x.client_profile.vpn_name = vpn_name
-        self.api.x.client_profile.message_spool.allow_guaranteed_message_send
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+            request.client_profile.vpn_name = vpn_name
+        request.client_profile.message_spool.allow_guaranteed_message_send
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
+    @only_if_changed(CLIENT_PROFILE_SNAPSHOT, [ENDPOINT_CREATE_SETTING])
     def allow_endpoint_create(self, **kwargs):
         """Allow endpoint creation permission
 
@@ -270,14 +302,15 @@ class SolaceClientProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Allow profile endpoint create", version=self.api.version)
-        self.api.x.client_profile.name = name
+        request = SolaceXMLBuilder("Allow profile endpoint create", version=self.api.version)
+        request.client_profile.name = name
         if version_equal_or_greater_than('soltr/6_2', self.api.version):
-            self.api.x.client_profile.vpn_name = vpn_name
-        self.api.x.client_profile.message_spool.allow_guaranteed_endpoint_create
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+            request.client_profile.vpn_name = vpn_name
+        request.client_profile.message_spool.allow_guaranteed_endpoint_create
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
+    @only_if_changed(CLIENT_PROFILE_SNAPSHOT, [TRANSACTED_SESSIONS_SETTING])
     def allow_transacted_sessions(self, **kwargs):
         """Allow transaction sessions permission
 
@@ -300,13 +333,13 @@ class SolaceClientProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Allow profile transacted sessions", version=self.api.version)
-        self.api.x.client_profile.name = name
+        request = SolaceXMLBuilder("Allow profile transacted sessions", version=self.api.version)
+        request.client_profile.name = name
         if version_equal_or_greater_than('soltr/6_2', self.api.version):
-            self.api.x.client_profile.vpn_name = vpn_name
-        self.api.x.client_profile.message_spool.allow_transacted_sessions
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+            request.client_profile.vpn_name = vpn_name
+        request.client_profile.message_spool.allow_transacted_sessions
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
     def set_max_clients(self, **kwargs):
         """Set max clients for profile
@@ -333,13 +366,13 @@ class SolaceClientProfile(Plugin):
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
         max_clients = get_key_from_kwargs("max_clients", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Setting Max Clients", version=self.api.version)
-        self.api.x.client_profile.name = name
+        request = SolaceXMLBuilder("Setting Max Clients", version=self.api.version)
+        request.client_profile.name = name
         if version_equal_or_greater_than('soltr/6_2', self.api.version):
-            self.api.x.client_profile.vpn_name = vpn_name
-        self.api.x.client_profile.max_connections_per_client_username.value = max_clients
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+            request.client_profile.vpn_name = vpn_name
+        request.client_profile.max_connections_per_client_username.value = max_clients
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
 
     def allow_bridging(self, **kwargs):
         """Allow bridging
@@ -365,10 +398,10 @@ class SolaceClientProfile(Plugin):
         name = get_key_from_kwargs("name", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Setting Bridging", version=self.api.version)
-        self.api.x.client_profile.name = name
+        request = SolaceXMLBuilder("Setting Bridging", version=self.api.version)
+        request.client_profile.name = name
         if version_equal_or_greater_than('soltr/6_2', self.api.version):
-            self.api.x.client_profile.vpn_name = vpn_name
-        self.api.x.client_profile.allow_bridge_connections
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+            request.client_profile.vpn_name = vpn_name
+        request.client_profile.allow_bridge_connections
+        self.commands.enqueue(PluginResponse(str(request), **kwargs))
+        return PluginResponse(str(request), **kwargs)
@@ -1,9 +1,11 @@
 import logging
 
 import libsolace
-from libsolace.Decorators import only_if_not_exists, only_if_exists, primary, deprecation_warning
+from libsolace.Decorators import only_if_not_exists, only_if_exists, only_if_changed, primary, deprecation_warning
 from libsolace.SolaceCommandQueue import SolaceCommandQueue
-from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
+from libsolace.SolaceExistenceIndex import IndexedType
+from libsolace.SolaceSnapshot import SnapshotType, Setting, from_kwarg
+from libsolace.SolaceXMLTemplate import SolaceXMLTemplate
 from libsolace.plugin import Plugin, PluginResponse
 from libsolace.util import get_key_from_kwargs
 
@@ -11,6 +13,72 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
+def queue_template(*shape):
+    """ Template for a message-spool request on a queue """
+    return SolaceXMLTemplate(("message_spool.vpn_name", "vpn_name"), ("message_spool.queue.name", "queue_name"), *shape)
+
+
+SHOW_QUEUE = SolaceXMLTemplate(("show.queue.name", "queue_name"), ("show.queue.vpn_name", "vpn_name"))
+SHOW_QUEUE_DETAIL = SolaceXMLTemplate(("show.queue.name", "queue_name"), ("show.queue.vpn_name", "vpn_name"),
+                                      ("show.queue.detail", None))
+CREATE_QUEUE = SolaceXMLTemplate(("message_spool.vpn_name", "vpn_name"),
+                                 ("message_spool.create.queue.name", "queue_name"))
+SHUTDOWN_EGRESS = queue_template(("message_spool.queue.shutdown.egress", None))
+SHUTDOWN_INGRESS = queue_template(("message_spool.queue.shutdown.ingress", None))
+NON_EXCLUSIVE = queue_template(("message_spool.queue.access_type.non_exclusive", None))
+EXCLUSIVE = queue_template(("message_spool.queue.access_type.exclusive", None))
+OWNER = queue_template(("message_spool.queue.owner.owner", "owner"))
+MAX_BIND_COUNT = queue_template(("message_spool.queue.max_bind_count.value", "max_bind_count"))
+CONSUME = queue_template(("message_spool.queue.permission.consume", None))
+CONSUME_ALL = queue_template(("message_spool.queue.permission.all", None),
+                             ("message_spool.queue.permission.consume", None))
+PERMISSION_ALL = queue_template(("message_spool.queue.permission.all", None))
+PERMISSIONS = {
+    "consume": CONSUME_ALL,
+    "delete": queue_template(("message_spool.queue.permission.all", None),
+                             ("message_spool.queue.permission.delete", None)),
+    "modify-topic": queue_template(("message_spool.queue.permission.all", None),
+                                   ("message_spool.queue.permission.modify_topic", None)),
+    "read-only": queue_template(("message_spool.queue.permission.all", None),
+                                ("message_spool.queue.permission.read_only", None))
+}
+SPOOL_SIZE = queue_template(("message_spool.queue.max_spool_usage.size", "queue_size"))
+RETRIES = queue_template(("message_spool.queue.max_redelivery.value", "retries"))
+ENABLE = queue_template(("message_spool.queue.no.shutdown.full", None))
+REJECT_ON_DISCARD = queue_template(("message_spool.queue.reject_msg_to_sender_on_discard", None))
+
+QUEUE_INDEX = IndexedType("queue", SHOW_QUEUE, "rpc-reply.rpc.show.queue.queues.queue", "name", "queue_name")
+QUEUE_SNAPSHOT = SnapshotType("queue", SHOW_QUEUE_DETAIL, "rpc-reply.rpc.show.queue.queues.queue", "name", "queue_name")
+
+
+def shown_permission(value):
+    """ The permission as named by the `permission` kwarg, "Consume (1100)" is "Consume" """
+    return value.split(" ")[0]
+
+
+# the settings in the detailed show of a queue which the methods set, for reconcile mode. The access type, owner
+# and permission can only be changed while the queue is shut down, the others are changed live.
+EGRESS_DOWN_SETTING = Setting("info.egress-config-status", "Down")
+INGRESS_DOWN_SETTING = Setting("info.ingress-config-status", "Down")
+ACCESS_TYPE_SETTING = Setting("info.access-type", lambda kwargs: "exclusive" if kwargs["exclusive"] else "non-exclusive",
+                              shutdown=True)
+OWNER_SETTING = Setting("info.owner", lambda kwargs: kwargs["vpn_name"] if kwargs["owner_username"] == "%lsVPN"
+                        else kwargs["owner_username"], shutdown=True)
+MAX_BIND_COUNT_SETTING = Setting("info.max-bind-count", from_kwarg("max_bind_count"))
+CONSUME_SETTING = Setting("info.others-permission", lambda kwargs: "consume" if kwargs["consume"] == "all" else None,
+                          shown=shown_permission, shutdown=True)
+PERMISSION_SETTING = Setting("info.others-permission",
+                             lambda kwargs: kwargs["permission"] if kwargs["permission"] in PERMISSIONS else None,
+                             shown=shown_permission, shutdown=True)
+QUOTA_SETTING = Setting("info.quota", from_kwarg("queue_size"))
+RETRIES_SETTING = Setting("info.max-redelivery", lambda kwargs: kwargs.get("retries", 0))
+REJECT_ON_DISCARD_SETTING = Setting("info.reject-msg-to-sender-on-discard", "true")
+ENABLED_SETTINGS = [Setting("info.ingress-config-status", "Up"), Setting("info.egress-config-status", "Up")]
+# what provisioning a queue sets
+QUEUE_SETTINGS = [ACCESS_TYPE_SETTING, OWNER_SETTING, MAX_BIND_COUNT_SETTING, CONSUME_SETTING, QUOTA_SETTING,
+                  RETRIES_SETTING, REJECT_ON_DISCARD_SETTING] + ENABLED_SETTINGS
+
+
 @libsolace.plugin_registry.register
 class SolaceQueue(Plugin):
     """Manage a Solace Queue
@@ -83,8 +151,13 @@ class SolaceQueue(Plugin):
                 queueName = queue['name']
 
                 queue_config = self.get_queue_config(queue, **kwargs)
-                self.create_queue(queue_name=queueName, **kwargs)
-                self.shutdown_egress(queue_name=queueName, **kwargs)
+                if self.up_to_date(queueName, queue_config, **kwargs):
+                    logger.info("Queue %s is up to date, not changing it" % queueName)
+                    continue
+                # a new queue is created shut down, a existing one is only shut down for the settings which need it
+                created = self.create_queue(queue_name=queueName, **kwargs) is not None and not kwargs.get('force')
+                if not created and self.needs_shutdown(queueName, queue_config, **kwargs):
+                    self.shutdown_egress(queue_name=queueName, **kwargs)
                 if queue_config['exclusive'].lower() == "true":
                     self.exclusive(queue_name=queueName, exclusive=True, **kwargs)
                 else:
@@ -121,13 +194,83 @@ class SolaceQueue(Plugin):
         if get_key_from_kwargs("backupOnly", kwargs, default=False) is False:
             kwargs["primaryOnly"] = True
 
-        self.api.x = SolaceXMLBuilder("Querying Queue %s" % queue_name, version=self.api.version)
-        self.api.x.show.queue.name = queue_name
-        self.api.x.show.queue.vpn_name = vpn_name
-        if detail:
-            self.api.x.show.queue.detail
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return self.api.rpc(PluginResponse(str(self.api.x), **kwargs))
+        template = SHOW_QUEUE_DETAIL if detail else SHOW_QUEUE
+        xml = template.render(self.api.version, queue_name=queue_name, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return self.api.rpc(PluginResponse(xml, **kwargs))
+
+    def iter_queues(self, **kwargs):
+        """Fetch queues from the appliance one page at a time, see :func:`libsolace.SolaceAPI.SolaceAPI.rpc_iter`
+
+        :type queue_name: str
+        :type vpn_name: str
+        :type detail: bool
+        :param queue_name: Queue name or filter
+        :param vpn_name: name of the VPN
+        :param detail: return details
+        :rtype: generator
+        :returns: the queues as dicts
+
+        Examples:
+
+        >>> api = SolaceAPI("dev")
+        >>> [q['name'] for q in api.manage("SolaceQueue").iter_queues(queue_name='*', vpn_name='dev_testvpn')]
+        [u'testqueue1']
+
+        """
+        queue_name = get_key_from_kwargs("queue_name", kwargs)
+        vpn_name = get_key_from_kwargs("vpn_name", kwargs)
+        detail = get_key_from_kwargs("detail", kwargs, default=False)
+
+        template = SHOW_QUEUE_DETAIL if detail else SHOW_QUEUE
+        xml = template.render(self.api.version, queue_name=queue_name, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return self.api.rpc_iter(PluginResponse(xml, **kwargs), 'rpc-reply.rpc.show.queue.queues.queue')
+
+    def up_to_date(self, queue_name, queue_config, **kwargs):
+        """In reconcile mode, checks if the queue exists on the primary with its config and enabled, see
+        :class:`libsolace.SolaceSnapshot.SolaceSnapshot`. Always False without reconcile mode.
+
+        :param queue_name: the queue name
+        :param queue_config: the queue's config, see :func:`get_queue_config`
+        :param vpn_name: the name of the vpn
+        :type queue_name: str
+        :type queue_config: dict
+        :type vpn_name: str
+        :rtype: bool
+        """
+        snapshot = getattr(self.api, "snapshot", None)
+        if snapshot is None:
+            return False
+        return snapshot.unchanged(QUEUE_SNAPSHOT, QUEUE_SETTINGS, **self.__desired(queue_name, queue_config, **kwargs))
+
+    def needs_shutdown(self, queue_name, queue_config, **kwargs):
+        """Checks if applying the queue's config to the existing queue changes a setting which can only be changed
+        while the queue is shut down. In reconcile mode only the settings which differ from the snapshot count,
+        without it the queue's current settings are unknown and it is always True.
+
+        :param queue_name: the queue name
+        :param queue_config: the queue's config, see :func:`get_queue_config`
+        :param vpn_name: the name of the vpn
+        :type queue_name: str
+        :type queue_config: dict
+        :type vpn_name: str
+        :rtype: bool
+        """
+        snapshot = getattr(self.api, "snapshot", None)
+        if snapshot is None:
+            return True
+        return snapshot.requires_shutdown(QUEUE_SNAPSHOT, QUEUE_SETTINGS,
+                                          **self.__desired(queue_name, queue_config, **kwargs))
+
+    @staticmethod
+    def __desired(queue_name, queue_config, **kwargs):
+        """ The kwargs of the methods provisioning the queue, to compare with the snapshot """
+        return dict(kwargs, queue_name=queue_name, primaryOnly=True,
+                    exclusive=queue_config['exclusive'].lower() == "true",
+                    owner_username=queue_config['owner'], max_bind_count=queue_config['max_bind_count'],
+                    consume=queue_config['consume'], queue_size=queue_config['queue_size'],
+                    retries=queue_config['retries'])
 
     def get_queue_config(self, queue, **kwargs):
         """ Returns a queue config for the queue and overrides where neccessary
@@ -186,7 +329,7 @@ class SolaceQueue(Plugin):
         return final_config
 
     # perform the if_exists on the primary only
-    @only_if_not_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+    @only_if_not_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     @primary()
     def create_queue(self, **kwargs):
         """Create a queue / endpoint only if it doesnt exist.
@@ -209,17 +352,18 @@ class SolaceQueue(Plugin):
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
         # Create a queue
-        self.api.x = SolaceXMLBuilder("Creating Queue %s in vpn: %s" % (queue_name, vpn_name), version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.create.queue.name = queue_name
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        self.exists = True
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = CREATE_QUEUE.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        index = getattr(self.api, "index", None)
+        if index is not None:
+            index.add(QUEUE_INDEX, **kwargs)
+        return PluginResponse(xml, **kwargs)
 
     # perform the if_exists on the primary only
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     # @only_on_shutdown('queue')
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [EGRESS_DOWN_SETTING])
     def shutdown_egress(self, **kwargs):
         """Shutdown egress for a queue
 
@@ -252,19 +396,17 @@ class SolaceQueue(Plugin):
 
         if (shutdown_on_apply == 'b') or (shutdown_on_apply == 'q') or (shutdown_on_apply is True):
             # Lets only shutdown the egress of the queue
-            self.api.x = SolaceXMLBuilder("Shutting down egress for queue:%s" % queue_name, version=self.api.version)
-            self.api.x.message_spool.vpn_name = vpn_name
-            self.api.x.message_spool.queue.name = queue_name
-            self.api.x.message_spool.queue.shutdown.egress
-            self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-            return PluginResponse(str(self.api.x), **kwargs)
+            xml = SHUTDOWN_EGRESS.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name)
+            self.commands.enqueue(PluginResponse(xml, **kwargs))
+            return PluginResponse(xml, **kwargs)
         else:
             logger.warning("Not disabling Queue, commands could fail since shutdown_on_apply = %s" % shutdown_on_apply)
 
     # perform the if_exists on the primary only
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     # @only_on_shutdown('queue')
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [INGRESS_DOWN_SETTING])
     def shutdown_ingress(self, **kwargs):
         """Shutdown the ingress of a queue
 
@@ -298,19 +440,17 @@ class SolaceQueue(Plugin):
 
         if (shutdown_on_apply == 'b') or (shutdown_on_apply == 'q') or (shutdown_on_apply is True):
             # Lets only shutdown the egress of the queue
-            self.api.x = SolaceXMLBuilder("Shutting down egress for queue:%s" % queue_name, version=self.api.version)
-            self.api.x.message_spool.vpn_name = vpn_name
-            self.api.x.message_spool.queue.name = queue_name
-            self.api.x.message_spool.queue.shutdown.ingress
-            self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-            return PluginResponse(str(self.api.x), **kwargs)
+            xml = SHUTDOWN_INGRESS.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name)
+            self.commands.enqueue(PluginResponse(xml, **kwargs))
+            return PluginResponse(xml, **kwargs)
         else:
             logger.warning("Not disabling Queue, commands could fail since shutdown_on_apply = %s" % shutdown_on_apply)
 
     # perform the if_exists on the primary only
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     # @only_on_shutdown('queue')
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [ACCESS_TYPE_SETTING])
     def exclusive(self, **kwargs):
         """Set queue exclusivity
 
@@ -339,23 +479,15 @@ class SolaceQueue(Plugin):
         exclusive = get_key_from_kwargs("exclusive", kwargs)
 
         # Default to NON Exclusive queue
-        if not exclusive:
-            self.api.x = SolaceXMLBuilder("Set Queue %s to Non Exclusive " % queue_name, version=self.api.version)
-            self.api.x.message_spool.vpn_name = vpn_name
-            self.api.x.message_spool.queue.name = queue_name
-            self.api.x.message_spool.queue.access_type.non_exclusive
-        else:
-            # Non Exclusive queue
-            self.api.x = SolaceXMLBuilder("Set Queue %s to Exclusive " % queue_name, version=self.api.version)
-            self.api.x.message_spool.vpn_name = vpn_name
-            self.api.x.message_spool.queue.name = queue_name
-            self.api.x.message_spool.queue.access_type.exclusive
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
-
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+        template = EXCLUSIVE if exclusive else NON_EXCLUSIVE
+        xml = template.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
+
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     # @only_on_shutdown('queue')
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [OWNER_SETTING])
     def owner(self, **kwargs):
         """ Set the owner
 
@@ -389,15 +521,13 @@ class SolaceQueue(Plugin):
             logger.info("Owner being set  to VPN itself: %s" % owner)
 
         # Queue Owner
-        self.api.x = SolaceXMLBuilder("Set Queue %s owner to %s" % (queue_name, vpn_name), version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.queue.name = queue_name
-        self.api.x.message_spool.queue.owner.owner = owner
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
-
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+        xml = OWNER.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name, owner=owner)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
+
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [MAX_BIND_COUNT_SETTING])
     def max_bind_count(self, **kwargs):
         """Limit the max bind count
 
@@ -422,17 +552,16 @@ class SolaceQueue(Plugin):
         queue_name = get_key_from_kwargs("queue_name", kwargs)
         max_bind_count = get_key_from_kwargs("max_bind_count", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Settings Queue %s max bind count to %s" % (queue_name, str(max_bind_count)),
-                                      version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.queue.name = queue_name
-        self.api.x.message_spool.queue.max_bind_count.value = max_bind_count
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = MAX_BIND_COUNT.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name,
+                                    max_bind_count=max_bind_count)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, backupOnly=False)
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, backupOnly=False,
+                    index=QUEUE_INDEX)
     # @only_on_shutdown('queue')
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [CONSUME_SETTING])
     @deprecation_warning("Please implement the use of the 'permission' method instead of relying on this")
     def consume(self, **kwargs):
         """Sets consume permission. add `consume` kwarg to allow non-owner users to consume.
@@ -462,18 +591,16 @@ class SolaceQueue(Plugin):
         consume = get_key_from_kwargs("consume", kwargs)
 
         # Open Access
-        self.api.x = SolaceXMLBuilder("Settings Queue %s Permission to Consume" % queue_name, version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.queue.name = queue_name
-        if consume == "all":
-            self.api.x.message_spool.queue.permission.all
-        self.api.x.message_spool.queue.permission.consume
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
-
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, backupOnly=False)
+        template = CONSUME_ALL if consume == "all" else CONSUME
+        xml = template.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
+
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, backupOnly=False,
+                    index=QUEUE_INDEX)
     # @only_on_shutdown('queue')
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [PERMISSION_SETTING])
     def permission(self, **kwargs):
         """Sets permission on a queue
 
@@ -500,24 +627,14 @@ class SolaceQueue(Plugin):
         permission = get_key_from_kwargs("permission", kwargs)
 
         # Open Access
-        self.api.x = SolaceXMLBuilder("Settings Queue %s Permission to %s" % (queue_name, permission),
-                                      version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.queue.name = queue_name
-        self.api.x.message_spool.queue.permission.all
-        if permission == "consume":
-            self.api.x.message_spool.queue.permission.consume
-        elif permission == "delete":
-            self.api.x.message_spool.queue.permission.delete
-        elif permission == "modify-topic":
-            self.api.x.message_spool.queue.permission.modify_topic
-        elif permission == "read-only":
-            self.api.x.message_spool.queue.permission.read_only
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
-
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+        template = PERMISSIONS.get(permission, PERMISSION_ALL)
+        xml = template.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
+
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [QUOTA_SETTING])
     def spool_size(self, **kwargs):
         """Set the spool size
 
@@ -543,16 +660,13 @@ class SolaceQueue(Plugin):
         queue_size = get_key_from_kwargs("queue_size", kwargs)
 
         # Configure Queue Spool Usage
-        self.api.x = SolaceXMLBuilder("Set Queue %s spool size: %s" % (queue_name, queue_size),
-                                      version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.queue.name = queue_name
-        self.api.x.message_spool.queue.max_spool_usage.size = queue_size
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
-
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+        xml = SPOOL_SIZE.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name, queue_size=queue_size)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
+
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [RETRIES_SETTING])
     def retries(self, **kwargs):
         """Delivery retries before failing the message
 
@@ -577,16 +691,13 @@ class SolaceQueue(Plugin):
         queue_name = get_key_from_kwargs("queue_name", kwargs)
         retries = get_key_from_kwargs("retries", kwargs, default=0)
 
-        self.api.x = SolaceXMLBuilder("Tuning max-redelivery retries for %s to %s" % (queue_name, retries),
-                                      version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.queue.name = queue_name
-        self.api.x.message_spool.queue.max_redelivery.value = retries
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = RETRIES.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name, retries=retries)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, ENABLED_SETTINGS)
     def enable(self, **kwargs):
         """Enable a the queue
 
@@ -609,15 +720,13 @@ class SolaceQueue(Plugin):
         queue_name = get_key_from_kwargs("queue_name", kwargs)
 
         # Enable the Queue
-        self.api.x = SolaceXMLBuilder("Enabling Queue %s" % queue_name, version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.queue.name = queue_name
-        self.api.x.message_spool.queue.no.shutdown.full
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
-
-    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True)
+        xml = ENABLE.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
+
+    @only_if_exists('get', 'rpc-reply.rpc.show.queue.queues.queue.info', primaryOnly=True, index=QUEUE_INDEX)
     @primary()
+    @only_if_changed(QUEUE_SNAPSHOT, [REJECT_ON_DISCARD_SETTING])
     def reject_on_discard(self, **kwargs):
         """ Reject to sender on discard
 
@@ -639,9 +748,6 @@ class SolaceQueue(Plugin):
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
         queue_name = get_key_from_kwargs("queue_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Setting Queue to Reject Drops", version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.queue.name = queue_name
-        self.api.x.message_spool.queue.reject_msg_to_sender_on_discard
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = REJECT_ON_DISCARD.render(self.api.version, vpn_name=vpn_name, queue_name=queue_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
@@ -4,7 +4,9 @@ import libsolace
 from libsolace.Decorators import before, only_if_not_exists
 from libsolace.Exceptions import *
 from libsolace.SolaceCommandQueue import SolaceCommandQueue
+from libsolace.SolaceExistenceIndex import IndexedType
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
+from libsolace.SolaceXMLTemplate import SolaceXMLTemplate
 from libsolace.plugin import Plugin, PluginResponse
 from libsolace.util import get_key_from_kwargs
 
@@ -12,6 +14,33 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
+def user_template(*shape):
+    """ Template for a client-username request """
+    return SolaceXMLTemplate(("client_username.username", "username"), ("client_username.vpn_name", "vpn_name"), *shape)
+
+
+# also used by SolaceUsers
+SHOW_USER = SolaceXMLTemplate(("show.client_username.name", "username"), ("show.client_username.vpn_name", "vpn_name"),
+                              ("show.client_username.detail", None))
+CREATE_USER = SolaceXMLTemplate(("create.client_username.username", "username"),
+                                ("create.client_username.vpn_name", "vpn_name"))
+DELETE_USER = SolaceXMLTemplate(("no.client_username.username", "username"),
+                                ("no.client_username.vpn_name", "vpn_name"))
+SHUTDOWN_USER = user_template(("client_username.shutdown", None))
+CLIENT_PROFILE = user_template(("client_username.client_profile.name", "client_profile"))
+ACL_PROFILE = user_template(("client_username.acl_profile.name", "acl_profile"))
+NO_GUARANTEED_ENDPOINT = user_template(("client_username.no.guaranteed_endpoint_permission_override", None))
+NO_SUBSCRIPTION_MANAGER = user_template(("client_username.no.subscription_manager", None))
+PASSWORD = user_template(("client_username.password.password", "password"))
+ENABLE_USER = user_template(("client_username.no.shutdown", None))
+LIST_USERS = SolaceXMLTemplate(("show.client_username.name", "client_username"),
+                               ("show.client_username.vpn_name", "vpn_name"))
+
+USER_INDEX = IndexedType("client-username", LIST_USERS,
+                         "rpc-reply.rpc.show.client-username.client-usernames.client-username", "client-username",
+                         "client_username")
+
+
 @libsolace.plugin_registry.register
 class SolaceUser(Plugin):
     """Manage a Solace Client User
@@ -165,17 +194,14 @@ class SolaceUser(Plugin):
 
         logger.info("Getting user: %s vpn: %s" % (client_username, vpn_name))
 
-        self.api.x = SolaceXMLBuilder("Getting user %s" % client_username, version=self.api.version)
-        self.api.x.show.client_username.name = client_username
-        self.api.x.show.client_username.vpn_name = vpn_name
-        self.api.x.show.client_username.detail
+        xml = SHOW_USER.render(self.api.version, username=client_username, vpn_name=vpn_name)
 
         # enqueue to validate
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
         self.commands.commands.pop()
 
         # do the request now
-        response = self.api.rpc(PluginResponse(str(self.api.x), **kwargs))
+        response = self.api.rpc(PluginResponse(xml, **kwargs))
         logger.debug("SRH: %s" % response[0])
 
         if response[0]['rpc-reply']['rpc']['show']['client-username']['client-usernames'] == 'None':
@@ -209,11 +235,12 @@ class SolaceUser(Plugin):
         client_username = get_key_from_kwargs("client_username", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Delete User %s" % client_username, version=self.api.version)
-        self.api.x.no.client_username.username = client_username
-        self.api.x.no.client_username.vpn_name = vpn_name
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = DELETE_USER.render(self.api.version, username=client_username, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        index = getattr(self.api, "index", None)
+        if index is not None:
+            index.discard(USER_INDEX, **kwargs)
+        return PluginResponse(xml, **kwargs)
 
     def check_client_profile_exists(self, **kwargs):
         """
@@ -236,10 +263,10 @@ class SolaceUser(Plugin):
         client_profile = get_key_from_kwargs("client_profile", kwargs)
 
         logger.info('Checking if client_profile is present on devices')
-        self.api.x = SolaceXMLBuilder("Checking client_profile %s is present on device" % client_profile,
+        request = SolaceXMLBuilder("Checking client_profile %s is present on device" % client_profile,
                                       version=self.api.version)
-        self.api.x.show.client_profile.name = client_profile
-        response = self.api.rpc(str(self.api.x), allowfail=False)
+        request.show.client_profile.name = client_profile
+        response = self.api.rpc(str(request), allowfail=False)
         for v in response:
             if v['rpc-reply']['rpc']['show']['client-profile'] == None:
                 logger.warning('client_profile: %s missing from appliance' % client_profile)
@@ -265,10 +292,10 @@ class SolaceUser(Plugin):
         acl_profile = get_key_from_kwargs('acl_profile', kwargs)
 
         logger.info('Checking if acl_profile is present on devices')
-        self.api.x = SolaceXMLBuilder("Checking acl_profile %s is present on device" % acl_profile,
+        request = SolaceXMLBuilder("Checking acl_profile %s is present on device" % acl_profile,
                                       version=self.api.version)
-        self.api.x.show.acl_profile.name = acl_profile
-        response = self.api.rpc(str(self.api.x), allowfail=False)
+        request.show.acl_profile.name = acl_profile
+        response = self.api.rpc(str(request), allowfail=False)
         # logger.info(response)
         for v in response:
             if v['rpc-reply']['rpc']['show']['acl-profile']['acl-profiles'] == None:
@@ -276,7 +303,8 @@ class SolaceUser(Plugin):
                 return False
         return True
 
-    @only_if_not_exists('get', 'rpc-reply.rpc.show.client-username.client-usernames.client-username')
+    @only_if_not_exists('get', 'rpc-reply.rpc.show.client-username.client-usernames.client-username',
+                        index=USER_INDEX)
     def create_user(self, **kwargs):
         """
         Create client-user
@@ -299,11 +327,12 @@ class SolaceUser(Plugin):
         client_username = get_key_from_kwargs('client_username', kwargs)
         vpn_name = get_key_from_kwargs('vpn_name', kwargs)
 
-        self.api.x = SolaceXMLBuilder("New User %s" % client_username, version=self.api.version)
-        self.api.x.create.client_username.username = client_username
-        self.api.x.create.client_username.vpn_name = vpn_name
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = CREATE_USER.render(self.api.version, username=client_username, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        index = getattr(self.api, "index", None)
+        if index is not None:
+            index.add(USER_INDEX, **kwargs)
+        return PluginResponse(xml, **kwargs)
 
     def shutdown(self, **kwargs):
         """
@@ -332,12 +361,9 @@ class SolaceUser(Plugin):
 
         # b = both, u = user, True = forced
         if (shutdown_on_apply == 'b') or (shutdown_on_apply == 'u') or (shutdown_on_apply == True):
-            self.api.x = SolaceXMLBuilder("Disabling User %s" % client_username, version=self.api.version)
-            self.api.x.client_username.username = client_username
-            self.api.x.client_username.vpn_name = vpn_name
-            self.api.x.client_username.shutdown
-            self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-            return PluginResponse(str(self.api.x), **kwargs)
+            xml = SHUTDOWN_USER.render(self.api.version, username=client_username, vpn_name=vpn_name)
+            self.commands.enqueue(PluginResponse(xml, **kwargs))
+            return PluginResponse(xml, **kwargs)
         else:
             logger.warning(
                 "Not disabling User, commands could fail since shutdown_on_apply = %s" % shutdown_on_apply)
@@ -374,13 +400,10 @@ class SolaceUser(Plugin):
         client_profile = get_key_from_kwargs('client_profile', kwargs)
 
         # Client Profile
-        self.api.x = SolaceXMLBuilder("Setting User %s client profile to %s" % (client_username, client_profile),
-                                      version=self.api.version)
-        self.api.x.client_username.username = client_username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.client_profile.name = client_profile
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = CLIENT_PROFILE.render(self.api.version, username=client_username, vpn_name=vpn_name,
+                                    client_profile=client_profile)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
     # only_on_shutdown('user')
     def set_acl_profile(self, **kwargs):
@@ -412,13 +435,9 @@ class SolaceUser(Plugin):
         acl_profile = get_key_from_kwargs('acl_profile', kwargs)
 
         # Set client user profile
-        self.api.x = SolaceXMLBuilder("Set User %s ACL Profile to %s" % (client_username, vpn_name),
-                                      version=self.api.version)
-        self.api.x.client_username.username = client_username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.acl_profile.name = acl_profile
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = ACL_PROFILE.render(self.api.version, username=client_username, vpn_name=vpn_name, acl_profile=acl_profile)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
     def no_guarenteed_endpoint(self, **kwargs):
         """
@@ -443,13 +462,9 @@ class SolaceUser(Plugin):
         vpn_name = get_key_from_kwargs('vpn_name', kwargs)
 
         # No Guarenteed Endpoint
-        self.api.x = SolaceXMLBuilder("Default User %s guaranteed endpoint override" % client_username,
-                                      version=self.api.version)
-        self.api.x.client_username.username = client_username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.no.guaranteed_endpoint_permission_override
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = NO_GUARANTEED_ENDPOINT.render(self.api.version, username=client_username, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
     def no_subscription_manager(self, **kwargs):
         """
@@ -474,13 +489,9 @@ class SolaceUser(Plugin):
         vpn_name = get_key_from_kwargs('vpn_name', kwargs)
 
         # No Subscription Managemer
-        self.api.x = SolaceXMLBuilder("Default User %s subscription manager" % client_username,
-                                      version=self.api.version)
-        self.api.x.client_username.username = client_username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.no.subscription_manager
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = NO_SUBSCRIPTION_MANAGER.render(self.api.version, username=client_username, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
     def set_password(self, **kwargs):
         """
@@ -501,12 +512,9 @@ class SolaceUser(Plugin):
         password = get_key_from_kwargs('password', kwargs)
 
         # Set User Password
-        self.api.x = SolaceXMLBuilder("Set User %s password" % client_username, version=self.api.version)
-        self.api.x.client_username.username = client_username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.password.password = password
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = PASSWORD.render(self.api.version, username=client_username, vpn_name=vpn_name, password=password)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
     def no_shutdown(self, **kwargs):
         """
@@ -523,9 +531,6 @@ class SolaceUser(Plugin):
         vpn_name = kwargs.get('vpn_name')
 
         # Enable User
-        self.api.x = SolaceXMLBuilder("Enable User %s" % client_username, version=self.api.version)
-        self.api.x.client_username.username = client_username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.no.shutdown
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = ENABLE_USER.render(self.api.version, username=client_username, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
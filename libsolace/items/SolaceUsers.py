@@ -1,15 +1,36 @@
 import logging
 
 import libsolace
+from libsolace.Decorators import only_if_changed
 from libsolace.Exceptions import *
 from libsolace.SolaceCommandQueue import SolaceCommandQueue
+from libsolace.SolaceSnapshot import SnapshotType, Setting, from_kwarg
 from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
+from libsolace.items.SolaceUser import SHOW_USER, CREATE_USER, SHUTDOWN_USER, CLIENT_PROFILE, ACL_PROFILE, \
+    NO_GUARANTEED_ENDPOINT, NO_SUBSCRIPTION_MANAGER, PASSWORD, ENABLE_USER
 from libsolace.plugin import Plugin, PluginResponse
 from libsolace.util import get_key_from_kwargs
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+USER_SNAPSHOT = SnapshotType("client-username", SHOW_USER,
+                             "rpc-reply.rpc.show.client-username.client-usernames.client-username", "client-username",
+                             "username")
+
+# the settings in the detailed show of a client-username which the methods set, for reconcile mode. The password is
+# not shown, so it is only set on users which have none. The profiles can only be changed while the user is shut down.
+DISABLED_SETTING = Setting("enabled", "false")
+CLIENT_PROFILE_SETTING = Setting("profile", from_kwarg("client_profile"), shutdown=True)
+ACL_PROFILE_SETTING = Setting("acl-profile", from_kwarg("acl_profile"), shutdown=True)
+NO_GUARANTEED_ENDPOINT_SETTING = Setting("guaranteed-endpoint-permission-override", "false")
+NO_SUBSCRIPTION_MANAGER_SETTING = Setting("subscription-manager", "false")
+PASSWORD_SETTING = Setting("password-configured", "true")
+ENABLED_SETTING = Setting("enabled", "true")
+# what provisioning a user sets
+USER_SETTINGS = [CLIENT_PROFILE_SETTING, ACL_PROFILE_SETTING, NO_GUARANTEED_ENDPOINT_SETTING,
+                 NO_SUBSCRIPTION_MANAGER_SETTING, PASSWORD_SETTING, ENABLED_SETTING]
+
 
 @libsolace.plugin_registry.register
 class SolaceUsers(Plugin):
@@ -84,19 +105,27 @@ class SolaceUsers(Plugin):
             if self.options == None:
                 logger.warning(
                     "No options passed, assuming you meant 'add', please update usage of this class to pass a OptionParser instance")
+                snapshot = getattr(self.api, "snapshot", None)
                 for user in self.users:
                     user_kwargs = dict(kwargs)
                     user_kwargs['username'] = user['username']
                     user_kwargs['password'] = user['password']
+                    if snapshot is not None and snapshot.unchanged(USER_SNAPSHOT, USER_SETTINGS, **user_kwargs):
+                        logger.info("User %s is up to date, not changing it" % user_kwargs['username'])
+                        continue
                     try:
-                        # Check if user already exists, if not then shutdown immediately after creating the user
-                        self.get(**user_kwargs).reply.show.client_username.client_usernames.client_username
+                        # Check if user already exists, a new user is created shut down
+                        if snapshot is None:
+                            self.get(**user_kwargs).reply.show.client_username.client_usernames.client_username
+                        elif not snapshot.unchanged(USER_SNAPSHOT, [], **user_kwargs):
+                            raise MissingClientUser("No such user %s" % user_kwargs['username'])
+                        exists = True
                     except (AttributeError, KeyError, MissingClientUser):
-                        logger.info(
-                            "User %s doesn't exist, using shutdown_on_apply to True for user" % user_kwargs['username'])
-                        user_kwargs['shutdown_on_apply'] = True
+                        logger.info("User %s doesn't exist, it is set up before it is enabled" % user_kwargs['username'])
+                        exists = False
                     self.create_user(**user_kwargs)
-                    self.disable_user(**user_kwargs)
+                    if exists and self.needs_shutdown(**user_kwargs):
+                        self.disable_user(**user_kwargs)
                     self.set_client_profile(**user_kwargs)
                     self.set_acl_profile(**user_kwargs)
                     self.no_guarenteed_endpoint(**user_kwargs)
@@ -122,18 +151,32 @@ class SolaceUsers(Plugin):
         username = get_key_from_kwargs("username", kwargs)
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
-        self.api.x = SolaceXMLBuilder("Getting user %s" % username, version=self.api.version)
-        self.api.x.show.client_username.name = username
-        self.api.x.show.client_username.vpn_name = vpn_name
-        self.api.x.show.client_username.detail
+        xml = SHOW_USER.render(self.api.version, username=username, vpn_name=vpn_name)
 
-        response = self.api.rpc(str(self.api.x), **kwargs)
+        response = self.api.rpc(xml, **kwargs)
         logger.info(response)
         if response.reply.show.client_username.client_usernames == 'None':
             raise MissingClientUser("No such user %s" % username)
         else:
             return response
 
+    def needs_shutdown(self, **kwargs):
+        """
+        Checks if provisioning the existing user changes a setting which can only be changed while the user is shut
+        down. In reconcile mode only the settings which differ from the snapshot count, without it the user's current
+        settings are unknown and it is always True.
+
+        :param username: the username
+        :type username: str
+        :param vpn_name: the vpn name
+        :type vpn_name: str
+        :rtype: bool
+        """
+        snapshot = getattr(self.api, "snapshot", None)
+        if snapshot is None:
+            return True
+        return snapshot.requires_shutdown(USER_SNAPSHOT, USER_SETTINGS, **kwargs)
+
     def check_client_profile_exists(self, **kwargs):
         """
         Checks if a client_profile exists on the appliance for linking.
@@ -156,10 +199,10 @@ class SolaceUsers(Plugin):
         client_profile = get_key_from_kwargs('client_profile', kwargs)
 
         logger.info('Checking if client_profile is present on devices')
-        self.api.x = SolaceXMLBuilder("Checking client_profile %s is present on device" % client_profile,
+        request = SolaceXMLBuilder("Checking client_profile %s is present on device" % client_profile,
                                       version=self.api.version)
-        self.api.x.show.client_profile.name = client_profile
-        response = self.api.rpc(str(self.api.x), allowfail=False)
+        request.show.client_profile.name = client_profile
+        response = self.api.rpc(str(request), allowfail=False)
         for v in response:
             if v['rpc-reply']['execute-result']['@code'] == 'fail':
                 logger.warning('client_profile: %s missing from appliance' % client_profile)
@@ -178,10 +221,10 @@ class SolaceUsers(Plugin):
         acl_profile = get_key_from_kwargs('acl_profile', kwargs)
 
         logger.info('Checking if acl_profile is present on devices')
-        self.api.x = SolaceXMLBuilder("Checking acl_profile %s is present on device" % acl_profile,
+        request = SolaceXMLBuilder("Checking acl_profile %s is present on device" % acl_profile,
                                       version=self.api.version)
-        self.api.x.show.acl_profile.name = kwargs.get('acl_profile')
-        response = self.api.rpc(str(self.api.x), allowfail=False)
+        request.show.acl_profile.name = kwargs.get('acl_profile')
+        response = self.api.rpc(str(request), allowfail=False)
         for v in response:
             if v['rpc-reply']['execute-result']['@code'] == 'fail':
                 logger.warning('acl_profile: %s missing from appliance' % acl_profile)
@@ -189,6 +232,7 @@ class SolaceUsers(Plugin):
                 return False
         return True
 
+    @only_if_changed(USER_SNAPSHOT)
     def create_user(self, **kwargs):
         """
         Create the user
@@ -204,13 +248,12 @@ class SolaceUsers(Plugin):
         username = get_key_from_kwargs('username', kwargs)
         vpn_name = get_key_from_kwargs('vpn_name', kwargs)
 
-        self.api.x = SolaceXMLBuilder("Creating User %s" % username, version=self.api.version)
-        self.api.x.create.client_username.username = username
-        self.api.x.create.client_username.vpn_name = vpn_name
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = CREATE_USER.render(self.api.version, username=username, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
     # @only_on_shutdown('user')
+    @only_if_changed(USER_SNAPSHOT, [DISABLED_SETTING])
     def disable_user(self, **kwargs):
         """
         Disable the user ( suspending pub/sub )
@@ -232,18 +275,16 @@ class SolaceUsers(Plugin):
 
         if (shutdown_on_apply == 'b') or (shutdown_on_apply == 'u') or (shutdown_on_apply == True):
             # Disable / Shutdown User ( else we cant change profiles )
-            self.api.x = SolaceXMLBuilder("Disabling User %s" % username, version=self.api.version)
-            self.api.x.client_username.username = username
-            self.api.x.client_username.vpn_name = vpn_name
-            self.api.x.client_username.shutdown
-            self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-            return PluginResponse(str(self.api.x), **kwargs)
+            xml = SHUTDOWN_USER.render(self.api.version, username=username, vpn_name=vpn_name)
+            self.commands.enqueue(PluginResponse(xml, **kwargs))
+            return PluginResponse(xml, **kwargs)
         else:
             logger.warning(
                 "Not disabling User, commands could fail since shutdown_on_apply = %s" % self.shutdown_on_apply)
             return None
 
     # @only_on_shutdown('user')
+    @only_if_changed(USER_SNAPSHOT, [CLIENT_PROFILE_SETTING])
     def set_client_profile(self, **kwargs):
         """
         set client profile
@@ -263,15 +304,13 @@ class SolaceUsers(Plugin):
         client_profile = get_key_from_kwargs('client_profile', kwargs)
 
         # Client Profile
-        self.api.x = SolaceXMLBuilder("Setting User %s client profile to %s" % (username, client_profile),
-                                      version=self.api.version)
-        self.api.x.client_username.username = username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.client_profile.name = client_profile
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = CLIENT_PROFILE.render(self.api.version, username=username, vpn_name=vpn_name,
+                                    client_profile=client_profile)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
     # @only_on_shutdown('user')
+    @only_if_changed(USER_SNAPSHOT, [ACL_PROFILE_SETTING])
     def set_acl_profile(self, **kwargs):
         """
         set acl profile
@@ -291,13 +330,11 @@ class SolaceUsers(Plugin):
         acl_profile = get_key_from_kwargs('acl_profile', kwargs)
 
         # Set client user profile
-        self.api.x = SolaceXMLBuilder("Set User %s ACL Profile to %s" % (username, vpn_name), version=self.api.version)
-        self.api.x.client_username.username = username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.acl_profile.name = acl_profile
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = ACL_PROFILE.render(self.api.version, username=username, vpn_name=vpn_name, acl_profile=acl_profile)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
+    @only_if_changed(USER_SNAPSHOT, [NO_GUARANTEED_ENDPOINT_SETTING])
     def no_guarenteed_endpoint(self, **kwargs):
         """
         no guaranteed endpoint
@@ -314,14 +351,11 @@ class SolaceUsers(Plugin):
         vpn_name = get_key_from_kwargs('vpn_name', kwargs)
 
         # No Guarenteed Endpoint
-        self.api.x = SolaceXMLBuilder("Default User %s guaranteed endpoint override" % username,
-                                      version=self.api.version)
-        self.api.x.client_username.username = username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.no.guaranteed_endpoint_permission_override
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = NO_GUARANTEED_ENDPOINT.render(self.api.version, username=username, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
+    @only_if_changed(USER_SNAPSHOT, [NO_SUBSCRIPTION_MANAGER_SETTING])
     def no_subscription_manager(self, **kwargs):
         """
         no subscription manager
@@ -338,13 +372,11 @@ class SolaceUsers(Plugin):
         vpn_name = get_key_from_kwargs('vpn_name', kwargs)
 
         # No Subscription Managemer
-        self.api.x = SolaceXMLBuilder("Default User %s subscription manager" % username, version=self.api.version)
-        self.api.x.client_username.username = username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.no.subscription_manager
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = NO_SUBSCRIPTION_MANAGER.render(self.api.version, username=username, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
+    @only_if_changed(USER_SNAPSHOT, [PASSWORD_SETTING])
     def set_password(self, **kwargs):
         """
         Set the user password
@@ -364,13 +396,11 @@ class SolaceUsers(Plugin):
         password = get_key_from_kwargs('password', kwargs)
 
         # Set User Password
-        self.api.x = SolaceXMLBuilder("Set User %s password" % username, version=self.api.version)
-        self.api.x.client_username.username = username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.password.password = password
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = PASSWORD.render(self.api.version, username=username, vpn_name=vpn_name, password=password)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
 
+    @only_if_changed(USER_SNAPSHOT, [ENABLED_SETTING])
     def no_shutdown_user(self, **kwargs):
         """
         Enable the user
@@ -387,9 +417,6 @@ class SolaceUsers(Plugin):
         vpn_name = get_key_from_kwargs('vpn_name', kwargs)
 
         # Enable User
-        self.api.x = SolaceXMLBuilder("Enable User %s" % username, version=self.api.version)
-        self.api.x.client_username.username = username
-        self.api.x.client_username.vpn_name = vpn_name
-        self.api.x.client_username.no.shutdown
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        return PluginResponse(str(self.api.x), **kwargs)
+        xml = ENABLE_USER.render(self.api.version, username=username, vpn_name=vpn_name)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
+        return PluginResponse(xml, **kwargs)
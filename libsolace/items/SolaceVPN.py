@@ -1,15 +1,59 @@
 import logging
 
 import libsolace
-from libsolace.Decorators import only_if_not_exists, only_if_exists
+from libsolace.Decorators import only_if_not_exists, only_if_exists, only_if_changed
 from libsolace.SolaceCommandQueue import SolaceCommandQueue
-from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
+from libsolace.SolaceExistenceIndex import IndexedType
+from libsolace.SolaceSnapshot import SnapshotType, Setting
+from libsolace.SolaceXMLTemplate import SolaceXMLTemplate
 from libsolace.plugin import Plugin, PluginResponse
 from libsolace.util import get_key_from_kwargs
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+# versions which nest the client authentication under "basic"
+BASIC_AUTH_VERSIONS = ["soltr/7_1_1", "soltr/7_0", "soltr/6_2"]
+
+SHOW_VPN = SolaceXMLTemplate(("show.message_vpn.vpn_name", "vpn_name"))
+SHOW_VPN_DETAIL = SolaceXMLTemplate(("show.message_vpn.vpn_name", "vpn_name"), ("show.message_vpn.detail", None))
+SHOW_VPN_SPOOL = SolaceXMLTemplate(("show.message_spool.vpn_name", "vpn_name"))
+CREATE_VPN = SolaceXMLTemplate(("create.message_vpn.vpn_name", "vpn_name"))
+CLEAR_RADIUS = SolaceXMLTemplate(("message_vpn.vpn_name", "vpn_name"),
+                                 ("message_vpn.authentication.user_class.client", None),
+                                 ("message_vpn.authentication.user_class.radius_domain.radius_domain", None))
+CLEAR_RADIUS_BASIC = SolaceXMLTemplate(("message_vpn.vpn_name", "vpn_name"),
+                                       ("message_vpn.authentication.user_class.client", None),
+                                       ("message_vpn.authentication.user_class.basic.radius_domain.radius_domain", None))
+INTERNAL_AUTH = SolaceXMLTemplate(("message_vpn.vpn_name", "vpn_name"),
+                                  ("message_vpn.authentication.user_class.client", None),
+                                  ("message_vpn.authentication.user_class.auth_type.internal", None))
+INTERNAL_AUTH_BASIC = SolaceXMLTemplate(("message_vpn.vpn_name", "vpn_name"),
+                                        ("message_vpn.authentication.user_class.client", None),
+                                        ("message_vpn.authentication.user_class.basic.auth_type.internal", None))
+SPOOL_SIZE = SolaceXMLTemplate(("message_spool.vpn_name", "vpn_name"),
+                               ("message_spool.max_spool_usage.size", "max_spool_usage"))
+LARGE_MESSAGE_THRESHOLD = SolaceXMLTemplate(("message_vpn.vpn_name", "vpn_name"),
+                                            ("message_vpn.event.large_message_threshold.size",
+                                             "large_message_threshold"))
+LOG_TAG = SolaceXMLTemplate(("message_vpn.vpn_name", "vpn_name"), ("message_vpn.event.log_tag.tag_string", "tag"))
+ENABLE_VPN = SolaceXMLTemplate(("message_vpn.vpn_name", "vpn_name"), ("message_vpn.no.shutdown", None))
+
+VPN_INDEX = IndexedType("message-vpn", SHOW_VPN, "rpc-reply.rpc.show.message-vpn.vpn", "name", "vpn_name",
+                        per_vpn=False)
+VPN_SNAPSHOT = SnapshotType("message-vpn", SHOW_VPN_DETAIL, "rpc-reply.rpc.show.message-vpn.vpn", "name", "vpn_name",
+                            per_vpn=False)
+VPN_SPOOL_SNAPSHOT = SnapshotType("message-spool-vpn", SHOW_VPN_SPOOL, "rpc-reply.rpc.show.message-spool.message-vpn.vpn",
+                                  "name", "vpn_name", per_vpn=False)
+ENABLED_SETTING = Setting("enabled", "true")
+RADIUS_CLEARED_SETTING = Setting("authentication.basic-auth.radius-domain", "")
+INTERNAL_AUTH_SETTING = Setting("authentication.basic-auth.auth-type", "internal")
+SPOOL_SIZE_SETTING = Setting("maximum-spool-usage-mb",
+                             lambda kwargs: kwargs.get("max_spool_usage", SolaceVPN.default_settings["max_spool_usage"]))
+LARGE_MESSAGE_THRESHOLD_SETTING = Setting("event-configuration.large-message-threshold", lambda kwargs: kwargs.get(
+    "large_message_threshold", SolaceVPN.default_settings["large_message_threshold"]))
+LOG_TAG_SETTING = Setting("event-configuration.event-log-tag", lambda kwargs: kwargs.get("tag", kwargs["vpn_name"]))
+
 
 @libsolace.plugin_registry.register
 class SolaceVPN(Plugin):
@@ -103,7 +147,7 @@ class SolaceVPN(Plugin):
                 self.set_logger_tag(**kwargs)
                 self.enable_vpn(**kwargs)
 
-    @only_if_not_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn')
+    @only_if_not_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn', index=VPN_INDEX)
     def create_vpn(self, **kwargs):
         """New VPN SEMP Request generator.
 
@@ -129,11 +173,12 @@ class SolaceVPN(Plugin):
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
         # Create domain-event VPN, this can fail if VPN exists, but thats ok.
-        self.api.x = SolaceXMLBuilder('VPN Create new VPN %s' % vpn_name, version=self.api.version)
-        self.api.x.create.message_vpn.vpn_name = vpn_name
-        self.commands.enqueue(self.api.x, **kwargs)
-        self.set_exists(True)
-        return (str(self.api.x), kwargs)
+        xml = CREATE_VPN.render(self.api.version, vpn_name=vpn_name)
+        self.commands.enqueue(xml, **kwargs)
+        index = getattr(self.api, "index", None)
+        if index is not None:
+            index.add(VPN_INDEX, **kwargs)
+        return (xml, kwargs)
 
     def get(self, **kwargs):
         """Returns a VPN from the appliance immediately. This method calls the api instance so it MUST be referenced through the SolaceAPI instance, or passed a `api` kwarg.
@@ -155,16 +200,15 @@ class SolaceVPN(Plugin):
         detail = get_key_from_kwargs("detail", kwargs, default=False)
         logger.info("Getting VPN: %s" % vpn_name)
 
-        self.api.x = SolaceXMLBuilder("Getting VPN %s" % vpn_name, version=self.api.version)
-        self.api.x.show.message_vpn.vpn_name = vpn_name
-        if detail:
-            self.api.x.show.message_vpn.detail
+        template = SHOW_VPN_DETAIL if detail else SHOW_VPN
+        xml = template.render(self.api.version, vpn_name=vpn_name)
 
-        self.commands.enqueue(self.api.x, **kwargs)
+        self.commands.enqueue(xml, **kwargs)
 
-        return self.api.rpc(str(self.api.x))
+        return self.api.rpc(xml)
 
-    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn')
+    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn', index=VPN_INDEX)
+    @only_if_changed(VPN_SNAPSHOT, [RADIUS_CLEARED_SETTING])
     def clear_radius(self, **kwargs):
         """Clears radius authentication mechanism
 
@@ -190,17 +234,13 @@ class SolaceVPN(Plugin):
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
         # Switch Radius Domain to nothing
-        self.api.x = SolaceXMLBuilder("VPN %s Clearing Radius" % vpn_name, version=self.api.version)
-        self.api.x.message_vpn.vpn_name = vpn_name
-        self.api.x.message_vpn.authentication.user_class.client
-        if self.api.version == "soltr/7_1_1" or self.api.version == "soltr/7_0" or self.api.version == "soltr/6_2":
-            self.api.x.message_vpn.authentication.user_class.basic.radius_domain.radius_domain
-        else:
-            self.api.x.message_vpn.authentication.user_class.radius_domain.radius_domain
-        self.commands.enqueue(self.api.x, **kwargs)
-        return (str(self.api.x), kwargs)
+        template = CLEAR_RADIUS_BASIC if self.api.version in BASIC_AUTH_VERSIONS else CLEAR_RADIUS
+        xml = template.render(self.api.version, vpn_name=vpn_name)
+        self.commands.enqueue(xml, **kwargs)
+        return (xml, kwargs)
 
-    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn')
+    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn', index=VPN_INDEX)
+    @only_if_changed(VPN_SNAPSHOT, [INTERNAL_AUTH_SETTING])
     def set_internal_auth(self, **kwargs):
         """Set authentication method to internal
 
@@ -219,20 +259,13 @@ class SolaceVPN(Plugin):
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
         # Switch to Internal Auth
-        if self.api.version == "soltr/7_1_1" or self.api.version == "soltr/7_0" or self.api.version == "soltr/6_2":
-            self.api.x = SolaceXMLBuilder("VPN %s Enable Internal Auth" % vpn_name, version=self.api.version)
-            self.api.x.message_vpn.vpn_name = vpn_name
-            self.api.x.message_vpn.authentication.user_class.client
-            self.api.x.message_vpn.authentication.user_class.basic.auth_type.internal
-        else:
-            self.api.x = SolaceXMLBuilder("VPN %s Enable Internal Auth" % vpn_name, version=self.api.version)
-            self.api.x.message_vpn.vpn_name = vpn_name
-            self.api.x.message_vpn.authentication.user_class.client
-            self.api.x.message_vpn.authentication.user_class.auth_type.internal
-        self.commands.enqueue(self.api.x, **kwargs)
-        return (str(self.api.x), kwargs)
-
-    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn')
+        template = INTERNAL_AUTH_BASIC if self.api.version in BASIC_AUTH_VERSIONS else INTERNAL_AUTH
+        xml = template.render(self.api.version, vpn_name=vpn_name)
+        self.commands.enqueue(xml, **kwargs)
+        return (xml, kwargs)
+
+    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn', index=VPN_INDEX)
+    @only_if_changed(VPN_SPOOL_SNAPSHOT, [SPOOL_SIZE_SETTING])
     def set_spool_size(self, **kwargs):
         """Set the maximun spool size for the VPN
 
@@ -255,14 +288,12 @@ class SolaceVPN(Plugin):
 
         logger.debug("Setting spool size to %s" % max_spool_usage)
         # Set the Spool Size
-        self.api.x = SolaceXMLBuilder("VPN %s Set spool size to %s" % (vpn_name, max_spool_usage),
-                                      version=self.api.version)
-        self.api.x.message_spool.vpn_name = vpn_name
-        self.api.x.message_spool.max_spool_usage.size = max_spool_usage
-        self.commands.enqueue(self.api.x, **kwargs)
-        return (str(self.api.x), kwargs)
-
-    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn')
+        xml = SPOOL_SIZE.render(self.api.version, vpn_name=vpn_name, max_spool_usage=max_spool_usage)
+        self.commands.enqueue(xml, **kwargs)
+        return (xml, kwargs)
+
+    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn', index=VPN_INDEX)
+    @only_if_changed(VPN_SNAPSHOT, [LARGE_MESSAGE_THRESHOLD_SETTING])
     def set_large_message_threshold(self, **kwargs):
         """Sets the large message threshold
 
@@ -285,15 +316,13 @@ class SolaceVPN(Plugin):
                                                       self.default_settings["large_message_threshold"])
 
         # Large Message Threshold
-        self.api.x = SolaceXMLBuilder(
-            "VPN %s Settings large message threshold event to %s" % (vpn_name, large_message_threshold),
-            version=self.api.version)
-        self.api.x.message_vpn.vpn_name = vpn_name
-        self.api.x.message_vpn.event.large_message_threshold.size = large_message_threshold
-        self.commands.enqueue(self.api.x, **kwargs)
-        return (str(self.api.x), kwargs)
-
-    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn')
+        xml = LARGE_MESSAGE_THRESHOLD.render(self.api.version, vpn_name=vpn_name,
+                                             large_message_threshold=large_message_threshold)
+        self.commands.enqueue(xml, **kwargs)
+        return (xml, kwargs)
+
+    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn', index=VPN_INDEX)
+    @only_if_changed(VPN_SNAPSHOT, [LOG_TAG_SETTING])
     def set_logger_tag(self, **kwargs):
         """Sets the VPN logger tag, default = vpn_name
 
@@ -315,14 +344,12 @@ class SolaceVPN(Plugin):
         tag = get_key_from_kwargs("tag", kwargs, default=vpn_name)
 
         # logger Tag for this VPN
-        self.api.x = SolaceXMLBuilder("VPN %s Setting logger tag to %s" % (vpn_name, vpn_name),
-                                      version=self.api.version)
-        self.api.x.message_vpn.vpn_name = vpn_name
-        self.api.x.message_vpn.event.log_tag.tag_string = tag
-        self.commands.enqueue(self.api.x, **kwargs)
-        return (str(self.api.x), kwargs)
-
-    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn')
+        xml = LOG_TAG.render(self.api.version, vpn_name=vpn_name, tag=tag)
+        self.commands.enqueue(xml, **kwargs)
+        return (xml, kwargs)
+
+    @only_if_exists("get", 'rpc-reply.rpc.show.message-vpn.vpn', index=VPN_INDEX)
+    @only_if_changed(VPN_SNAPSHOT, [ENABLED_SETTING])
     def enable_vpn(self, **kwargs):
         """Enable a VPN
 
@@ -342,14 +369,13 @@ class SolaceVPN(Plugin):
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
 
         # Enable the VPN
-        self.api.x = SolaceXMLBuilder("VPN %s Enabling the vpn" % vpn_name, version=self.api.version)
-        self.api.x.message_vpn.vpn_name = vpn_name
-        self.api.x.message_vpn.no.shutdown
-        self.commands.enqueue(self.api.x, **kwargs)
-        return (str(self.api.x), kwargs)
+        xml = ENABLE_VPN.render(self.api.version, vpn_name=vpn_name)
+        self.commands.enqueue(xml, **kwargs)
+        return (xml, kwargs)
 
     def list_vpns(self, **kwargs):
-        """Returns a list of vpns from first / primary node only
+        """Returns a list of vpns from a single node, the primary unless `READ_ROUTING` sends the reads
+        elsewhere, see :func:`libsolace.SolaceAPI.SolaceAPI.route`
 
         :param vpn_name: the vpn_name or search pattern
         :type vpn_name: str
@@ -363,17 +389,16 @@ class SolaceVPN(Plugin):
 
         """
         vpn_name = get_key_from_kwargs("vpn_name", kwargs)
+        if not kwargs.get("primaryOnly", False) and not kwargs.get("backupOnly", False):
+            kwargs["anyNode"] = True
 
-        self.api.x = SolaceXMLBuilder("Getting list of VPNS", version=self.api.version)
-        self.api.x.show.message_vpn.vpn_name = vpn_name
-
-        self.commands.enqueue(PluginResponse(str(self.api.x), **kwargs))
-        response = self.api.rpc(PluginResponse(str(self.api.x), **kwargs))
+        xml = SHOW_VPN.render(self.api.version, vpn_name=vpn_name)
 
-        # response = SolaceReplyHandler(self.api.rpc(str(self.api.x), primaryOnly=True))
-        # logger.info(response)
+        self.commands.enqueue(PluginResponse(xml, **kwargs))
 
-        return [vpn['name'] for vpn in response[0]['rpc-reply']['rpc']['show']['message-vpn']['vpn']]
+        # paged, the appliance may have more vpns than fit in a single reply
+        return [vpn['name'] for vpn in self.api.rpc_iter(PluginResponse(xml, **kwargs),
+                                                         'rpc-reply.rpc.show.message-vpn.vpn')]
 
     def __getitem__(self, k):
         return self.__dict__[k]
@@ -121,15 +121,8 @@ class Plugin(object):
         :return: class
         """
 
-        try:
-            module = get_calling_module(point=2)
-        except:
-            module = "Unknown"
-
-        try:
-            module_parent = get_calling_module(point=3)
-        except:
-            module_parent = "Unknown"
+        module = get_calling_module(point=2, logger=logger)
+        module_parent = get_calling_module(point=3, logger=logger)
 
         logger.debug(self.plugins_dict)
         logger.info("Module %s->%s->%s" % (module_parent, module, args[0]))
@@ -150,11 +143,15 @@ class Plugin(object):
         subsequent requests decorated with the `only_if_exists` will function correctly since set_exists states that the
         object will exist.
 
+        The bit is shared by every object the plugin instance handles, so it is only used by the decorators of
+        methods without a `index` type. Plugins with one keep the state of each object in the api's existence index,
+        see :class:`libsolace.SolaceExistenceIndex.SolaceExistenceIndex`.
+
         :param state: the existence state of the object
         :type state: bool
         :return:
         """
-        module = get_calling_module(point=3)
+        module = get_calling_module(point=3, logger=logger)
         logger.info("Calling module: %s, Setting Exists bit: %s" % (module, state))
         self.exists = state
 
@@ -50,12 +50,10 @@ class Utilities(Plugin):
 
         result = []
 
-        response = self.api.manage(self.SOLACE_QUEUE_PLUGIN).get(queue_name='*', vpn_name=vpn_name,
-                                                                 detail=True)[0]['rpc-reply']['rpc']['show']['queue'][
-            'queues']['queue']
+        queues = self.api.manage(self.SOLACE_QUEUE_PLUGIN).iter_queues(queue_name='*', vpn_name=vpn_name, detail=True)
 
         try:
-            for h in response:
+            for h in queues:
                 o = h['info']['owner']
                 logger.debug("Owner: %s" % o)
                 if o == client_username:
@@ -84,7 +82,7 @@ class Utilities(Plugin):
 
         try:
             data = self.api.manage(self.SOLACE_USER_PLUGIN).get(client_username=client_username, vpn_name=vpn_name,
-                                                                detail=True)
+                                                                detail=True, primaryOnly=True)
             response = data[0]['rpc-reply']['rpc']['show']['client-username']['client-usernames']['client-username'][
                 'num-clients']
 
@@ -119,7 +117,7 @@ class Utilities(Plugin):
         """
         result = []
         response = self.api.manage(self.SOLACE_USER_PLUGIN).get(client_username=client_username, vpn_name=vpn_name,
-                                                                detail=True)[0]['rpc-reply']['rpc']['show'][
+                                                                detail=True, primaryOnly=True)[0]['rpc-reply']['rpc']['show'][
             'client-username']['client-usernames']['client-username']['num-clients']
         if int(response) > 0:
             logger.info("User %s is in-use, %s sessions open" % (client_username, response))
@@ -1,8 +1,11 @@
 import base64
-import inspect
+import httplib
 import logging
 import re
+import socket
 import ssl
+import sys
+import threading
 import xml.sax.handler
 from collections import OrderedDict
 from distutils.version import StrictVersion
@@ -16,6 +19,9 @@ from libsolace.Exceptions import MissingProperty
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+# look up the calling module for log messages, see get_calling_module
+CALLER_LOOKUP = True
+
 """
 
 .. testsetup::
@@ -35,6 +41,13 @@ except:
     URLLIB2 = True
     URLLIB3 = False
 
+# errors reading a reply once the appliance answered, e.g. from the response returned with stream=True
+if URLLIB3:
+    READ_ERRORS = (socket.error, httplib.HTTPException, urllib3.exceptions.ProtocolError,
+                   urllib3.exceptions.ReadTimeoutError)
+else:
+    READ_ERRORS = (socket.error, httplib.HTTPException)
+
 try:
     version = pkg_resources.get_distribution('libsolace').version
 except pkg_resources.DistributionNotFound:
@@ -189,12 +202,67 @@ class d2x:
             raise
 
 
-def httpRequest(url, fields=None, headers=None, method='GET', timeout=3, protocol="http", verifySsl=False, **kwargs):
+def get_connection_pool(url, maxsize=1, keep_alive=True, verifySsl=True, **kwargs):
+    """
+    Returns a persistent connection pool for the host in `url`. Connections in the pool are kept open between
+    requests, so only the first request to a host pays for the TCP / TLS handshake.
+
+    When urllib3 is not available, None is returned and :func:`httpRequest` falls back to a new connection per
+    request.
+
+    :param url: URL of the host to pool connections for
+    :type url: str
+    :param maxsize: number of connections to keep open to the host
+    :type maxsize: int
+    :param keep_alive: when False, connections are closed after every request
+    :type keep_alive: bool
+    :param verifySsl: verify the certificate of https hosts
+    :type verifySsl: bool
+    :return: connection pool or None
+    :rtype: urllib3.HTTPConnectionPool
+
+    >>> pool = get_connection_pool('http://solace1.mydomain.com/SEMP', maxsize=2)
+    >>> pool.host
+    'solace1.mydomain.com'
+
+    """
+    if not URLLIB3:
+        logger.debug("urllib3 not available, not pooling connections to %s" % url)
+        return None
+
+    headers = None
+    if not keep_alive:
+        headers = {'Connection': 'close'}
+
+    if verifySsl:
+        cert_reqs = 'CERT_REQUIRED'
+    else:
+        cert_reqs = 'CERT_NONE'
+
+    logger.debug("Creating connection pool for %s, maxsize: %s, keep_alive: %s, verifySsl: %s" % (
+        url, maxsize, keep_alive, verifySsl))
+    if url.lower().startswith('https'):
+        return urllib3.connection_from_url(url, maxsize=maxsize, block=False, headers=headers, cert_reqs=cert_reqs)
+    return urllib3.connection_from_url(url, maxsize=maxsize, block=False, headers=headers)
+
+
+def httpRequest(url, fields=None, headers=None, method='GET', timeout=3, protocol="http", verifySsl=False, pool=None,
+                stream=False, connect_timeout=None, **kwargs):
     """
     Performs HTTP request
 
     :param url: URL accessed
     :type url: str
+    :param pool: a connection pool from :func:`get_connection_pool` to send the request through, if None a new
+        connection is made for this request only
+    :type pool: urllib3.HTTPConnectionPool
+    :param stream: return the unread response as a file-like object instead of its data, the caller reads it and
+        must call `release_conn()` on it if it has one, so the connection goes back to the pool
+    :type stream: bool
+    :param timeout: seconds to wait for the connection and for each read of the response
+    :type timeout: float
+    :param connect_timeout: seconds to wait for the connection, default `timeout`
+    :type connect_timeout: float
     :param kwargs:
     :type kwargs: dict
 
@@ -208,16 +276,26 @@ def httpRequest(url, fields=None, headers=None, method='GET', timeout=3, protoco
     """
     if URLLIB3:
         logger.debug('Using urllib3')
-        http = urllib3.PoolManager()
+        if pool is None:
+            http = urllib3.PoolManager()
+        else:
+            http = pool
+            # the pool is bound to the host, it is given the path so the request line is not the absolute url
+            url = urllib3.util.parse_url(url).request_uri
+        if connect_timeout is not None:
+            timeout = urllib3.Timeout(connect=min(connect_timeout, timeout), read=timeout)
         if method == 'GET':
             request = http.request_encode_url(method, url, fields=fields, headers=headers, timeout=timeout)
         elif method == 'POST':
             logger.debug("method: %s, url: %s, headers: %s, fields: %s" % (method, url, headers, fields))
-            request = http.urlopen(method, url, headers=headers, body=fields)
+            request = http.urlopen(method, url, headers=headers, body=fields, preload_content=not stream,
+                                   timeout=timeout)
         code = request.status
         logger.debug("response code: %s" % code)
         headers = request.getheaders()
         logger.debug("response headers: %s" % headers)
+        if stream:
+            return (request, headers, code)
         data = request.data
         logger.debug("response data: %s" % data)
     elif URLLIB2:
@@ -238,11 +316,65 @@ def httpRequest(url, fields=None, headers=None, method='GET', timeout=3, protoco
 
         code = response.getcode()
         headers = response.headers.dict
+        if stream:
+            return (response, headers, code)
         data = response.read()
     logger.debug('Got response. Data: %s, Headers: %s, Status code: %s' % (str(data), str(headers), str(code)))
     return (data, headers, code)
 
 
+def call_concurrently(func, items, workers=None):
+    """
+    Calls `func` once for every item, each call in its own thread, and waits for all of them to finish.
+
+    Exceptions are not raised, they are returned in place of the result so the caller can report every failure and
+    decide what to raise.
+
+    :param func: callable taking a single item
+    :param items: list of items
+    :type items: list
+    :param workers: at most this many calls at once, in the order of `items`, default all of them
+    :type workers: int
+    :return: list of (result, exc_info) tuples in the same order as `items`, exc_info is None on success
+    :rtype: list
+
+    >>> call_concurrently(lambda x: x * 2, [1, 2])
+    [(2, None), (4, None)]
+    >>> call_concurrently(lambda x: x * 2, [1, 2, 3], workers=2)
+    [(2, None), (4, None), (6, None)]
+
+    """
+    results = [(None, None)] * len(items)
+    pending = iter(enumerate(items))
+    lock = threading.Lock()
+
+    def _call():
+        while True:
+            with lock:
+                try:
+                    index, item = next(pending)
+                except StopIteration:
+                    return
+            try:
+                results[index] = (func(item), None)
+            except:
+                results[index] = (None, sys.exc_info())
+
+    if workers is None:
+        workers = len(items)
+    # the calling thread is one of the workers, there is no point in idling it
+    threads = []
+    for index in range(min(workers, len(items)) - 1):
+        t = threading.Thread(target=_call, name="libsolace-%s" % index)
+        t.daemon = True
+        t.start()
+        threads.append(t)
+    _call()
+    for t in threads:
+        t.join()
+    return results
+
+
 def generateBasicAuthHeader(username, password):
     """
     Generates a basic auth header
@@ -353,16 +485,24 @@ def get_plugin(plugin_name, solace_api, *args, **kwargs):
     return plugin(api=solace_api, *args, **kwargs)
 
 
-def get_calling_module(point=2):
+def get_calling_module(point=2, logger=None, level=logging.INFO):
     """
     Return a module at a different point in the stack.
 
+    Set `libsolace.util.CALLER_LOOKUP` to False to turn the lookup off, "Unknown" is returned instead.
+
     :param point: the number of calls backwards in the stack.
-    :return:
+    :param logger: only look up the module if this logger is enabled for `level`, "Unknown" is returned otherwise.
+    :type logger: logging.Logger
+    :param level: the level the module will be logged at
+    :type level: int
+    :return: "module:line"
     """
-    frm = inspect.stack()[point]
-    function = str(frm[3])
-    line = str(frm[2])
-    modulepath = str(frm[1]).split('/')
-    module = str(modulepath.pop())
-    return "%s:%s" % (module, line)
+    if not CALLER_LOOKUP or (logger is not None and not logger.isEnabledFor(level)):
+        return "Unknown"
+    try:
+        frm = sys._getframe(point)
+    except ValueError:
+        return "Unknown"
+    module = frm.f_code.co_filename.split('/')[-1]
+    return "%s:%s" % (module, frm.f_lineno)
@@ -183,6 +183,158 @@ def parse(xml_input, *args, **kwargs):
     return handler.item
 
 
+class _StreamingSAXHandler(_DictSAXHandler):
+    def __init__(self,
+                 item_path,
+                 item_callback=lambda *args: True,
+                 keep_xml=(),
+                 **kwargs):
+        _DictSAXHandler.__init__(self, item_callback=item_callback, **kwargs)
+        self.item_path = list(item_path)
+        self.keep_xml = keep_xml
+        self.document = OrderedDict()
+        self.root_depth = None
+        self.raw = None
+        self.raw_output = None
+
+    def _names(self):
+        return [name for (name, attrs) in self.path]
+
+    def _node(self, names):
+        node = self.document
+        for name in names:
+            child = node.get(name)
+            if not isinstance(child, dict):
+                child = node[name] = OrderedDict()
+            node = child
+        return node
+
+    def _add(self, names, key, value):
+        node = self._node(names)
+        if key in node:
+            if isinstance(node[key], list):
+                node[key].append(value)
+            else:
+                node[key] = [node[key], value]
+        else:
+            node[key] = value
+
+    def startElement(self, name, attrs):
+        if self.raw is not None:
+            self.path.append((name, attrs or None))
+            self.raw.startElement(name, AttributesImpl(attrs))
+            return
+        if self.root_depth is not None:
+            _DictSAXHandler.startElement(self, name, attrs)
+            return
+        names = self._names() + [name]
+        depth = len(names)
+        if depth < len(self.item_path) and names == self.item_path[:depth]:
+            # an ancestor of the items, only its attributes are kept
+            self.path.append((name, attrs or None))
+            node = self._node(names)
+            if self.xml_attribs:
+                for (key, value) in attrs.items():
+                    node[self.attr_prefix + key] = value
+            return
+        # a item, or a subtree which is not on the path to the items
+        self.root_depth = depth
+        if name in self.keep_xml and names != self.item_path:
+            self.path.append((name, attrs or None))
+            self.raw_output = StringIO()
+            self.raw = XMLGenerator(self.raw_output, 'utf-8')
+            return
+        self.item = self.data = None
+        _DictSAXHandler.startElement(self, name, attrs)
+
+    def endElement(self, name):
+        if self.root_depth is None:
+            self.path.pop()
+            return
+        if len(self.path) > self.root_depth:
+            if self.raw is not None:
+                self.raw.endElement(name)
+                self.path.pop()
+            else:
+                _DictSAXHandler.endElement(self, name)
+            return
+        names = self._names()
+        if self.raw is not None:
+            value = self.raw_output.getvalue()
+            self.raw = self.raw_output = None
+        else:
+            item, data = self.item, self.data
+            self.item, self.data = self.stack.pop()
+            if data and self.force_cdata and item is None:
+                item = OrderedDict()
+            if item is not None:
+                if data:
+                    item[self.cdata_key] = data
+                value = item
+            else:
+                value = data
+        self.root_depth = None
+        if names == self.item_path:
+            should_continue = self.item_callback(self.path, value)
+            self.path.pop()
+            if not should_continue:
+                raise ParsingInterrupted()
+        else:
+            self.path.pop()
+            self._add(names[:-1], name, value)
+
+    def characters(self, data):
+        if self.raw is not None:
+            self.raw.characters(data)
+        elif self.root_depth is not None:
+            _DictSAXHandler.characters(self, data)
+
+
+def stream(xml_input, item_path, item_callback, keep_xml=(), **kwargs):
+    """Parse the given XML input, calling `item_callback` for every element at
+    `item_path` instead of keeping it in the returned document. Only one item is
+    held in memory at a time, no matter how many items the input contains.
+
+    `item_path` is a list of element names from the document root to the items.
+    The callback receives the `path` to the item (name-attribs pairs) and the
+    `item`, if its return value is false-ish, parsing will be stopped with the
+    :class:`ParsingInterrupted` exception.
+
+    Everything which is not on the path to the items, is returned as a regular
+    dictionary. Subtrees whose root element is named in `keep_xml` are returned
+    as a string of their inner XML instead.
+
+    `xml_input` can either be a `string` or a file-like object, file-like
+    objects are read and parsed a block at a time.
+
+    Streaming example::
+
+        >>> def handle(path, item):
+        ...     print 'item:%s' % item
+        ...     return True
+        ...
+        >>> stream(\"\"\"
+        ... <a prop="x">
+        ...   <b><c>1</c><c>2</c></b>
+        ...   <d>3</d>
+        ... </a>\"\"\", ['a', 'b', 'c'], handle)
+        item:1
+        item:2
+        {u'a': {u'b': {}, u'd': u'3', u'@prop': u'x'}}
+
+    """
+    handler = _StreamingSAXHandler(item_path, item_callback=item_callback, keep_xml=keep_xml, **kwargs)
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = handler.startElement
+    parser.EndElementHandler = handler.endElement
+    parser.CharacterDataHandler = handler.characters
+    if hasattr(xml_input, 'read'):
+        parser.ParseFile(xml_input)
+    else:
+        parser.Parse(xml_input, True)
+    return handler.document
+
+
 def _emit(key, value, content_handler,
           attr_prefix='@',
           cdata_key='#text',
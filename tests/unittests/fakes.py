@@ -0,0 +1,75 @@
+import threading
+import time
+
+from libsolace.plugin import PluginResponse
+from libsolace.SolaceExistenceIndex import PRIMARY, BACKUP
+
+
+class FakeAPI(object):
+    """ Stands in for :class:`libsolace.SolaceAPI.SolaceAPI`, answering every request from memory after `delay`
+    seconds. The requests are recorded in `requests` as (node, xml), along with the most requests in flight per node.
+    Requests in `errors` raise, subclasses override :func:`reply` and :func:`items` to answer them. """
+
+    def __init__(self, delay=0, errors=(), backupRouter="backup"):
+        self.config = {}
+        self.version = "soltr/7_1_1"
+        self.environment = "dev"
+        self.pool_size = 2
+        self.backupRouter = backupRouter
+        self.delay = delay
+        self.errors = errors
+        self.requests = []
+        self.in_flight = {PRIMARY: 0, BACKUP: 0}
+        self.max_in_flight = {PRIMARY: 0, BACKUP: 0}
+        self.closed = False
+        self.lock = threading.Lock()
+
+    @property
+    def sent(self):
+        """ The requests sent to the primary, in order """
+        return [xml for node, xml in self.requests if node == PRIMARY]
+
+    def send(self, xml, nodes):
+        with self.lock:
+            for node in nodes:
+                self.requests.append((node, xml))
+                self.in_flight[node] += 1
+                self.max_in_flight[node] = max(self.max_in_flight[node], self.in_flight[node])
+        time.sleep(self.delay)
+        with self.lock:
+            for node in nodes:
+                self.in_flight[node] -= 1
+        if xml in self.errors:
+            raise Exception("permission-error")
+
+    def reply(self, xml, node, kwargs):
+        """ The reply of `node` to `xml` """
+        return {'rpc-reply': {'execute-result': {'@code': 'ok'}}}
+
+    def items(self, xml, path, node):
+        """ The elements at `path` of the reply of `node` to `xml` """
+        return []
+
+    def rpc(self, xml, **kwargs):
+        if isinstance(xml, PluginResponse):
+            kwargs = dict(xml.kwargs, **kwargs)
+            xml = xml.xml
+        if kwargs.get("backupOnly"):
+            nodes = [BACKUP]
+        elif kwargs.get("primaryOnly") or not self.backupRouter:
+            nodes = [PRIMARY]
+        else:
+            nodes = [PRIMARY, BACKUP]
+        self.send(xml, nodes)
+        data = [dict(self.reply(xml, node, kwargs), HOST=node) for node in nodes]
+        if len(data) == 1:
+            data.append(None)
+        return data
+
+    def rpc_iter(self, xml, path, primaryOnly=False, backupOnly=False, **kwargs):
+        node = BACKUP if backupOnly else PRIMARY
+        self.send(xml, [node])
+        return iter(self.items(xml, path, node))
+
+    def close(self):
+        self.closed = True
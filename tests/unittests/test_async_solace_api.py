@@ -0,0 +1,69 @@
+import threading
+
+import unittest2 as unittest
+
+from libsolace.AsyncSolaceAPI import AsyncSolaceAPI, SolaceTimeout, WorkerPool, gather
+from libsolace.SolaceExistenceIndex import PRIMARY
+from tests.unittests import fakes
+
+
+class FakeAPI(fakes.FakeAPI):
+    """ Replies after a short delay with the request and its kwargs """
+
+    def __init__(self):
+        super(FakeAPI, self).__init__(delay=0.02, errors=("bad",))
+
+    def reply(self, xml, node, kwargs):
+        return {"xml": xml, "kwargs": kwargs}
+
+    def items(self, xml, path, node):
+        return range(3)
+
+
+class TestAsyncSolaceAPI(unittest.TestCase):
+    def test_concurrent(self):
+        api = FakeAPI()
+        async_api = AsyncSolaceAPI("dev", api=api)
+        futures = [async_api.rpc("show %s" % i, primaryOnly=True) for i in range(16)]
+        self.assertEqual([reply[0]["xml"] for reply in gather(futures)], ["show %s" % i for i in range(16)])
+        self.assertEqual(futures[0].result()[0]["kwargs"], {"primaryOnly": True})
+        self.assertEqual(api.max_in_flight[PRIMARY], 8)
+        async_api.close()
+        self.assertTrue(api.closed)
+
+    def test_exception(self):
+        async_api = AsyncSolaceAPI("dev", api=FakeAPI(), workers=1)
+        future = async_api.rpc("bad")
+        self.assertEqual(str(future.exception()), "permission-error")
+        with self.assertRaises(Exception):
+            gather([async_api.rpc("show"), future])
+        async_api.close()
+
+    def test_rpc_iter(self):
+        async_api = AsyncSolaceAPI("dev", api=FakeAPI())
+        items = []
+        self.assertEqual(async_api.rpc_iter("show", "a.b").result(), [0, 1, 2])
+        self.assertEqual(async_api.rpc_iter("show", "a.b", item_callback=items.append).result(), 3)
+        self.assertEqual(items, [0, 1, 2])
+        async_api.close()
+
+    def test_shared_pool(self):
+        pool = WorkerPool(2)
+        first = AsyncSolaceAPI("dev", api=FakeAPI(), pool=pool)
+        second = AsyncSolaceAPI("prod", api=FakeAPI(), pool=pool)
+        futures = [api.rpc("show") for api in (first, second) for i in range(4)]
+        gather(futures)
+        first.close()
+        self.assertEqual(len(pool.threads), 2)
+        self.assertTrue(second.rpc("show").result())
+        pool.shutdown()
+
+    def test_timeout(self):
+        pool = WorkerPool(1)
+        release = threading.Event()
+        future = pool.submit(release.wait)
+        with self.assertRaises(SolaceTimeout):
+            future.result(timeout=0.01)
+        release.set()
+        self.assertTrue(future.result())
+        pool.shutdown()
@@ -1,6 +1,15 @@
 __author__ = 'keghol'
 
+import BaseHTTPServer
+import socket
+import SocketServer
+import struct
+import threading
+import time
+
+from libsolace.Exceptions import ApplianceError
 from libsolace.plugin import PluginResponse
+from libsolace.settingsloader import settings
 from libsolace.SolaceAPI import SolaceAPI
 
 import unittest2 as unittest
@@ -20,25 +29,65 @@ class TestSolaceAPI(unittest.TestCase):
         self.solace = SolaceAPI("dev", testmode=False)
         self.assertFalse(self.solace.testmode)
 
+    def test_testmode_settings_copy(self):
+        self.solace = SolaceAPI("dev", testmode=True, setting_overrides={"NAMEHOOK": "DefaultNaming"})
+        self.assertEqual(self.solace.config['USER'], settings["READ_ONLY_USER"])
+        self.assertNotEqual(settings["SOLACE_CONF"]["dev"]['USER'], settings["READ_ONLY_USER"])
+        self.assertNotEqual(settings["NAMEHOOK"], "DefaultNaming")
+
+    def test_read_routing(self):
+        show_vpn = '<rpc semp-version="soltr/7_1_1"><show><message-vpn><vpn-name>*</vpn-name></message-vpn></show></rpc>'
+        show_stats = '<rpc semp-version="soltr/7_1_1"><show><message-vpn><vpn-name>*</vpn-name><stats/></message-vpn>' \
+                     '</show></rpc>'
+        self.solace = SolaceAPI("dev", detect_status=False)
+        self.assertEqual(self.solace.route(show_vpn), (True, False))
+        self.solace.read_routing = "spread"
+        self.assertEqual([self.solace.route(show_vpn) for i in range(4)], [(True, False), (False, True)] * 2)
+        self.assertEqual(self.solace.route(show_stats), (True, False))
+        # the backup is skipped while its circuit is open
+        self.solace.read_routing = "backup"
+        self.assertEqual(self.solace.route(show_vpn), (False, True))
+        for i in range(5):
+            self.solace.get_breaker(self.solace.backupRouter).record(False)
+        self.assertEqual(self.solace.route(show_vpn), (True, False))
+
+    def test_read_routing_single_appliance(self):
+        self.solace = SolaceAPI("single", detect_status=False)
+        self.solace.read_routing = "backup"
+        self.assertEqual(self.solace.route('<rpc semp-version="soltr/7_1_1"><show><acl-profile><name>p</name>'
+                                           '</acl-profile></show></rpc>'), (True, False))
+
+    def test_bad_read_routing(self):
+        settings["SOLACE_CONF"]["dev"]["READ_ROUTING"] = "standby"
+        try:
+            with self.assertRaises(ValueError):
+                SolaceAPI("dev", detect_status=False)
+        finally:
+            del settings["SOLACE_CONF"]["dev"]["READ_ROUTING"]
+
     def test_bad_config(self):
+        # detected on first use
         with self.assertRaises(Exception):
-            self.solace = SolaceAPI("bad")
+            self.solace = SolaceAPI("bad").primaryRouter
 
     def test_single_node_bad_config(self):
+        # the router is configured, the version is detected on first use
         with self.assertRaises(Exception):
-            self.solace = SolaceAPI("bad", detect_status=False)
+            self.solace = SolaceAPI("bad", detect_status=False).version
 
     def test_single_appliance(self):
         self.solace = SolaceAPI("single", detect_status=False)
         self.assertEqual(self.solace.primaryRouter, "http://solace1.swe1.unibet.com/SEMP")
 
     def test_failed_detection(self):
+        # detected on first use
         with self.assertRaises(Exception):
-            self.solace = SolaceAPI("backup_only")
+            self.solace = SolaceAPI("backup_only").primaryRouter
 
     def test_failed_detection2(self):
+        # detected on first use
         with self.assertRaises(Exception):
-            self.solace = SolaceAPI("primary_only")
+            self.solace = SolaceAPI("primary_only").primaryRouter
 
     def test_bad_config_no_mgmt(self):
         with self.assertRaises(Exception):
@@ -77,4 +126,109 @@ class TestSolaceAPI(unittest.TestCase):
 
     def test_manage(self):
         x = self.solace.manage("SolaceUser")
-        self.assertEqual(str(x.__class__), "<class 'libsolace.items.SolaceUser.SolaceUser'>")
\ No newline at end of file
+        self.assertEqual(str(x.__class__), "<class 'libsolace.items.SolaceUser.SolaceUser'>")
+
+    def test_rpc_iter(self):
+        request = '<rpc semp-version="soltr/6_0"><show><message-vpn><vpn-name>*</vpn-name></message-vpn></show></rpc>'
+        vpns = list(self.solace.rpc_iter(request, 'rpc-reply.rpc.show.message-vpn.vpn', page_size=1))
+        self.assertIn('default', [v['name'] for v in vpns])
+
+
+VPNS = ['v%s' % i for i in range(500)]
+VPNS_REPLY = '<rpc-reply semp-version="soltr/7_1_1"><rpc><show><message-vpn>%s</message-vpn></show></rpc>' \
+             '<execute-result code="ok"/></rpc-reply>' % ''.join('<vpn><name>%s</name></vpn>' % vpn for vpn in VPNS)
+
+
+class ResettingHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Replies with VPNS_REPLY, or resets the connection after the first `cut` bytes of it """
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests += 1
+        cut = self.server.cuts.pop(0) if self.server.cuts else None
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(VPNS_REPLY)))
+        self.end_headers()
+        self.wfile.write(VPNS_REPLY[:cut])
+        self.wfile.flush()
+        if cut is not None:
+            # once the client read what was sent
+            time.sleep(0.1)
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.connection.close()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSolaceAPITransport(unittest.TestCase):
+    SHOW_VPNS = '<rpc semp-version="soltr/7_1_1"><show><message-vpn><vpn-name>*</vpn-name></message-vpn></show></rpc>'
+
+    def setUp(self):
+        self.server = SocketServer.ThreadingTCPServer(('127.0.0.1', 0), ResettingHandler)
+        self.server.daemon_threads = True
+        self.server.cuts = []
+        self.server.requests = 0
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.host = 'http://127.0.0.1:%s/SEMP' % self.server.server_address[1]
+        settings["SOLACE_CONF"]["local"] = {"MGMT": [self.host], "USER": "admin", "PASS": "admin",
+                                            "RETRY_BACKOFF": 0.01}
+        self.solace = SolaceAPI("local", detect_status=False, version="soltr/7_1_1")
+
+    def cached(self, max_items):
+        self.solace.close()
+        settings["SOLACE_CONF"]["local"]["REQUEST_CACHE_ITEMS"] = max_items
+        self.solace = SolaceAPI("local", detect_status=False, version="soltr/7_1_1", request_cache=True)
+
+    def tearDown(self):
+        self.solace.close()
+        self.server.shutdown()
+        self.server.server_close()
+        del settings["SOLACE_CONF"]["local"]
+
+    def stream(self):
+        names = []
+        self.solace.rpc(self.SHOW_VPNS, item_path='rpc-reply.rpc.show.message-vpn.vpn',
+                        item_callback=lambda host, vpn: names.append(vpn['name']))
+        return names
+
+    def test_retried(self):
+        # reset before any vpn was read
+        self.server.cuts = [len('<rpc-reply semp-version="soltr/7_1_1"><rpc>')]
+        self.assertEqual(self.stream(), VPNS)
+        self.assertEqual(self.solace.get_breaker(self.host).opens, 0)
+
+    def test_not_retried_after_items(self):
+        # reset after some vpns were passed on, a retry would pass them again
+        self.server.cuts = [len(VPNS_REPLY) / 2, None]
+        with self.assertRaises(ApplianceError):
+            self.stream()
+        self.assertEqual(self.server.cuts, [None])
+        self.assertEqual(self.solace.get_breaker(self.host).failures, 1)
+
+    def test_stream_cached(self):
+        self.cached(1000)
+        self.assertEqual(self.stream(), VPNS)
+        self.assertEqual(self.stream(), VPNS)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_stream_too_large_to_cache(self):
+        self.cached(100)
+        self.assertEqual(self.stream(), VPNS)
+        self.assertEqual(self.stream(), VPNS)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_queued_kwargs(self):
+        # a queued command keeps its kwargs when it is sent
+        request = PluginResponse(self.SHOW_VPNS, primaryOnly=True)
+        self.solace.rpc(request)
+        self.solace.rpc(request)
+        self.assertEqual(request.kwargs, {"primaryOnly": True})
+
+    def test_pool_size(self):
+        # a connection is kept for every request the limiter lets in flight
+        self.assertEqual(self.solace.get_pool(self.host).pool.maxsize,
+                         self.solace.get_limiter(self.host).max_concurrency)
@@ -0,0 +1,89 @@
+import unittest2 as unittest
+
+from libsolace.SolaceCommandExecutor import SolaceCommandExecutor, SolacePlan, raise_for_errors, report, OK, FAILED, \
+    ERROR, SKIPPED
+from tests.unittests import fakes
+
+
+class FakeAPI(fakes.FakeAPI):
+    """ Replies to every request after a short delay, the requests in `fail` fail """
+
+    def __init__(self, fail=(), error=()):
+        super(FakeAPI, self).__init__(delay=0.01, errors=error)
+        self.fail = fail
+
+    def reply(self, xml, node, kwargs):
+        code = 'fail' if xml in self.fail else 'ok'
+        return {'rpc-reply': {'execute-result': {'@code': code, '@reason': 'already exists'}}}
+
+
+def queue_commands(queues=6, steps=("create", "shutdown", "enable")):
+    return [("%s %s" % (step, queue), {"vpn_name": "v", "queue_name": "q%s" % queue, "primaryOnly": True})
+            for queue in range(queues) for step in steps]
+
+
+class TestSolaceCommandExecutor(unittest.TestCase):
+    def test_concurrent_in_order(self):
+        api = FakeAPI()
+        commands = queue_commands()
+        results = SolaceCommandExecutor(api, concurrency=2).run(commands)
+        self.assertEqual([result.status for result in results], [OK] * len(commands))
+        self.assertEqual([result.xml for result in results], [xml for xml, kwargs in commands])
+        self.assertEqual(api.max_in_flight, {"primary": 2, "backup": 0})
+        # the commands about each queue are sent in queue order
+        for queue in range(6):
+            self.assertEqual([xml for xml in api.sent if xml.endswith(" %s" % queue)],
+                             ["create %s" % queue, "shutdown %s" % queue, "enable %s" % queue])
+
+    def test_both_appliances(self):
+        api = FakeAPI()
+        commands = [("set %s" % i, {"vpn_name": "v", "username": "u%s" % i}) for i in range(6)]
+        results = SolaceCommandExecutor(api, concurrency=3).run(commands)
+        self.assertEqual(len(results[0].responses), 2)
+        self.assertEqual(api.max_in_flight, {"primary": 3, "backup": 3})
+
+    def test_fail_fast(self):
+        api = FakeAPI(fail=["create 0"])
+        results = SolaceCommandExecutor(api, concurrency=1).run(queue_commands(queues=2))
+        self.assertEqual(results[0].status, FAILED)
+        self.assertEqual(results[0].reason, "primary: already exists")
+        self.assertEqual(set(result.status for result in results[1:]), set([SKIPPED, OK]))
+        self.assertEqual([result.status for result in results[1:3]], [SKIPPED, SKIPPED])
+
+    def test_continue(self):
+        api = FakeAPI(fail=["create 0"], error=["shutdown 1"])
+        results = SolaceCommandExecutor(api, concurrency=2, fail_fast=False).run(queue_commands(queues=2))
+        self.assertEqual([result.status for result in results], [FAILED, OK, OK, OK, ERROR, OK])
+        self.assertEqual(results[4].reason, "permission-error")
+        self.assertGreater(results[4].latency, 0)
+        with self.assertRaises(Exception):
+            raise_for_errors(results)
+
+
+class TestSolacePlan(unittest.TestCase):
+    def test_dependencies(self):
+        api = FakeAPI()
+        plan = SolacePlan()
+        profiles = plan.add("acl-profile", [("acl %s" % i, {"vpn_name": "v", "name": "v"}) for i in range(2)])
+        users = plan.add("user", [("user %s" % i, {"vpn_name": "v", "username": "u1"}) for i in range(3)],
+                         requires=profiles)
+        queues = plan.add("queue", queue_commands(queues=4))
+        plan.require(queues[3], *users)
+        results = SolaceCommandExecutor(api, concurrency=4).run_plan(plan)
+        self.assertEqual([result.status for result in results], [OK] * 17)
+        # the users wait for the profile, and the last queue for the user
+        self.assertGreater(min(api.sent.index("user %s" % i) for i in range(3)), api.sent.index("acl 1"))
+        self.assertGreater(api.sent.index("create 3"), api.sent.index("user 2"))
+        # reported in plan order, whichever order they ran in
+        self.assertEqual(report(results)[1], "user v u1: ok, 3 commands in %.3fs" % sum(
+            result.latency for result in results[2:5]))
+        self.assertEqual([line.split(":")[0] for line in report(results)],
+                         ["acl-profile v v", "user v u1", "queue v q0", "queue v q1", "queue v q2", "queue v q3"])
+
+    def test_cycle(self):
+        plan = SolacePlan()
+        first = plan.add("user", [("user", {"vpn_name": "v", "username": "u1"})])
+        second = plan.add("queue", [("queue", {"vpn_name": "v", "queue_name": "q1"})], requires=first)
+        plan.require(first[0], *second)
+        with self.assertRaises(ValueError):
+            SolaceCommandExecutor(FakeAPI()).run_plan(plan)
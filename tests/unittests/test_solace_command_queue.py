@@ -0,0 +1,32 @@
+import unittest2 as unittest
+from lxml import etree
+
+from libsolace.SolaceCommandQueue import SolaceCommandQueue
+from libsolace.util import call_concurrently
+
+
+class TestSolaceCommandQueue(unittest.TestCase):
+    def setUp(self):
+        SolaceCommandQueue.schemas.clear()
+
+    def test_schema_shared(self):
+        q1 = SolaceCommandQueue(version="soltr/6_2")
+        q2 = SolaceCommandQueue(version="soltr/6_1")
+        self.assertIs(q1.get_schema("soltr/6_2"), q2.get_schema("soltr/6_1"))
+        self.assertIsNot(q1.parser, q2.parser)
+        self.assertEqual(len(SolaceCommandQueue.schemas), 1)
+
+    def test_schema_unknown_version(self):
+        self.assertIs(SolaceCommandQueue.get_schema("soltr/99_0"), SolaceCommandQueue.get_schema("soltr/7_1_1"))
+
+    def test_schema_concurrent(self):
+        results = call_concurrently(SolaceCommandQueue.get_schema, ["soltr/7_0"] * 4)
+        schemas = [schema for schema, exc_info in results]
+        self.assertTrue(all(schema is schemas[0] for schema in schemas))
+
+    def test_enqueue(self):
+        q = SolaceCommandQueue(version="soltr/7_1_1")
+        q.enqueue('<rpc semp-version="soltr/7_1_1"><show><version/></show></rpc>')
+        self.assertEqual(len(q.commands), 1)
+        with self.assertRaises(etree.XMLSyntaxError):
+            q.enqueue('<rpc semp-version="soltr/7_1_1"><show><nonsense/></show></rpc>')
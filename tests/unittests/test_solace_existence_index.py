@@ -0,0 +1,108 @@
+import threading
+
+import unittest2 as unittest
+
+import libsolace
+from libsolace.SolaceExistenceIndex import SolaceExistenceIndex, PRIMARY, BACKUP
+from libsolace.items.SolaceQueue import QUEUE_INDEX
+from tests.unittests import fakes
+
+
+class FakeAPI(fakes.FakeAPI):
+    """ Lists the queues of `objects` without paging """
+
+    def __init__(self, objects, backupRouter="backup", listing=True):
+        super(FakeAPI, self).__init__(backupRouter=backupRouter)
+        self.objects = objects
+        self.index = SolaceExistenceIndex(self, listing=listing)
+
+    def items(self, xml, path, node):
+        if self.objects is None:
+            raise Exception("permission-error")
+        return [{'name': name} for name in self.objects[node]]
+
+    def reply(self, xml, node, kwargs):
+        """ Answers a show of a single queue """
+        name = xml.split('<name>')[1].split('</name>')[0]
+        queues = {'queue': {'name': name, 'info': {}}} if name in self.objects[node] else None
+        return {'rpc-reply': {'rpc': {'show': {'queue': {'queues': queues}}}}}
+
+
+class TestSolaceExistenceIndex(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeAPI({PRIMARY: ['q1', 'q2'], BACKUP: ['q1']})
+        self.index = self.api.index
+
+    def test_listed_once(self):
+        self.assertTrue(self.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='v', queue_name='q2'))
+        self.assertFalse(self.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='v', queue_name='q3'))
+        self.assertFalse(self.index.exists(QUEUE_INDEX, BACKUP, vpn_name='v', queue_name='q2'))
+        self.assertEqual([node for node, xml in self.api.requests], [PRIMARY, BACKUP])
+        self.assertIn('<name>*</name><vpn-name>v</vpn-name>', self.api.requests[0][1])
+
+    def test_add_discard(self):
+        self.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='v', queue_name='q1')
+        self.index.add(QUEUE_INDEX, vpn_name='v', queue_name='q3', primaryOnly=True)
+        self.assertTrue(self.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='v', queue_name='q3'))
+        self.index.discard(QUEUE_INDEX, vpn_name='v', queue_name='q1')
+        self.assertFalse(self.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='v', queue_name='q1'))
+        self.assertEqual(len(self.api.requests), 1)
+
+    def test_unlisted(self):
+        api = FakeAPI(None)
+        self.assertIsNone(api.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='v', queue_name='q1'))
+
+    def test_no_backup(self):
+        api = FakeAPI({PRIMARY: ['q1'], BACKUP: ['q1']}, backupRouter=None)
+        self.assertFalse(api.index.exists(QUEUE_INDEX, BACKUP, vpn_name='v', queue_name='q1'))
+        self.assertEqual(api.requests, [])
+
+    def test_decorators(self):
+        queue = libsolace.plugin_registry("SolaceQueue")(api=self.api)
+        self.assertIsNone(queue.create_queue(vpn_name='v', queue_name='q1'))
+        self.assertIsNotNone(queue.create_queue(vpn_name='v', queue_name='q3'))
+        self.assertIsNotNone(queue.max_bind_count(vpn_name='v', queue_name='q3', max_bind_count=10))
+        self.assertIsNone(queue.max_bind_count(vpn_name='v', queue_name='q4', max_bind_count=10))
+        self.assertEqual(len(self.api.requests), 1)
+
+    def test_state_per_object(self):
+        api = FakeAPI({PRIMARY: ['q1'], BACKUP: []}, listing=False)
+        queue = libsolace.plugin_registry("SolaceQueue")(api=api)
+        # creating q2 says nothing about q1, and q1 is looked up once
+        self.assertIsNotNone(queue.create_queue(vpn_name='v', queue_name='q2'))
+        self.assertIsNone(queue.create_queue(vpn_name='v', queue_name='q1'))
+        self.assertIsNotNone(queue.max_bind_count(vpn_name='v', queue_name='q1', max_bind_count=10))
+        self.assertIsNotNone(queue.max_bind_count(vpn_name='v', queue_name='q2', max_bind_count=10))
+        self.assertIsNotNone(queue.owner(vpn_name='v', queue_name='q1', owner_username='u'))
+        self.assertEqual([xml.count('<name>q1</name>') for node, xml in api.requests], [0, 1])
+        # shared by the plugins of the api
+        other = libsolace.plugin_registry("SolaceQueue")(api=api)
+        self.assertIsNotNone(other.max_bind_count(vpn_name='v', queue_name='q2', max_bind_count=10))
+        self.assertEqual(len(api.requests), 2)
+
+    def test_concurrent_listing(self):
+        # a slow listing holds up neither the other vpns nor the records, and is shared by the threads asking
+        listing, release, released = threading.Event(), threading.Event(), []
+        rpc_iter = self.api.rpc_iter
+
+        def slow(xml, path, **kwargs):
+            if '<vpn-name>slow</vpn-name>' in xml:
+                listing.set()
+                released.append(release.wait(5))
+            return rpc_iter(xml, path, **kwargs)
+
+        self.api.rpc_iter = slow
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='slow', queue_name='q1'))) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        listing.wait()
+        self.assertTrue(self.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='v', queue_name='q1'))
+        self.index.add(QUEUE_INDEX, vpn_name='slow', queue_name='q3', primaryOnly=True)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(released, [True])
+        self.assertEqual(results, [True, True])
+        self.assertEqual(len([xml for node, xml in self.api.requests if '<vpn-name>slow</vpn-name>' in xml]), 1)
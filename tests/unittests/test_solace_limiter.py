@@ -0,0 +1,116 @@
+import threading
+import time
+
+import unittest2 as unittest
+
+from libsolace.Exceptions import DeadlineExceeded
+from libsolace.SolaceLimiter import ApplianceLimiter, CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class TestApplianceLimiter(unittest.TestCase):
+    def run_requests(self, limiter, count, code=200, delay=0.01):
+        state = {"in_flight": 0, "max_in_flight": 0}
+        lock = threading.Lock()
+
+        def request():
+            sent = limiter.acquire()
+            with lock:
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            time.sleep(delay)
+            with lock:
+                state["in_flight"] -= 1
+            limiter.release(sent, code)
+
+        threads = [threading.Thread(target=request) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return state["max_in_flight"]
+
+    def test_concurrency_limit(self):
+        limiter = ApplianceLimiter(concurrency=2, max_concurrency=2)
+        self.assertEqual(self.run_requests(limiter, 8), 2)
+        self.assertGreater(limiter.metrics()["throttled"], 0)
+        # the limit grows while it holds the requests back
+        limiter = ApplianceLimiter(concurrency=2, max_concurrency=3)
+        self.assertLessEqual(self.run_requests(limiter, 24), 3)
+        self.assertEqual(limiter.metrics()["limit"], 3)
+
+    def test_no_growth_when_idle(self):
+        limiter = ApplianceLimiter(concurrency=2)
+        for i in range(10):
+            limiter.release(limiter.acquire(), 200)
+        self.assertEqual(limiter.metrics()["limit"], 2)
+
+    def test_backoff(self):
+        limiter = ApplianceLimiter(concurrency=8)
+        # the replies to requests sent before the backoff do not halve the limit again
+        self.run_requests(limiter, 8, code=503)
+        self.assertEqual(limiter.metrics()["limit"], 4)
+        self.assertEqual(limiter.metrics()["backoffs"], 1)
+        limiter.release(limiter.acquire(), None)
+        limiter.release(limiter.acquire(), 429)
+        self.assertEqual(limiter.metrics()["limit"], 1)
+
+    def test_slow(self):
+        limiter = ApplianceLimiter(concurrency=4, slow=0.01)
+        self.run_requests(limiter, 1, delay=0.02)
+        self.assertEqual(limiter.metrics()["limit"], 2)
+
+    def test_slow_body(self):
+        # a reply whose headers came quickly is not slow, however long its body took to read
+        limiter = ApplianceLimiter(concurrency=4, slow=0.01)
+        sent = limiter.acquire()
+        time.sleep(0.02)
+        limiter.release(sent, 200, latency=0.001)
+        self.assertEqual(limiter.metrics()["limit"], 4)
+
+    def test_rate(self):
+        limiter = ApplianceLimiter(rate=50, burst=1, concurrency=4)
+        start = time.time()
+        self.run_requests(limiter, 6, delay=0)
+        self.assertGreaterEqual(time.time() - start, 0.09)
+
+    def test_deadline(self):
+        limiter = ApplianceLimiter(concurrency=1)
+        sent = limiter.acquire()
+        with self.assertRaises(DeadlineExceeded):
+            limiter.acquire(deadline=time.time() + 0.02)
+        limiter.release(sent, 200)
+        limiter.release(limiter.acquire(deadline=time.time() + 0.02), 200)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_open(self):
+        breaker = CircuitBreaker(failures=3, reset=60)
+        for i in range(2):
+            breaker.record(False)
+        breaker.record(True)
+        for i in range(3):
+            self.assertTrue(breaker.allow())
+            breaker.record(False)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.state, OPEN)
+        self.assertGreater(breaker.retry_in(), 59)
+        self.assertEqual(breaker.metrics()["opens"], 1)
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(failures=1, reset=0.02)
+        breaker.record(False)
+        self.assertFalse(breaker.allow())
+        time.sleep(0.03)
+        # a single request is let through to find out if the appliance is back
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        breaker.record(False)
+        self.assertEqual(breaker.state, OPEN)
+        time.sleep(0.03)
+        self.assertTrue(breaker.allow())
+        breaker.record(None)
+        self.assertTrue(breaker.allow())
+        breaker.record(True)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.retry_in(), 0)
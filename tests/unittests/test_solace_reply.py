@@ -0,0 +1,27 @@
+import unittest2 as unittest
+
+from libsolace.SolaceReply import SolaceReply, SolaceReplyHandler
+
+
+class TestSolaceReply(unittest.TestCase):
+    def setUp(self):
+        self.document = {u'show': {u'client-username': {u'client-usernames': {u'client-username': {
+            u'profile': u'glassfish', u'acl-profile': None, u'num-clients': [u'0', u'1']}}}}}
+        self.reply = SolaceReply(self.document)
+
+    def test_navigate(self):
+        user = self.reply.show.client_username.client_usernames.client_username
+        self.assertIsInstance(user, SolaceReply)
+        self.assertEqual(user.profile, u'glassfish')
+        self.assertEqual(user.num_clients, [u'0', u'1'])
+
+    def test_none_value(self):
+        self.assertEqual(self.reply.show.client_username.client_usernames.client_username.acl_profile, 'None')
+
+    def test_missing_key(self):
+        self.assertRaises(KeyError, getattr, self.reply.show, 'queue')
+
+    def test_handler(self):
+        handler = SolaceReplyHandler([{'rpc-reply': {'rpc': self.document}}])
+        self.assertEqual(handler.reply.show.client_username.client_usernames.client_username.profile,
+                         u'glassfish')
@@ -0,0 +1,170 @@
+import shutil
+import tempfile
+import threading
+import time
+
+import unittest2 as unittest
+
+from libsolace.Exceptions import DeadlineExceeded
+from libsolace.SolaceAPI import SempResponse
+from libsolace.SolaceRequestCache import SolaceRequestCache, DetectionCache, is_runtime
+
+HOST = "http://solace1/SEMP"
+SHOW_QUEUE = '<rpc semp-version="soltr/7_1_1"><show><queue><name>q</name><vpn-name>%s</vpn-name></queue></show></rpc>'
+SHOW_VPNS = '<rpc semp-version="soltr/7_1_1"><show><message-vpn><vpn-name>*</vpn-name></message-vpn></show></rpc>'
+OK = {'@code': 'ok'}
+WRITE = '<rpc semp-version="soltr/7_1_1"><message-spool><vpn-name>%s</vpn-name></message-spool></rpc>'
+
+
+class TestSolaceRequestCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SolaceRequestCache()
+        for request in (SHOW_QUEUE % 'a', SHOW_QUEUE % 'b', SHOW_VPNS):
+            self.cache.put(HOST, request, SempResponse(HOST, 200, {'rpc-reply': {'request': request}}))
+
+    def test_normalised_key(self):
+        self.assertIsNotNone(self.cache.get(HOST, "\n" + (SHOW_QUEUE % 'a').replace("><", ">\n  <")))
+        self.assertIsNone(self.cache.get("http://solace2/SEMP", SHOW_QUEUE % 'a'))
+
+    def test_copies(self):
+        self.cache.get(HOST, SHOW_QUEUE % 'a').document['rpc-reply']['changed'] = True
+        self.assertNotIn('changed', self.cache.get(HOST, SHOW_QUEUE % 'a').document['rpc-reply'])
+
+    def test_invalidate_vpn(self):
+        self.cache.invalidate(WRITE % 'a')
+        self.assertIsNone(self.cache.get(HOST, SHOW_QUEUE % 'a'))
+        self.assertIsNone(self.cache.get(HOST, SHOW_VPNS))
+        self.assertIsNotNone(self.cache.get(HOST, SHOW_QUEUE % 'b'))
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 2, 'invalidations': 2})
+
+    def test_runtime(self):
+        self.assertFalse(is_runtime(SHOW_VPNS))
+        self.assertTrue(is_runtime(SHOW_QUEUE % 'a'))
+        self.assertTrue(is_runtime('<rpc semp-version="soltr/7_1_1"><show><client><name>*</name></client></show></rpc>'))
+        self.assertTrue(is_runtime(SHOW_VPNS.replace('</message-vpn>', '<stats/></message-vpn>')))
+
+    def test_invalidate_all(self):
+        self.cache.invalidate('<rpc semp-version="soltr/7_1_1"><no><snmp/></no></rpc>')
+        self.assertIsNone(self.cache.get(HOST, SHOW_QUEUE % 'b'))
+        self.assertEqual(self.cache.invalidations, 3)
+
+
+class TestSolaceRequestCacheTTL(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.loads = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self, document=None):
+        self.loads.append(True)
+        return SempResponse(HOST, 200, document or {'rpc-reply': {'loads': len(self.loads), 'execute-result': OK}})
+
+    def test_expiry(self):
+        cache = SolaceRequestCache(ttl=0.05)
+        cache.put(HOST, SHOW_VPNS, self.load())
+        self.assertIsNotNone(cache.get(HOST, SHOW_VPNS))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get(HOST, SHOW_VPNS))
+
+    def test_lru(self):
+        cache = SolaceRequestCache(max_entries=2)
+        for vpn in ('a', 'b'):
+            cache.put(HOST, SHOW_QUEUE % vpn, self.load())
+        cache.get(HOST, SHOW_QUEUE % 'a')
+        cache.put(HOST, SHOW_QUEUE % 'c', self.load())
+        self.assertIsNone(cache.get(HOST, SHOW_QUEUE % 'b'))
+        self.assertIsNotNone(cache.get(HOST, SHOW_QUEUE % 'a'))
+
+    def test_shared_directory(self):
+        first = SolaceRequestCache(ttl=60, directory=self.directory)
+        second = SolaceRequestCache(ttl=60, directory=self.directory)
+        first.fetch(HOST, SHOW_VPNS, self.load)
+        self.assertEqual(second.fetch(HOST, SHOW_VPNS, self.load).document,
+                         {'rpc-reply': {'loads': 1, 'execute-result': OK}})
+        self.assertEqual(len(self.loads), 1)
+        # a write through either marks the replies on disk stale
+        second.invalidate(WRITE % 'a')
+        self.assertEqual(SolaceRequestCache(ttl=60, directory=self.directory).fetch(HOST, SHOW_VPNS, self.load)
+                         .document, {'rpc-reply': {'loads': 2, 'execute-result': OK}})
+
+    def test_not_cached(self):
+        cache = SolaceRequestCache()
+        cache.fetch(HOST, SHOW_VPNS, lambda: SempResponse(HOST, 500, {'rpc-reply': {}}))
+        cache.fetch(HOST, SHOW_VPNS, lambda: SempResponse(HOST, 200, {'rpc-reply': {'execute-result': OK}},
+                                                          complete=False))
+        cache.fetch(HOST, SHOW_VPNS, lambda: SempResponse(HOST, 200, {'rpc-reply': {
+            'execute-result': {'@code': 'fail', '@reason': 'permission-not-allowed'}}}))
+        self.assertIsNone(cache.get(HOST, SHOW_VPNS))
+
+    def test_single_flight(self):
+        cache = SolaceRequestCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait()
+            return self.load()
+
+        leader = threading.Thread(target=cache.fetch, args=(HOST, SHOW_VPNS, slow))
+        leader.start()
+        started.wait()
+        results = []
+        follower = threading.Thread(target=lambda: results.append(cache.fetch(HOST, SHOW_VPNS, self.load)))
+        follower.start()
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(len(self.loads), 1)
+        self.assertEqual(results[0].document, {'rpc-reply': {'loads': 1, 'execute-result': OK}})
+
+    def test_single_flight_deadline(self):
+        cache = SolaceRequestCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def hung():
+            started.set()
+            release.wait()
+            return self.load()
+
+        leader = threading.Thread(target=cache.fetch, args=(HOST, SHOW_VPNS, hung))
+        leader.start()
+        started.wait()
+        try:
+            with self.assertRaises(DeadlineExceeded):
+                cache.fetch(HOST, SHOW_VPNS, self.load, deadline=time.time() + 0.05)
+        finally:
+            release.set()
+            leader.join()
+        self.assertEqual(len(self.loads), 1)
+
+
+class TestDetectionCache(unittest.TestCase):
+    DETECTION = {"primary": HOST, "backup": "http://solace2/SEMP", "version": "soltr/7_1_1"}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_shared(self):
+        DetectionCache(60, directory=self.directory).put("dev", self.DETECTION)
+        self.assertEqual(DetectionCache(60, directory=self.directory).get("dev"), self.DETECTION)
+        self.assertIsNone(DetectionCache(60, directory=self.directory).get("prod"))
+
+    def test_expiry(self):
+        cache = DetectionCache(0.05, directory=self.directory)
+        cache.put("dev", self.DETECTION)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("dev"))
+
+    def test_discard(self):
+        cache = DetectionCache(60, directory=self.directory)
+        cache.put("dev", self.DETECTION)
+        cache.discard("dev")
+        cache.discard("dev")
+        self.assertIsNone(cache.get("dev"))
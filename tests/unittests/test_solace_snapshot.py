@@ -0,0 +1,162 @@
+import copy
+import threading
+
+import unittest2 as unittest
+
+import libsolace
+from libsolace.SolaceExistenceIndex import SolaceExistenceIndex, PRIMARY, BACKUP
+from libsolace.SolaceSnapshot import SolaceSnapshot
+from libsolace.items.SolaceClientProfile import CLIENT_PROFILE_SNAPSHOT
+from libsolace.items.SolaceQueue import QUEUE_SNAPSHOT, QUEUE_INDEX
+from libsolace.items.SolaceUsers import USER_SNAPSHOT
+from libsolace.items.SolaceVPN import VPN_SNAPSHOT
+from tests.unittests import fakes
+
+QUEUE_CONFIG = {"retries": 0, "exclusive": "true", "queue_size": 1024, "consume": "all", "max_bind_count": 1000,
+                "owner": "%lsVPN"}
+QUEUE = {"name": "q1", "info": {"access-type": "exclusive", "owner": "v", "max-bind-count": "1000",
+                                "others-permission": "Consume (1100)", "quota": "1024", "max-redelivery": "0",
+                                "reject-msg-to-sender-on-discard": "true", "ingress-config-status": "Up",
+                                "egress-config-status": "Up"}}
+USER = {"client-username": "u1", "profile": "glassfish", "acl-profile": "v", "enabled": "true",
+        "guaranteed-endpoint-permission-override": "false", "subscription-manager": "false",
+        "password-configured": "true"}
+VPN = {"name": "v", "enabled": "true",
+       "authentication": {"basic-auth": {"enabled": "true", "auth-type": "internal", "radius-domain": None}},
+       "event-configuration": {"large-message-threshold": "4096", "event-log-tag": "v"}}
+VPN_SPOOL = {"name": "v", "maximum-spool-usage-mb": "4096"}
+
+
+class FakeAPI(fakes.FakeAPI):
+    """ Lists the detailed `objects` of each node """
+
+    def __init__(self, objects):
+        super(FakeAPI, self).__init__()
+        self.objects = objects
+        self.index = SolaceExistenceIndex(self)
+        self.snapshot = SolaceSnapshot(self)
+
+    def items(self, xml, path, node):
+        return self.objects[node].get(path.split('.')[3], [])
+
+    def reply(self, xml, node, kwargs):
+        raise AssertionError("unexpected request %s" % xml)
+
+
+class TestSolaceSnapshot(unittest.TestCase):
+    def provision_queue(self, info=None, shutdown_on_apply=True):
+        queue = dict(QUEUE, info=dict(QUEUE["info"], **(info or {})))
+        api = FakeAPI({PRIMARY: {"queue": [queue]}, BACKUP: {}})
+        plugin = libsolace.plugin_registry("SolaceQueue")(api=api, vpn_name="v", shutdown_on_apply=shutdown_on_apply,
+                                                          queues=[{"name": "q1", "queue_config": QUEUE_CONFIG}])
+        return api, [xml for xml, kwargs in plugin.commands.commands]
+
+    def test_queue_up_to_date(self):
+        api, commands = self.provision_queue()
+        self.assertEqual(commands, [])
+        self.assertEqual(len(api.requests), 1)
+        self.assertIn('<detail/>', api.requests[0][1])
+
+    def test_queue_changed_live(self):
+        # the max bind count is changed without shutting the queue down
+        api, commands = self.provision_queue({"max-bind-count": "10"})
+        self.assertEqual(len(commands), 1)
+        self.assertIn('<max-bind-count>', commands[0])
+
+    def test_queue_changed_shutdown(self):
+        api, commands = self.provision_queue({"access-type": "non-exclusive", "max-bind-count": "10"})
+        self.assertEqual([xml.count(tag) for xml, tag in zip(commands, ['<egress/>', '<access-type>', '<max-bind-count>',
+                                                                         '<no><shutdown>'])], [1, 1, 1, 1])
+        self.assertEqual(len(commands), 4)
+
+    def test_queue_new(self):
+        api, commands = self.provision_queue()
+        api.snapshot.clear()
+        api.objects = {PRIMARY: {}, BACKUP: {}}
+        api.index.clear()
+        plugin = libsolace.plugin_registry("SolaceQueue")(api=api, vpn_name="v", shutdown_on_apply=False,
+                                                          queues=[{"name": "q2", "queue_config": QUEUE_CONFIG}])
+        self.assertEqual(len(plugin.commands.commands), 9)
+        # created shut down, so it is not shut down again
+        plugin = libsolace.plugin_registry("SolaceQueue")(api=api, vpn_name="v", shutdown_on_apply=True,
+                                                          queues=[{"name": "q3", "queue_config": QUEUE_CONFIG}])
+        self.assertEqual(len(plugin.commands.commands), 9)
+
+    def test_users(self):
+        api = FakeAPI({PRIMARY: {"client-username": [USER]}, BACKUP: {"client-username": [USER]}})
+        users = libsolace.plugin_registry("SolaceUsers")(
+            api=api, vpn_name="v", client_profile="glassfish", acl_profile="v", testmode=False, shutdown_on_apply=False,
+            users=[{"username": "u1", "password": "p"}, {"username": "u2", "password": "p"}])
+        # u1 is up to date, u2 is new and created shut down, then set up and enabled
+        self.assertEqual([kwargs["username"] for xml, kwargs in users.commands.commands], ["u2"] * 7)
+        self.assertEqual(len(api.requests), 2)
+
+    def test_users_shutdown(self):
+        users = [dict(USER, **{"client-username": "u1", "password-configured": "false"}),
+                 dict(USER, **{"client-username": "u2", "profile": "default"})]
+        api = FakeAPI({PRIMARY: {"client-username": users}, BACKUP: {"client-username": users}})
+        plugin = libsolace.plugin_registry("SolaceUsers")(
+            api=api, vpn_name="v", client_profile="glassfish", acl_profile="v", testmode=False, shutdown_on_apply=True,
+            users=[{"username": "u1", "password": "p"}, {"username": "u2", "password": "p"}])
+        commands = [(kwargs["username"], xml) for xml, kwargs in plugin.commands.commands]
+        # the password is changed live, the client profile only while the user is shut down
+        self.assertEqual([username for username, xml in commands], ["u1", "u2", "u2", "u2"])
+        self.assertIn('<password>', commands[0][1])
+        self.assertEqual([xml.count(tag) for (username, xml), tag in zip(commands[1:], ['<shutdown/>', '<client-profile>',
+                                                                                         '<no><shutdown/>'])], [1, 1, 1])
+
+    def vpn_api(self, vpn):
+        # the snapshot records the changes in the listed objects
+        return FakeAPI(dict((node, {"message-vpn": [copy.deepcopy(vpn)], "message-spool": [dict(VPN_SPOOL)]})
+                            for node in (PRIMARY, BACKUP)))
+
+    def test_vpn_up_to_date(self):
+        api = self.vpn_api(VPN)
+        plugin = libsolace.plugin_registry("SolaceVPN")(api=api, vpn_name="v", owner_username="v", acl_profile="v")
+        self.assertEqual(plugin.commands.commands, [])
+        self.assertEqual(len(api.requests), 4)
+
+    def test_vpn_changed(self):
+        vpn = dict(VPN, authentication={"basic-auth": {"auth-type": "radius", "radius-domain": "r"}})
+        api = self.vpn_api(vpn)
+        plugin = libsolace.plugin_registry("SolaceVPN")(api=api, vpn_name="v", owner_username="v", acl_profile="v",
+                                                        max_spool_usage=8192)
+        self.assertEqual([xml.count(tag) for (xml, kwargs), tag in zip(plugin.commands.commands, [
+            '<radius-domain>', '<internal/>', '<max-spool-usage>'])], [1, 1, 1])
+        self.assertEqual(len(plugin.commands.commands), 3)
+        # recorded as set
+        self.assertEqual(api.snapshot.item(VPN_SNAPSHOT, BACKUP, vpn_name="v")["authentication"]["basic-auth"],
+                         {"auth-type": "internal", "radius-domain": ""})
+
+    def test_client_profile_versions(self):
+        # client profiles are only in a vpn from soltr/6_2
+        self.assertNotIn('<vpn-name>', CLIENT_PROFILE_SNAPSHOT.request("soltr/6_0", "v"))
+        self.assertIn('<vpn-name>v</vpn-name>', CLIENT_PROFILE_SNAPSHOT.request("soltr/7_1_1", "v"))
+
+    def test_concurrent_listing(self):
+        # a slow listing holds up neither the other vpns nor the existence index, and is shared by the threads
+        api = FakeAPI({PRIMARY: {"queue": [QUEUE]}, BACKUP: {}})
+        listing, release, released = threading.Event(), threading.Event(), []
+        rpc_iter = api.rpc_iter
+
+        def slow(xml, path, **kwargs):
+            if '<vpn-name>slow</vpn-name>' in xml:
+                listing.set()
+                released.append(release.wait(5))
+            return rpc_iter(xml, path, **kwargs)
+
+        api.rpc_iter = slow
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            api.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='slow', queue_name='q1'))) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        listing.wait()
+        self.assertIsNotNone(api.snapshot.item(QUEUE_SNAPSHOT, PRIMARY, vpn_name='v', queue_name='q1'))
+        self.assertTrue(api.index.exists(QUEUE_INDEX, PRIMARY, vpn_name='other', queue_name='q1'))
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(released, [True])
+        self.assertEqual(results, [True, True])
+        self.assertEqual(len([xml for node, xml in api.requests if '<vpn-name>slow</vpn-name>' in xml]), 1)
@@ -0,0 +1,47 @@
+import unittest2 as unittest
+
+from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
+
+
+class TestSolaceXMLBuilder(unittest.TestCase):
+    def setUp(self):
+        self.xml = SolaceXMLBuilder(version="soltr/7_1_1")
+
+    def test_nested(self):
+        self.xml.message_vpn.vpn_name = "dev_testvpn"
+        self.xml.message_vpn.client_username.username = "dev_testuser"
+        self.xml.message_vpn.client_username.no.shutdown
+        self.assertEqual(str(self.xml),
+                         '<rpc semp-version="soltr/7_1_1"><message-vpn><vpn-name>dev_testvpn</vpn-name>'
+                         '<client-username><username>dev_testuser</username><no><shutdown/></no></client-username>'
+                         '</message-vpn></rpc>')
+
+    def test_values(self):
+        self.xml.show.queue.name = 'a&b<c>"d'
+        self.xml.show.queue.count = 10
+        self.xml.show.queue.detail = ''
+        self.assertEqual(str(self.xml),
+                         '<rpc semp-version="soltr/7_1_1"><show><queue><name>a&amp;b&lt;c&gt;&quot;d</name>'
+                         '<count>10</count><detail></detail></queue></show></rpc>')
+
+    def test_list(self):
+        self.xml.show.queue.name = ['q1', 'q2']
+        self.xml.show.queue.empty = []
+        self.assertEqual(str(self.xml),
+                         '<rpc semp-version="soltr/7_1_1"><show><queue><name>q1</name><name>q2</name>'
+                         '</queue></show></rpc>')
+
+    def test_one_root(self):
+        self.xml.show.version
+        self.xml.message_vpn.vpn_name = "dev_testvpn"
+        with self.assertRaises(AttributeError):
+            str(self.xml)
+
+    def test_reassign_keeps_order(self):
+        self.xml.message_vpn.vpn_name = "first"
+        self.xml.message_vpn.no.shutdown
+        self.xml.message_vpn.vpn_name = "dev_testvpn"
+        self.assertEqual(str(self.xml),
+                         '<rpc semp-version="soltr/7_1_1"><message-vpn><vpn-name>dev_testvpn</vpn-name>'
+                         '<no><shutdown/></no></message-vpn></rpc>')
+        self.assertEqual(self.xml.version, "soltr/7_1_1")
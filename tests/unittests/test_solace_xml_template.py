@@ -0,0 +1,61 @@
+import unittest2 as unittest
+
+from lxml import etree
+
+from libsolace.Exceptions import MissingProperty
+from libsolace.SolaceCommandQueue import SolaceCommandQueue, ValidatedXML
+from libsolace.SolaceXMLBuilder import SolaceXMLBuilder
+from libsolace.SolaceXMLTemplate import SolaceXMLTemplate
+
+
+class TestSolaceXMLTemplate(unittest.TestCase):
+    def setUp(self):
+        self.template = SolaceXMLTemplate(("message_spool.vpn_name", "vpn_name"),
+                                          ("message_spool.queue.name", "queue_name"),
+                                          ("message_spool.queue.max_bind_count.value", "max_bind_count"))
+
+    def test_render_matches_builder(self):
+        xml = SolaceXMLBuilder(version="soltr/7_1_1")
+        xml.message_spool.vpn_name = "dev_testvpn"
+        xml.message_spool.queue.name = "a&b<c>"
+        xml.message_spool.queue.max_bind_count.value = 10
+        rendered = self.template.render("soltr/7_1_1", vpn_name="dev_testvpn", queue_name="a&b<c>",
+                                        max_bind_count=10)
+        self.assertEqual(rendered, str(xml))
+        self.assertNotIsInstance(rendered, ValidatedXML)
+
+    def test_unicode_version(self):
+        rendered = self.template.render(u"soltr/7_1_1", vpn_name="v", queue_name="q", max_bind_count=10)
+        self.assertIsInstance(rendered, str)
+        self.assertTrue(rendered.startswith('<rpc semp-version="soltr/7_1_1">'))
+
+    def test_missing_param(self):
+        self.assertRaises(MissingProperty, self.template.render, "soltr/7_1_1", vpn_name="dev_testvpn",
+                          queue_name="q")
+
+    def test_validated_once_per_version(self):
+        self.template.render("soltr/7_1_1", vpn_name="v", queue_name="q", max_bind_count=10)
+        self.assertEqual(self.template.validated, set(["soltr/7_1_1"]))
+        # later renders are not validated
+        self.template.render("soltr/7_1_1", vpn_name="v", queue_name="q", max_bind_count="x")
+
+    def test_queue_validates_values(self):
+        queue = SolaceCommandQueue(version="soltr/7_1_1")
+        queue.enqueue(self.template.render("soltr/7_1_1", vpn_name="v", queue_name="q", max_bind_count=10))
+        self.assertRaises(etree.XMLSyntaxError, queue.enqueue,
+                          self.template.render("soltr/7_1_1", vpn_name="v", queue_name="q",
+                                               max_bind_count="not-a-number"))
+        self.assertEqual(len(queue.commands), 1)
+
+    def test_fixed(self):
+        template = SolaceXMLTemplate(("show.message_spool", None))
+        self.assertIsInstance(template.render("soltr/7_1_1"), ValidatedXML)
+
+    def test_invalid_shape(self):
+        template = SolaceXMLTemplate(("message_spool.queue.no_such_element", None))
+        self.assertRaises(etree.XMLSyntaxError, template.render, "soltr/7_1_1")
+
+    def test_queue_skips_validation(self):
+        queue = SolaceCommandQueue(version="soltr/7_1_1")
+        queue.enqueue(ValidatedXML("<not-semp/>"))
+        self.assertEqual(queue.commands, [("<not-semp/>", {})])
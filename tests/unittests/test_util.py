@@ -1,4 +1,6 @@
+import BaseHTTPServer
 import sys
+import threading
 
 import unittest2 as unittest
 from types import MethodType
@@ -27,6 +29,70 @@ class TestUtil(unittest.TestCase):
         with self.assertRaisesRegexp(Exception, "Failed to parse version 6_2") as cm:
             version_equal_or_greater_than('6_2', 'soltr/7_0')
 
+    def test_get_calling_module(self):
+        import libsolace.util
+        caller = lambda: get_calling_module()
+        self.assertEqual(caller(), "test_util.py:%s" % sys._getframe().f_lineno)
+        self.assertEqual(get_calling_module(point=100), "Unknown")
+        quiet = logging.getLogger("libsolace.tests.quiet")
+        quiet.setLevel(logging.WARNING)
+        self.assertEqual(get_calling_module(logger=quiet, level=logging.INFO), "Unknown")
+        self.assertNotEqual(get_calling_module(logger=quiet, level=logging.ERROR), "Unknown")
+        libsolace.util.CALLER_LOOKUP = False
+        try:
+            self.assertEqual(caller(), "Unknown")
+        finally:
+            libsolace.util.CALLER_LOOKUP = True
+
+    def test_get_connection_pool(self):
+        pool = get_connection_pool('http://solace1.mydomain.com/SEMP', maxsize=3)
+        self.assertEqual(pool.host, 'solace1.mydomain.com')
+        self.assertEqual(pool.pool.maxsize, 3)
+        self.assertEqual(pool.headers, {})
+
+    def test_get_connection_pool_no_keep_alive(self):
+        pool = get_connection_pool('https://solace1.mydomain.com/SEMP', keep_alive=False, verifySsl=False)
+        self.assertEqual(pool.headers, {'Connection': 'close'})
+        self.assertEqual(pool.cert_reqs, 'CERT_NONE')
+
+    def test_pooled_request_line(self):
+        lines = []
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_POST(self):
+                lines.append(self.requestline)
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        try:
+            url = 'http://127.0.0.1:%s/SEMP' % server.server_address[1]
+            data, headers, code = httpRequest(url, fields='<rpc/>', method='POST', pool=get_connection_pool(url))
+        finally:
+            thread.join()
+            server.server_close()
+        self.assertEqual(code, 200)
+        self.assertEqual(lines, ['POST /SEMP HTTP/1.1'])
+
+    def test_call_concurrently(self):
+        def double(x):
+            if x == 2:
+                raise ValueError("two")
+            return x * 2
+
+        results = call_concurrently(double, [1, 2, 3])
+        self.assertEqual(results[0], (2, None))
+        self.assertEqual(results[2], (6, None))
+        self.assertIsNone(results[1][0])
+        self.assertIsInstance(results[1][1][1], ValueError)
+
 
 class PrePostCaller:
     def __init__(self, other, api):
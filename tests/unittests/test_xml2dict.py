@@ -0,0 +1,47 @@
+import unittest2 as unittest
+from StringIO import StringIO
+
+from libsolace import xml2dict
+
+reply = """<rpc-reply semp-version="soltr/7_1_1">
+  <rpc>
+    <show>
+      <queue>
+        <queues>
+          <queue><name>q1</name></queue>
+          <queue><name>q2</name></queue>
+        </queues>
+      </queue>
+    </show>
+  </rpc>
+  <more-cookie>
+    <rpc semp-version="soltr/7_1_1"><show><queue><name>*</name><count/><start>2</start></queue></show></rpc>
+  </more-cookie>
+  <execute-result code="ok"/>
+</rpc-reply>"""
+
+path = 'rpc-reply.rpc.show.queue.queues.queue'.split('.')
+
+
+class TestXml2Dict(unittest.TestCase):
+    def test_stream(self):
+        items = []
+        document = xml2dict.stream(StringIO(reply), path, lambda p, item: items.append(item) or True,
+                                   keep_xml=('more-cookie',))
+        self.assertEqual(items, [{'name': 'q1'}, {'name': 'q2'}])
+        self.assertEqual(document['rpc-reply']['@semp-version'], 'soltr/7_1_1')
+        self.assertEqual(document['rpc-reply']['execute-result'], {'@code': 'ok'})
+        self.assertEqual(document['rpc-reply']['rpc'], {'show': {'queue': {'queues': {}}}})
+        cookie = xml2dict.parse(document['rpc-reply']['more-cookie'])
+        self.assertEqual(cookie['rpc']['show']['queue']['start'], '2')
+
+    def test_stream_matches_parse(self):
+        items = []
+        xml2dict.stream(reply, path, lambda p, item: items.append(item) or True)
+        self.assertEqual(items, xml2dict.parse(reply)['rpc-reply']['rpc']['show']['queue']['queues']['queue'])
+
+    def test_stream_interrupted(self):
+        items = []
+        with self.assertRaises(xml2dict.ParsingInterrupted):
+            xml2dict.stream(reply, path, lambda p, item: items.append(item))
+        self.assertEqual(items, [{'name': 'q1'}])